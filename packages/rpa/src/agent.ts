@@ -6,6 +6,7 @@
  */
 
 import { spawn } from 'node:child_process';
+import { createInterface } from 'node:readline';
 import { fileURLToPath } from 'node:url';
 import { dirname, join } from 'node:path';
 import { existsSync, mkdirSync, readFileSync } from 'node:fs';
@@ -29,6 +30,8 @@ export interface RPAResult {
   outputDir: string;
   article?: string;
   outline?: string;
+  articlePath?: string;
+  outlinePath?: string;
   model: string;
   searchEngine: string;
   version: string;
@@ -36,6 +39,49 @@ export interface RPAResult {
   error?: string;
 }
 
+/**
+ * One progress event from `runner.py --events` (see storm/events.py)
+ */
+export interface RPAEvent {
+  event:
+    | 'start'
+    | 'phase_start'
+    | 'phase_skip'
+    | 'phase_end'
+    | 'search'
+    | 'llm_call'
+    | 'chunk'
+    | 'log'
+    | 'error'
+    | 'result';
+  ts: number;
+  phase?: string;
+  [key: string]: unknown;
+}
+
+/**
+ * Build an `RPAResult` from a Python result dict (snake_case keys), falling
+ * back to the configuration for anything the result does not report
+ */
+export function toRPAResult(
+  result: Record<string, unknown>,
+  topic: string,
+  config: Required<RPAConfig>
+): RPAResult {
+  return {
+    success: Boolean(result.success ?? true),
+    topic: String(result.topic ?? topic),
+    timestamp: String(result.timestamp ?? new Date().toISOString()),
+    outputDir: String(result.output_dir ?? config.outputDir),
+    articlePath: (result.article_path as string | null) ?? undefined,
+    outlinePath: (result.outline_path as string | null) ?? undefined,
+    model: String(result.model ?? config.model),
+    searchEngine: String(result.search_engine ?? config.searchEngine),
+    version: String(result.version ?? VERSION),
+    author: String(result.author ?? AUTHOR),
+  };
+}
+
 export class ResearchPaperAgent {
   private config: Required<RPAConfig>;
   private pythonScriptPath: string;
@@ -85,9 +131,13 @@ export class ResearchPaperAgent {
   }
 
   /**
-   * Generate a research paper on the given topic
+   * Generate a research paper on the given topic.
+   *
+   * Progress is read line by line from the runner's NDJSON event stream and
+   * passed to `onEvent` as it arrives. The result points to the article on
+   * disk (`articlePath`) rather than carrying its text.
    */
-  async generate(topic: string): Promise<RPAResult> {
+  async generate(topic: string, onEvent?: (event: RPAEvent) => void): Promise<RPAResult> {
     // Ensure output directory exists
     if (!existsSync(this.config.outputDir)) {
       mkdirSync(this.config.outputDir, { recursive: true });
@@ -101,61 +151,49 @@ export class ResearchPaperAgent {
         '--model', this.config.model,
         '--search', this.config.searchEngine,
         '--pages', this.config.maxPages.toString(),
-        '--json',
+        '--events',
       ];
 
-      let stdout = '';
-      let stderr = '';
+      let result: Record<string, unknown> | null = null;
+      let failure: string | null = null;
+      let stderrTail = '';
 
       const proc = spawn(this.config.pythonCommand, args, {
         env: { ...process.env },
       });
 
-      proc.stdout.on('data', (data) => {
-        stdout += data.toString();
-        // Stream output for progress
-        process.stdout.write(data);
+      const lines = createInterface({ input: proc.stdout });
+      lines.on('line', (line) => {
+        let event: RPAEvent;
+        try {
+          event = JSON.parse(line) as RPAEvent;
+        } catch {
+          // Not an event (e.g. output from a dependency); pass it through
+          process.stdout.write(line + '\n');
+          return;
+        }
+
+        if (event.event === 'result') {
+          result = event.result as Record<string, unknown>;
+        } else if (event.event === 'error') {
+          failure = String(event.error);
+        }
+        onEvent?.(event);
       });
 
       proc.stderr.on('data', (data) => {
-        stderr += data.toString();
+        // Keep only the end of stderr for error messages
+        stderrTail = (stderrTail + data.toString()).slice(-4000);
         process.stderr.write(data);
       });
 
       proc.on('close', (code) => {
         if (code === 0) {
-          try {
-            // Find JSON in output (after banner)
-            const jsonMatch = stdout.match(/\{[\s\S]*\}$/);
-            if (jsonMatch) {
-              const result = JSON.parse(jsonMatch[0]) as RPAResult;
-              resolve(result);
-            } else {
-              resolve({
-                success: true,
-                topic,
-                timestamp: new Date().toISOString(),
-                outputDir: this.config.outputDir,
-                model: this.config.model,
-                searchEngine: this.config.searchEngine,
-                version: VERSION,
-                author: AUTHOR,
-              });
-            }
-          } catch {
-            resolve({
-              success: true,
-              topic,
-              timestamp: new Date().toISOString(),
-              outputDir: this.config.outputDir,
-              model: this.config.model,
-              searchEngine: this.config.searchEngine,
-              version: VERSION,
-              author: AUTHOR,
-            });
-          }
+          resolve(toRPAResult(result ?? {}, topic, this.config));
         } else {
-          reject(new Error(`Research paper generation failed: ${stderr || 'Unknown error'}`));
+          reject(new Error(
+            `Research paper generation failed: ${failure || stderrTail || 'Unknown error'}`
+          ));
         }
       });
 
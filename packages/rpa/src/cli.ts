@@ -10,6 +10,7 @@ import { Command } from 'commander';
 import chalk from 'chalk';
 import ora from 'ora';
 import { config as dotenvConfig } from 'dotenv';
+import { readFileSync } from 'node:fs';
 import { ResearchPaperAgent } from './agent.js';
 import {
   VERSION,
@@ -112,8 +113,22 @@ export async function runCLI(args?: string[]): Promise<void> {
   }).start();
 
   try {
-    spinner.text = 'Phase 1: Research and perspective gathering...';
-    const result = await agent.generate(opts.topic);
+    spinner.text = 'Starting...';
+    let searches = 0;
+    let tokens = 0;
+    let phase = '';
+    const result = await agent.generate(opts.topic, (event) => {
+      if (event.event === 'phase_start' && event.phase) {
+        phase = event.phase;
+      } else if (event.event === 'search') {
+        searches += 1;
+      } else if (event.event === 'llm_call') {
+        tokens += Number(event.input_tokens ?? 0) + Number(event.output_tokens ?? 0);
+      } else {
+        return;
+      }
+      spinner.text = `Phase: ${phase} (${searches} searches, ${tokens.toLocaleString()} tokens)`;
+    });
 
     spinner.succeed('Research paper generated successfully!');
 
@@ -124,8 +139,8 @@ export async function runCLI(args?: string[]): Promise<void> {
       console.log(chalk.green.bold(`RESEARCH PAPER: ${opts.topic}`));
       console.log(chalk.green('═'.repeat(60) + '\n'));
 
-      if (result.article) {
-        console.log(result.article);
+      if (result.articlePath) {
+        console.log(readFileSync(result.articlePath, 'utf-8'));
       } else {
         console.log(chalk.yellow('Article content available in output directory'));
       }
@@ -10,6 +10,7 @@
  * @packageDocumentation
  */
 
-export { ResearchPaperAgent, type RPAConfig, type RPAResult } from './agent.js';
+export { ResearchPaperAgent, type RPAConfig, type RPAEvent, type RPAResult } from './agent.js';
+export { ResearchPaperWorker } from './worker.js';
 export { runCLI } from './cli.js';
 export { VERSION, AUTHOR, LICENSE } from './constants.js';
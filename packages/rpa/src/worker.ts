@@ -0,0 +1,158 @@
+/**
+ * Research Paper Agent (RPA) - Persistent Worker Client
+ *
+ * Copyright (c) 2025 Aditya Patange. All rights reserved.
+ * Licensed under MIT License.
+ */
+
+import { spawn, type ChildProcessWithoutNullStreams } from 'node:child_process';
+import { createInterface } from 'node:readline';
+import { fileURLToPath } from 'node:url';
+import { dirname, join } from 'node:path';
+import { DEFAULT_CONFIG } from './constants.js';
+import { toRPAResult, type RPAConfig, type RPAResult } from './agent.js';
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = dirname(__filename);
+
+interface PendingRequest {
+  resolve: (value: unknown) => void;
+  reject: (reason: Error) => void;
+}
+
+interface WorkerResponse {
+  id: number | null;
+  result?: unknown;
+  error?: { type: string; message: string };
+  elapsed?: number;
+}
+
+/**
+ * Keeps one Python worker (storm/worker.py) alive across many papers, so
+ * interpreter startup, imports and HTTP clients are paid for only once.
+ */
+export class ResearchPaperWorker {
+  private config: Required<RPAConfig>;
+  private workerScriptPath: string;
+  private proc: ChildProcessWithoutNullStreams | null = null;
+  private pending = new Map<number, PendingRequest>();
+  private nextId = 1;
+
+  constructor(config: RPAConfig = {}) {
+    this.config = {
+      outputDir: config.outputDir ?? DEFAULT_CONFIG.outputDir,
+      model: config.model ?? DEFAULT_CONFIG.model,
+      searchEngine: config.searchEngine ?? DEFAULT_CONFIG.searchEngine,
+      maxPages: config.maxPages ?? DEFAULT_CONFIG.maxPages,
+      pythonCommand: config.pythonCommand ?? DEFAULT_CONFIG.pythonCommand,
+    };
+
+    this.workerScriptPath = join(__dirname, '..', 'storm', 'worker.py');
+  }
+
+  /**
+   * Start the worker process if it is not already running
+   */
+  start(): void {
+    if (this.proc) {
+      return;
+    }
+
+    const proc = spawn(this.config.pythonCommand, [this.workerScriptPath], {
+      env: { ...process.env },
+    });
+
+    createInterface({ input: proc.stdout }).on('line', (line) => {
+      let response: WorkerResponse;
+      try {
+        response = JSON.parse(line) as WorkerResponse;
+      } catch {
+        return;
+      }
+
+      const request = response.id === null ? undefined : this.pending.get(response.id);
+      if (!request) {
+        return;
+      }
+      this.pending.delete(response.id as number);
+
+      if (response.error) {
+        request.reject(new Error(`${response.error.type}: ${response.error.message}`));
+      } else {
+        request.resolve(response.result);
+      }
+    });
+
+    // Writing to a worker that has died fails with EPIPE; fail its requests
+    // instead of leaving the error unhandled
+    proc.stdin.on('error', (err) => {
+      for (const request of this.pending.values()) {
+        request.reject(new Error(`Failed to write to Python worker: ${err.message}`));
+      }
+      this.pending.clear();
+    });
+
+    proc.stderr.on('data', (data) => {
+      process.stderr.write(data);
+    });
+
+    proc.on('close', (code) => {
+      this.proc = null;
+      for (const request of this.pending.values()) {
+        request.reject(new Error(`Worker exited (exit code: ${code})`));
+      }
+      this.pending.clear();
+    });
+
+    proc.on('error', (err) => {
+      for (const request of this.pending.values()) {
+        request.reject(new Error(`Failed to run Python worker: ${err.message}`));
+      }
+      this.pending.clear();
+    });
+
+    this.proc = proc;
+  }
+
+  /**
+   * Send one request to the worker and wait for its response
+   */
+  request<T>(method: string, params: Record<string, unknown> = {}): Promise<T> {
+    this.start();
+    const id = this.nextId++;
+
+    return new Promise<T>((resolve, reject) => {
+      this.pending.set(id, { resolve: resolve as (value: unknown) => void, reject });
+      this.proc!.stdin.write(JSON.stringify({ id, method, params }) + '\n');
+    });
+  }
+
+  /**
+   * Generate a research paper on the given topic using the warm worker
+   */
+  async generate(topic: string): Promise<RPAResult> {
+    const result = await this.request<Record<string, unknown>>('generate', {
+      topic,
+      output_dir: this.config.outputDir,
+      model: this.config.model,
+      search_engine: this.config.searchEngine,
+      max_pages: this.config.maxPages,
+    });
+    return toRPAResult(result, topic, this.config);
+  }
+
+  /**
+   * Ask the worker to shut down and wait for it to exit
+   */
+  async close(): Promise<void> {
+    const proc = this.proc;
+    if (!proc) {
+      return;
+    }
+
+    const exited = new Promise<void>((resolve) => proc.on('close', () => resolve()));
+    await this.request('shutdown').catch(() => undefined);
+    proc.stdin.end();
+    await exited;
+  }
+}
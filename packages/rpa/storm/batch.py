@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""
+Research Paper Agent (RPA) - Batch Generation
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+Generate papers for many topics concurrently. Topics come from a file with
+one topic per line, or JSON lines with per-topic overrides; failures are
+recorded and the batch carries on. A manifest summarizing every topic is
+rewritten as each one finishes.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from .direct_generator import (
+        _anthropic_client, generate_research_paper, phase_models, PHASES, VERSION, AUTHOR
+    )
+    from .evidence import EvidenceIndex
+    from .llm_cache import DEFAULT_MAX_MB, ResponseCache
+    from .quota import get_governor
+    from .store import ArtifactStore
+except ImportError:  # Executed as a script
+    from direct_generator import (
+        _anthropic_client, generate_research_paper, phase_models, PHASES, VERSION, AUTHOR
+    )
+    from evidence import EvidenceIndex
+    from llm_cache import DEFAULT_MAX_MB, ResponseCache
+    from quota import get_governor
+    from store import ArtifactStore
+
+logger = logging.getLogger(__name__)
+
+
+# Per-topic override keys accepted in a JSONL topics file, mapped to the
+# parameter each generator takes
+DIRECT_OVERRIDES = {
+    "pages": "target_pages",
+    "output": "output_dir",
+    "parallel_sections": "parallel_sections",
+    "concurrency": "concurrency",
+    "polish_mode": "polish_mode",
+    "models": "models",
+    "deadline": "deadline",
+}
+STORM_OVERRIDES = {
+    "pages": "max_pages",
+    "output": "output_dir",
+    "model": "model",
+    "search": "search_engine",
+    "search_engine": "search_engine",
+    "hedge_after": "hedge_after",
+    "deadline": "deadline",
+}
+# STORM options passed to ResearchPaperAgent.generate rather than the constructor
+STORM_RUN_OPTIONS = ("deadline", "degrade")
+
+
+def load_topics(path: str) -> list:
+    """
+    Read a topics file into a list of job dicts, each with a ``topic``.
+
+    Plain lines are topics; lines starting with ``{`` are JSON objects with
+    a ``topic`` and optional overrides such as ``pages`` or ``model``.
+    Blank lines and ``#`` comments are ignored.
+    """
+    jobs = []
+    for number, line in enumerate(Path(path).read_text(encoding="utf-8").splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{number}: invalid JSON: {e}")
+            if not job.get("topic"):
+                raise ValueError(f"{path}:{number}: missing \"topic\"")
+        else:
+            job = {"topic": line}
+        jobs.append(job)
+    return jobs
+
+
+def _overrides(job: dict, mapping: dict) -> dict:
+    ignored = [key for key in job if key != "topic" and key not in mapping]
+    if ignored:
+        logger.warning(f"Ignoring unsupported override(s) for {job['topic']!r}: {', '.join(ignored)}")
+    return {mapping[key]: value for key, value in job.items() if key in mapping}
+
+
+def _direct_overrides(job: dict) -> dict:
+    """
+    Direct generator overrides for ``job``. ``model`` sets the model of
+    every phase, and ``models`` still picks individual phases.
+    """
+    job = dict(job)
+    model = job.pop("model", None)
+    overrides = _overrides(job, DIRECT_OVERRIDES)
+    if model:
+        overrides["models"] = {**dict.fromkeys(PHASES, model), **overrides.get("models", {})}
+    return overrides
+
+
+def _record(job: dict, started: float, result: dict = None, error: Exception = None) -> dict:
+    """Manifest entry for one finished topic."""
+    record = {
+        "topic": job["topic"],
+        "success": error is None,
+        "elapsed": round(time.monotonic() - started, 3),
+    }
+    if error is not None:
+        record["error"] = f"{type(error).__name__}: {error}"
+        return record
+
+    telemetry = result.get("telemetry") or {}
+    record.update({
+        "output_dir": result.get("output_dir"),
+        "article_path": result.get("article_path"),
+        "cost_usd": telemetry.get("llm", {}).get("cost_usd"),
+        "output_tokens": telemetry.get("llm", {}).get("output_tokens"),
+    })
+    return record
+
+
+class Manifest:
+    """
+    Batch summary, rewritten atomically whenever a topic finishes. With a
+    ``store`` each finished paper is also added to the artifact store.
+    """
+
+    def __init__(self, path: Path, generator: str, jobs: list, workers: int, store=None):
+        self.path = path
+        self.store = store
+        self.started = time.monotonic()
+        self.data = {
+            "generator": generator,
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "workers": workers,
+            "total": len(jobs),
+            "succeeded": 0,
+            "failed": 0,
+            "topics": [],
+            "version": VERSION,
+            "author": AUTHOR,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.save()
+
+    def add(self, record: dict):
+        if self.store is not None and record["success"]:
+            try:
+                record["stored_as"] = self.store.ingest(record["output_dir"])["run"]
+            except Exception as e:
+                logger.warning(f"Could not store {record['output_dir']}: {e}")
+        self.data["topics"].append(record)
+        self.data["succeeded" if record["success"] else "failed"] += 1
+        status = "done" if record["success"] else f"FAILED ({record['error']})"
+        finished = self.data["succeeded"] + self.data["failed"]
+        logger.info(f"[{finished}/{self.data['total']}] {record['topic']}: {status} in {record['elapsed']}s")
+        self.save()
+
+    def finish(self) -> dict:
+        costs = [t["cost_usd"] for t in self.data["topics"] if t.get("cost_usd") is not None]
+        self.data["wall_seconds"] = round(time.monotonic() - self.started, 3)
+        self.data["cost_usd"] = round(sum(costs), 4) if costs else None
+        self.data["finished"] = datetime.now().isoformat(timespec="seconds")
+        self.save()
+        return self.data
+
+    def save(self):
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".manifest-", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+async def _run_direct_batch(jobs: list, workers: int, options: dict, manifest: Manifest, client=None):
+    """
+    Run direct-generator jobs with at most ``workers`` topics in flight.
+
+    Every topic shares one Anthropic client, and so one HTTP connection
+    pool; the synchronous generator runs in a worker thread per topic.
+    """
+    client = client or _anthropic_client()
+    semaphore = asyncio.Semaphore(workers)
+
+    async def run(job):
+        async with semaphore:
+            started = time.monotonic()
+            kwargs = {**options, **_direct_overrides(job)}
+            try:
+                result = await asyncio.to_thread(
+                    generate_research_paper, job["topic"], client=client, **kwargs
+                )
+                manifest.add(_record(job, started, result=result))
+            except Exception as e:
+                logger.error(f"Topic {job['topic']!r} failed: {e}")
+                manifest.add(_record(job, started, error=e))
+
+    await asyncio.gather(*(run(job) for job in jobs))
+
+
+def _storm_job(job: dict, options: dict, quota_share: float) -> dict:
+    """Generate one STORM paper; runs in a worker process."""
+    try:
+        from .runner import ResearchPaperAgent
+    except ImportError:  # Executed as a script
+        from runner import ResearchPaperAgent
+
+    # Each worker process has its own governor, so give it an equal slice
+    # of the account's quota
+    get_governor().configure(share=quota_share)
+
+    started = time.monotonic()
+    params = {**options, **_overrides(job, STORM_OVERRIDES)}
+    run_options = {name: params.pop(name) for name in STORM_RUN_OPTIONS if name in params}
+    try:
+        agent = ResearchPaperAgent(**params)
+        return _record(job, started, result=agent.generate(job["topic"], **run_options))
+    except Exception as e:
+        logger.error(f"Topic {job['topic']!r} failed: {e}")
+        return _record(job, started, error=e)
+
+
+def _run_storm_batch(jobs: list, workers: int, options: dict, manifest: Manifest):
+    """Run STORM jobs on a pool of ``workers`` processes."""
+    quota_share = 1 / max(1, min(workers, len(jobs)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_storm_job, job, options, quota_share): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as e:
+                # The worker process itself died
+                record = _record(futures[future], manifest.started, error=e)
+            manifest.add(record)
+
+
+def run_batch(
+    jobs: list,
+    generator: str = "direct",
+    workers: int = 4,
+    options: dict = None,
+    manifest_path: str = None,
+    client=None,
+    store: ArtifactStore = None
+) -> dict:
+    """
+    Generate a paper for every job, ``workers`` at a time.
+
+    ``options`` are the generator's keyword arguments shared by all topics
+    (``generate_research_paper`` for ``direct``, ``ResearchPaperAgent`` for
+    ``storm``); per-topic overrides from the topics file take precedence.
+    Returns the manifest, which is also written to ``manifest_path``
+    (default: ``batch_<timestamp>.json`` in the output directory).
+    Finished papers are added to ``store`` when one is given.
+    """
+    options = dict(options or {})
+    output_dir = options.get("output_dir", "./output")
+    if manifest_path is None:
+        manifest_path = Path(output_dir) / f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+    manifest = Manifest(Path(manifest_path), generator, jobs, workers, store=store)
+    logger.info(f"Generating {len(jobs)} papers with the {generator} generator, {workers} at a time")
+
+    if generator == "direct":
+        asyncio.run(_run_direct_batch(jobs, workers, options, manifest, client=client))
+    elif generator == "storm":
+        _run_storm_batch(jobs, workers, options, manifest)
+    else:
+        raise ValueError(f"Unknown generator: {generator}")
+
+    summary = manifest.finish()
+    summary["manifest"] = str(manifest.path)
+    logger.info(
+        f"Batch finished: {summary['succeeded']} succeeded, {summary['failed']} failed "
+        f"in {summary['wall_seconds']}s (manifest: {manifest.path})"
+    )
+    return summary
+
+
+def main():
+    """CLI entry point for batch generation."""
+    parser = argparse.ArgumentParser(
+        description="Research Paper Agent (RPA) - Generate papers for many topics concurrently",
+        epilog="Copyright (c) 2025 Aditya Patange. All rights reserved."
+    )
+
+    parser.add_argument(
+        "topics_file",
+        help="File with one topic per line, or JSON lines with \"topic\" and optional overrides"
+    )
+
+    parser.add_argument(
+        "--generator", "-g",
+        default="direct",
+        choices=["direct", "storm"],
+        help="Generator to run each topic through (default: direct)"
+    )
+
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=4,
+        help="Topics generated at once (default: 4)"
+    )
+
+    parser.add_argument(
+        "--output", "-o",
+        default="./output",
+        help="Output directory for generated papers (default: ./output)"
+    )
+
+    parser.add_argument(
+        "--pages", "-p",
+        type=int,
+        default=12,
+        help="Target number of pages, unless a topic overrides it (default: 12)"
+    )
+
+    parser.add_argument(
+        "--manifest",
+        metavar="PATH",
+        help="Where to write the batch manifest (default: OUTPUT/batch_<timestamp>.json)"
+    )
+
+    parser.add_argument(
+        "--store",
+        metavar="DIR",
+        help="Add every finished paper to the artifact store in DIR (see storm/store.py)"
+    )
+
+    parser.add_argument(
+        "--quota",
+        action="store_true",
+        help="Admit model calls against per-model requests/tokens-per-minute budgets shared by the batch"
+    )
+
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        help="Requests per minute allowed per model across the batch (implies --quota)"
+    )
+
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        help="Tokens per minute allowed per model across the batch (implies --quota)"
+    )
+
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        metavar="P",
+        help="Hedge short LLM calls with no first token by the P-th percentile of recent latency"
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory for the persistent LLM response cache (disabled by default)"
+    )
+
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_MB,
+        help=f"Size cap for the response cache in MB (default: {DEFAULT_MAX_MB})"
+    )
+
+    parser.add_argument(
+        "--evidence",
+        metavar="DIR",
+        help="Evidence index: STORM adds the sources it collects, the direct generator "
+             "grounds section prompts in it (see storm/evidence.py)"
+    )
+
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Time budget per paper, unless a topic overrides it; papers that fall behind "
+             "degrade by the --degrade policies (see storm/deadline.py)"
+    )
+
+    parser.add_argument(
+        "--degrade",
+        metavar="POLICIES",
+        help="Comma-separated degradations allowed under --deadline, or 'none' (default: all)"
+    )
+
+    direct = parser.add_argument_group("direct generator")
+    direct.add_argument("--parallel-sections", action="store_true",
+                        help="Draft each paper's sections concurrently")
+    direct.add_argument("--concurrency", type=int, default=4,
+                        help="Concurrent section drafts per paper (default: 4)")
+    direct.add_argument("--polish-mode", default="sections", choices=["sections", "whole"],
+                        help="Polish per section or the whole paper (default: sections)")
+    direct.add_argument("--cascade", action="store_true",
+                        help="Outline and draft with the fast model, polish with the strong one")
+    direct.add_argument("--outline-model", metavar="MODEL", help="Model for the outline")
+    direct.add_argument("--draft-model", metavar="MODEL", help="Model for the first draft")
+    direct.add_argument("--polish-model", metavar="MODEL", help="Model for the polish pass")
+
+    storm = parser.add_argument_group("STORM generator")
+    storm.add_argument("--model", "-m", default="gpt-4o",
+                       help="Language model (default: gpt-4o)")
+    storm.add_argument("--search", "-s", default="duckduckgo",
+                       help="Search engine(s), comma-separated (default: duckduckgo)")
+    storm.add_argument("--search-cache", metavar="PATH",
+                       help="SQLite file caching search results across runs")
+    storm.add_argument("--no-dedup", action="store_true",
+                       help="Pass retrieved snippets to STORM without deduplication")
+    storm.add_argument("--library", metavar="DIR",
+                       help="Research library: reuse recent research on near-identical topics")
+    storm.add_argument("--fresh-research", action="store_true",
+                       help="Research every topic from scratch, but still add it to the library")
+    storm.add_argument("--profile", metavar="NAME|FILE",
+                       help="STORM engine profile (fast, balanced, thorough) or an autotuned JSON file")
+    storm.add_argument("--max-thread-num", type=int,
+                       help="Override the profile's STORM thread count")
+
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the manifest as JSON"
+    )
+
+    parser.add_argument(
+        "--version", "-v",
+        action="version",
+        version=f"Research Paper Agent v{VERSION} by {AUTHOR}"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        jobs = load_topics(args.topics_file)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if not jobs:
+        parser.error(f"No topics found in {args.topics_file}")
+
+    if args.generator == "direct":
+        options = {
+            "output_dir": args.output,
+            "target_pages": args.pages,
+            "parallel_sections": args.parallel_sections,
+            "concurrency": args.concurrency,
+            "polish_mode": args.polish_mode,
+            "hedge_percentile": args.hedge_percentile,
+            "deadline": args.deadline,
+            "degrade": args.degrade,
+            "models": phase_models(
+                args.cascade, args.outline_model, args.draft_model, args.polish_model
+            ) or None,
+        }
+        if args.cache_dir:
+            options["cache"] = ResponseCache(args.cache_dir, max_mb=args.cache_max_mb)
+        if args.evidence:
+            options["evidence"] = EvidenceIndex(args.evidence)
+        if args.quota or args.rpm or args.tpm:
+            options["quota"] = get_governor()
+            options["quota"].configure(rpm=args.rpm, tpm=args.tpm)
+    else:
+        options = {
+            "output_dir": args.output,
+            "max_pages": args.pages,
+            "model": args.model,
+            "search_engine": args.search,
+            "cache_dir": args.cache_dir,
+            "cache_max_mb": args.cache_max_mb,
+            "search_cache": args.search_cache,
+            "quota": args.quota,
+            "rpm": args.rpm,
+            "tpm": args.tpm,
+            "hedge_percentile": args.hedge_percentile,
+            "evidence": args.evidence,
+            "library": args.library,
+            "fresh_research": args.fresh_research,
+            "profile": args.profile,
+            "max_thread_num": args.max_thread_num,
+            "deadline": args.deadline,
+            "degrade": args.degrade,
+        }
+        if args.no_dedup:
+            options["dedup_threshold"] = None
+
+    print(f"""
+╔══════════════════════════════════════════════════════════════════╗
+║         Research Paper Agent (RPA) v{VERSION}                      ║
+║         Copyright (c) 2025 Aditya Patange                        ║
+║         Batch generation                                         ║
+╚══════════════════════════════════════════════════════════════════╝
+    """)
+
+    try:
+        summary = run_batch(
+            jobs,
+            generator=args.generator,
+            workers=args.workers,
+            options=options,
+            manifest_path=args.manifest,
+            store=ArtifactStore(args.store) if args.store else None
+        )
+    except Exception as e:
+        logger.error(f"Batch failed: {e}")
+        if args.json:
+            print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"\n{'='*60}")
+        print(f"{summary['succeeded']}/{summary['total']} papers generated in {summary['wall_seconds']}s")
+        for topic in summary["topics"]:
+            status = topic["output_dir"] if topic["success"] else f"FAILED: {topic['error']}"
+            print(f"  {topic['topic']}: {status}")
+        print(f"Manifest: {summary['manifest']}")
+        print(f"{'='*60}\n")
+
+    sys.exit(0 if summary["failed"] == 0 else 2)
+
+
+if __name__ == "__main__":
+    main()
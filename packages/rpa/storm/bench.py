@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+Research Paper Agent (RPA) - Offline Benchmarks
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+Measures generator throughput without API keys or network access. The
+Anthropic client, LitellmModel and search engines are replaced with
+deterministic stand-ins whose latency follows configurable distributions,
+and results are reported as machine-readable JSON.
+
+The ``storm`` generator is the exception: it needs ``knowledge-storm``
+installed (it is never installed for you), and STORM loads its retrieval
+encoder from the model hub, so it needs network access unless that model is
+already cached. The ``direct`` generator runs fully offline.
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import hashlib
+import logging
+import importlib.util
+import resource
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+try:
+    from .direct_generator import generate_research_paper, VERSION, AUTHOR
+    from .telemetry import percentile
+except ImportError:  # Executed as a script
+    from direct_generator import generate_research_paper, VERSION, AUTHOR
+    from telemetry import percentile
+
+logger = logging.getLogger(__name__)
+
+
+VOCABULARY = (
+    "analysis evidence framework tradition practice consciousness model study "
+    "history theory method result context structure principle system outcome "
+    "perspective literature review ritual sound pattern energy cognition data"
+).split()
+
+
+class LatencyModel:
+    """
+    A latency distribution in seconds: ``fixed``, ``uniform`` (low..high),
+    ``normal`` (mean, sd) or ``lognormal`` (median, sigma).
+    """
+
+    def __init__(self, kind: str = "lognormal", a: float = 0.8, b: float = 0.5):
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.a = a
+        self.b = b
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """Parse ``kind:a,b`` (e.g. ``lognormal:0.8,0.5`` or ``fixed:1``)."""
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v] or [0.8, 0.5]
+        return cls(kind, values[0], values[1] if len(values) > 1 else 0.0)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            value = self.a
+        elif self.kind == "uniform":
+            value = rng.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            value = rng.gauss(self.a, self.b)
+        else:
+            value = rng.lognormvariate(0, self.b) * self.a
+        return max(0.0, value)
+
+
+class FakeAPIError(Exception):
+    """Injected provider failure, shaped like an HTTP error."""
+
+    def __init__(self, status_code: int, retry_after: float = 1.0):
+        super().__init__(f"Injected error {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(
+            status_code=status_code, headers={"retry-after": str(retry_after)}
+        )
+
+
+class FakeBackend:
+    """
+    Shared latency, token-rate and failure model for the fake LLMs.
+
+    ``time_scale`` multiplies every simulated delay, so a CI run can model
+    minutes of provider time in seconds.
+    """
+
+    def __init__(
+        self,
+        ttft: LatencyModel = None,
+        tokens_per_second: float = 60.0,
+        fill: float = 0.5,
+        failure_rate: float = 0.0,
+        time_scale: float = 1.0,
+        seed: int = 0
+    ):
+        self.ttft = ttft or LatencyModel()
+        self.tokens_per_second = tokens_per_second
+        self.fill = fill
+        self.failure_rate = failure_rate
+        self.time_scale = time_scale
+        self.calls = 0
+        self.output_tokens = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def plan(self, prompt: str, max_tokens: int) -> tuple:
+        """Decide (first-token delay, output tokens, text) for one call, or raise."""
+        with self._lock:
+            self.calls += 1
+            if self._rng.random() < self.failure_rate:
+                raise FakeAPIError(self._rng.choice((429, 500, 529)))
+            delay = self.ttft.sample(self._rng) * self.time_scale
+
+        tokens = max(16, min(max_tokens, int(max_tokens * self.fill)))
+        text = fake_text(prompt, tokens)
+        with self._lock:
+            self.output_tokens += tokens
+        return delay, tokens, text
+
+    def stream_delay(self, tokens: int) -> float:
+        return tokens / self.tokens_per_second * self.time_scale
+
+
+def fake_text(prompt: str, tokens: int) -> str:
+    """Deterministic markdown of roughly ``tokens`` tokens for ``prompt``."""
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+
+    if "Create a detailed outline" in prompt:
+        titles = ["Historical Background", "Theoretical Framework", "Methods of Practice",
+                  "Empirical Evidence", "Contemporary Applications", "Critiques and Limitations"]
+        lines = ["# Outline", "", "## 1. Introduction"]
+        for number, title in enumerate(titles, start=2):
+            lines += [f"## {number}. {title}", f"   {number}.1 Key points on {title.lower()}", ""]
+        lines += [f"## {len(titles) + 2}. Conclusion", f"## {len(titles) + 3}. References"]
+        return "\n".join(lines)
+
+    words = int(tokens * 0.75)
+    paragraphs = []
+    while words > 0:
+        length = min(words, rng.randint(60, 140))
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(length))
+        paragraphs.append(sentence.capitalize() + f". [Author{rng.randint(1, 40)}, {rng.randint(1990, 2024)}]")
+        words -= length
+
+    heading = "## Section"
+    for line in prompt.splitlines():
+        if line.startswith("#"):
+            heading = line.strip()
+            break
+    return heading + "\n\n" + "\n\n".join(paragraphs)
+
+
+class FakeAnthropic:
+    """Stand-in for ``anthropic.Anthropic`` with ``messages.create`` and ``messages.stream``."""
+
+    def __init__(self, backend: FakeBackend):
+        self.backend = backend
+        self.messages = _FakeMessages(backend)
+
+
+def _fake_message(text: str, tokens: int, model: str, prompt: str, max_tokens: int):
+    return SimpleNamespace(
+        content=[SimpleNamespace(type="text", text=text)],
+        stop_reason="max_tokens" if tokens >= max_tokens else "end_turn",
+        model=model,
+        usage=SimpleNamespace(input_tokens=len(prompt) // 4, output_tokens=tokens),
+    )
+
+
+class _FakeMessages:
+    def __init__(self, backend: FakeBackend):
+        self._backend = backend
+
+    @staticmethod
+    def _prompt(kwargs: dict) -> str:
+        return "\n".join(str(m.get("content", "")) for m in kwargs.get("messages", []))
+
+    def create(self, **kwargs):
+        prompt = self._prompt(kwargs)
+        delay, tokens, text = self._backend.plan(prompt, kwargs.get("max_tokens", 1024))
+        time.sleep(delay + self._backend.stream_delay(tokens))
+        return _fake_message(text, tokens, kwargs.get("model"), prompt, kwargs.get("max_tokens", 1024))
+
+    def stream(self, **kwargs):
+        return _FakeStream(self._backend, kwargs, self._prompt(kwargs))
+
+
+class _FakeStream:
+    CHUNKS = 32
+
+    def __init__(self, backend: FakeBackend, kwargs: dict, prompt: str):
+        self._backend = backend
+        self._kwargs = kwargs
+        self._prompt = prompt
+
+    def __enter__(self):
+        self._delay, self._tokens, self._text = self._backend.plan(
+            self._prompt, self._kwargs.get("max_tokens", 1024)
+        )
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        time.sleep(self._delay)
+        step = max(1, len(self._text) // self.CHUNKS)
+        per_chunk = self._backend.stream_delay(self._tokens) / max(1, len(self._text) // step)
+        for start in range(0, len(self._text), step):
+            time.sleep(per_chunk)
+            yield self._text[start:start + step]
+
+    def get_final_message(self):
+        return _fake_message(
+            self._text, self._tokens, self._kwargs.get("model"), self._prompt,
+            self._kwargs.get("max_tokens", 1024)
+        )
+
+
+class FakeRM:
+    """Stand-in retrieval module returning ``k`` deterministic results per query."""
+
+    def __init__(self, latency: LatencyModel = None, k: int = 10, time_scale: float = 1.0, seed: int = 0):
+        self.latency = latency or LatencyModel("lognormal", 0.6, 0.4)
+        self.k = k
+        self.time_scale = time_scale
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        return self.forward(*args, **kwargs)
+
+    def forward(self, query_or_queries, exclude_urls=None):
+        queries = [query_or_queries] if isinstance(query_or_queries, str) else list(query_or_queries)
+        excluded = set(exclude_urls or [])
+        results = []
+        for query in queries:
+            with self._lock:
+                self.calls += 1
+                delay = self.latency.sample(self._rng) * self.time_scale
+            time.sleep(delay)
+            slug = hashlib.sha256(query.encode("utf-8")).hexdigest()[:8]
+            results.extend(
+                {
+                    "url": f"https://example.org/{slug}/{rank}",
+                    "title": f"{query} ({rank})",
+                    "description": f"Result {rank} for {query}",
+                    "snippets": [fake_text(f"{query}-{rank}", 80)],
+                }
+                for rank in range(self.k)
+                if f"https://example.org/{slug}/{rank}" not in excluded
+            )
+        return results
+
+
+_fake_litellm_class = None
+
+
+def make_fake_litellm_model(backend: FakeBackend, **kwargs):
+    """
+    Build a ``LitellmModel`` whose completions come from ``backend`` instead
+    of the network. Created lazily so knowledge-storm stays optional.
+    """
+    global _fake_litellm_class
+
+    if _fake_litellm_class is None:
+        from knowledge_storm.lm import LitellmModel
+
+        class FakeLitellmModel(LitellmModel):
+            """LitellmModel answering from a latency-modeled fake backend."""
+
+            backend = None
+
+            def __call__(self, prompt=None, messages=None, **call_kwargs):
+                text_in = prompt if prompt is not None else json.dumps(messages)
+                max_tokens = call_kwargs.get("max_tokens") or getattr(self, "kwargs", {}).get("max_tokens", 500)
+                delay, tokens, text = self.backend.plan(text_in, max_tokens)
+                time.sleep(delay + self.backend.stream_delay(tokens))
+                return [text]
+
+        _fake_litellm_class = FakeLitellmModel
+
+    model = _fake_litellm_class(**kwargs)
+    model.backend = backend
+    return model
+
+
+def _percentiles(samples: list) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(percentile(ordered, p), 4)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 4),
+        "p50": pct(50),
+        "p95": pct(95),
+        "p99": pct(99),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _run_direct(job: dict, backend: FakeBackend, output_dir: str, options: dict) -> dict:
+    start = time.monotonic()
+    result = generate_research_paper(
+        job["topic"],
+        output_dir=output_dir,
+        target_pages=job["pages"],
+        client=FakeAnthropic(backend),
+        **options
+    )
+    elapsed = time.monotonic() - start
+    metadata = json.loads((Path(result["output_dir"]) / "metadata.json").read_text(encoding="utf-8"))
+    return {"seconds": elapsed, "phases": metadata.get("phase_seconds", {})}
+
+
+def _run_storm(job: dict, backend: FakeBackend, output_dir: str, options: dict) -> dict:
+    try:
+        from .runner import ResearchPaperAgent
+    except ImportError:  # Executed as a script
+        from runner import ResearchPaperAgent
+
+    rm = FakeRM(time_scale=backend.time_scale)
+
+    class BenchAgent(ResearchPaperAgent):
+        def _load_api_keys(self):
+            return {"anthropic": "bench"}
+
+        def _make_lm(self, **kwargs):
+            return make_fake_litellm_model(backend, **kwargs)
+
+        def _create_engine(self, engine, api_keys):
+            return rm
+
+    agent = BenchAgent(output_dir=output_dir, max_pages=job["pages"], **options)
+    start = time.monotonic()
+    result = agent.generate(job["topic"])
+    return {"seconds": time.monotonic() - start, "phases": result.get("phase_seconds", {})}
+
+
+SCENARIOS = ("single", "batch", "pages")
+
+STORM_UNAVAILABLE = (
+    "The storm generator needs knowledge-storm (pip install knowledge-storm); "
+    "benchmarks never install it"
+)
+
+
+def build_jobs(scenario: str, topics: int, pages: int) -> list:
+    """Expand a scenario name into the list of jobs it runs."""
+    if scenario == "single":
+        return [{"topic": "Sonic Symbols in Yoga", "pages": pages}]
+    if scenario == "batch":
+        return [{"topic": f"Benchmark Topic {i + 1}", "pages": pages} for i in range(topics)]
+    if scenario == "pages":
+        return [{"topic": f"Length Sweep {p} Pages", "pages": p} for p in (pages // 2 or 1, pages, pages * 2)]
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def run_benchmark(
+    scenario: str = "single",
+    generator: str = "direct",
+    topics: int = 4,
+    pages: int = 12,
+    concurrency: int = 1,
+    repeat: int = 1,
+    backend: FakeBackend = None,
+    options: dict = None
+) -> dict:
+    """
+    Run a benchmark scenario against fake backends and return the report.
+
+    ``options`` are passed through to the generator (e.g. ``stream`` or
+    ``parallel_sections`` for the direct path). Jobs run ``concurrency`` at a
+    time; each is repeated ``repeat`` times.
+    """
+    if generator == "storm" and importlib.util.find_spec("knowledge_storm") is None:
+        # ResearchPaperAgent.generate would pip install it
+        raise RuntimeError(STORM_UNAVAILABLE)
+
+    backend = backend or FakeBackend()
+    options = options or {}
+    run_job = _run_direct if generator == "direct" else _run_storm
+    jobs = build_jobs(scenario, topics, pages) * repeat
+
+    latencies = []
+    phases = {}
+    failures = []
+
+    with tempfile.TemporaryDirectory(prefix="rpa-bench-") as output_dir:
+        def attempt(job):
+            try:
+                return run_job(job, backend, output_dir, options)
+            except Exception as e:
+                failures.append({"topic": job["topic"], "error": f"{type(e).__name__}: {e}"})
+                return None
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            outcomes = list(pool.map(attempt, jobs))
+        wall = time.monotonic() - start
+
+    for outcome in outcomes:
+        if outcome is None:
+            continue
+        latencies.append(outcome["seconds"])
+        for phase, seconds in outcome["phases"].items():
+            phases.setdefault(phase, []).append(seconds)
+
+    return {
+        "scenario": scenario,
+        "generator": generator,
+        "options": options,
+        "jobs": len(jobs),
+        "succeeded": len(latencies),
+        "failed": len(failures),
+        "failures": failures[:10],
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 4),
+        "throughput_per_minute": round(len(latencies) / wall * 60, 3) if wall else None,
+        "latency_seconds": _percentiles(latencies),
+        "phase_seconds": {phase: _percentiles(samples) for phase, samples in phases.items()},
+        "llm_calls": backend.calls,
+        "llm_output_tokens": backend.output_tokens,
+        "time_scale": backend.time_scale,
+        "peak_rss_mb": peak_rss_mb(),
+        "version": VERSION,
+    }
+
+
+def main():
+    """CLI entry point for the offline benchmark suite."""
+    parser = argparse.ArgumentParser(
+        description="Research Paper Agent (RPA) - Offline benchmarks with fake LLM and search backends",
+        epilog="Copyright (c) 2025 Aditya Patange. All rights reserved."
+    )
+
+    parser.add_argument("--scenario", default="single", choices=SCENARIOS,
+                        help="single topic, a batch of topics, or a target_pages sweep (default: single)")
+    parser.add_argument("--generator", default="direct", choices=["direct", "storm"],
+                        help="Generator to benchmark (default: direct); storm needs knowledge-storm "
+                             "installed and network access for its encoder")
+    parser.add_argument("--topics", type=int, default=4, help="Topics in the batch scenario (default: 4)")
+    parser.add_argument("--pages", type=int, default=12, help="Target pages per paper (default: 12)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Jobs run at once (default: 1)")
+    parser.add_argument("--repeat", type=int, default=1, help="Repetitions of each job (default: 1)")
+    parser.add_argument("--ttft", default="lognormal:0.8,0.5",
+                        help="First-token latency distribution, kind:a,b (default: lognormal:0.8,0.5)")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0,
+                        help="Simulated decode rate (default: 60)")
+    parser.add_argument("--fill", type=float, default=0.5,
+                        help="Fraction of max_tokens each fake response uses; 1 or more "
+                             "truncates every response at max_tokens (default: 0.5)")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Probability that a fake LLM call fails (default: 0)")
+    parser.add_argument("--time-scale", type=float, default=0.01,
+                        help="Multiplier on every simulated delay (default: 0.01)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--stream", action="store_true", help="Direct generator: stream responses")
+    parser.add_argument("--parallel-sections", action="store_true",
+                        help="Direct generator: draft sections concurrently")
+    parser.add_argument("--output", help="Write the JSON report to this file as well")
+    parser.add_argument("--version", "-v", action="version",
+                        version=f"Research Paper Agent v{VERSION} by {AUTHOR}")
+
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.generator == "storm" and importlib.util.find_spec("knowledge_storm") is None:
+        parser.error(STORM_UNAVAILABLE)
+
+    options = {}
+    if args.generator == "direct":
+        options = {"stream": args.stream, "parallel_sections": args.parallel_sections}
+
+    backend = FakeBackend(
+        ttft=LatencyModel.parse(args.ttft),
+        tokens_per_second=args.tokens_per_second,
+        fill=args.fill,
+        failure_rate=args.failure_rate,
+        time_scale=args.time_scale,
+        seed=args.seed,
+    )
+    report = run_benchmark(
+        scenario=args.scenario,
+        generator=args.generator,
+        topics=args.topics,
+        pages=args.pages,
+        concurrency=args.concurrency,
+        repeat=args.repeat,
+        backend=backend,
+        options=options,
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Research Paper Agent (RPA) - Phase Checkpoints
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+Records which phases of a generation run have completed so an interrupted
+run can be resumed from its output directory instead of starting over.
+"""
+
+import os
+import json
+import time
+import itertools
+from pathlib import Path
+from datetime import datetime
+
+
+def create_run_dir(parent, topic: str, timestamp: str) -> Path:
+    """
+    Create a new output directory ``{topic}_{timestamp}`` under ``parent``.
+
+    Concurrent runs whose sanitized topics share their first 50 characters
+    and start in the same second would get the same name; later ones get a
+    ``-2``, ``-3``, ... suffix instead of sharing (and overwriting) it.
+    """
+    parent = Path(parent)
+    parent.mkdir(parents=True, exist_ok=True)
+    safe_topic = "".join(c if c.isalnum() or c in " -_" else "_" for c in topic)
+    name = f"{safe_topic.replace(' ', '_')[:50]}_{timestamp}"
+    for number in itertools.count(1):
+        directory = parent / (name if number == 1 else f"{name}-{number}")
+        try:
+            directory.mkdir()
+        except FileExistsError:
+            continue
+        return directory
+
+
+class Checkpoint:
+    """
+    Phase completion record for one output directory, persisted as
+    ``checkpoint.json``.
+
+    Directories written before checkpoints existed have no record; for
+    those a phase counts as done when its artifacts exist and are non-empty.
+    """
+
+    FILENAME = "checkpoint.json"
+
+    def __init__(self, directory, data: dict, legacy: bool = False):
+        self.directory = Path(directory)
+        self.data = data
+        self.legacy = legacy
+        self._started = {}
+
+    @classmethod
+    def start(cls, directory, **info) -> "Checkpoint":
+        """Begin a fresh checkpoint for a new run."""
+        checkpoint = cls(directory, {"info": info, "phases": {}})
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def load(cls, directory) -> "Checkpoint":
+        """Load the checkpoint of an existing output directory for resuming."""
+        directory = Path(directory)
+        if not directory.is_dir():
+            raise FileNotFoundError(f"Cannot resume: {directory} is not a directory")
+
+        path = directory / cls.FILENAME
+        if path.exists():
+            return cls(directory, json.loads(path.read_text(encoding="utf-8")))
+
+        info = {}
+        metadata_path = directory / "metadata.json"
+        if metadata_path.exists():
+            info = json.loads(metadata_path.read_text(encoding="utf-8"))
+        return cls(directory, {"info": info, "phases": {}}, legacy=True)
+
+    @property
+    def info(self) -> dict:
+        """Run parameters recorded when the run started (topic, pages, ...)."""
+        return self.data["info"]
+
+    def is_done(self, phase: str, *artifacts) -> bool:
+        """Whether ``phase`` completed and all of its artifacts are still present."""
+        if not all(Path(artifact).exists() for artifact in artifacts):
+            return False
+        if phase in self.data["phases"]:
+            return True
+        if self.legacy and all(Path(artifact).stat().st_size > 0 for artifact in artifacts):
+            # Adopt the phase so it survives once the checkpoint is saved
+            self.data["phases"][phase] = {"detected": True}
+            return True
+        return False
+
+    def begin(self, phase: str):
+        """Note that ``phase`` is starting, so its duration gets recorded."""
+        self._started[phase] = time.monotonic()
+
+    def mark_done(self, phase: str, **details):
+        """Record ``phase`` as complete and persist the checkpoint."""
+        record = {"completed_at": datetime.now().isoformat(timespec="seconds")}
+        if phase in self._started:
+            record["seconds"] = round(time.monotonic() - self._started.pop(phase), 3)
+        self.data["phases"][phase] = {**record, **details}
+        self.save()
+
+    def phase_seconds(self) -> dict:
+        """Recorded duration of each completed phase, in seconds."""
+        return {
+            phase: record["seconds"]
+            for phase, record in self.data["phases"].items()
+            if "seconds" in record
+        }
+
+    def completed(self) -> list:
+        """Names of the phases recorded as complete, in completion order."""
+        return list(self.data["phases"])
+
+    def save(self):
+        """Write the checkpoint atomically."""
+        path = self.directory / self.FILENAME
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(self.data, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
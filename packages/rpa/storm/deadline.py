@@ -0,0 +1,357 @@
+"""
+Research Paper Agent (RPA) - Deadlines
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+A time budget for generating one paper. The budget is split between the
+pipeline's phases (:data:`DIRECT_PHASE_SHARES`, :data:`STORM_PHASE_SHARES`):
+a phase that starts after the earlier phases' shares have run out means the
+run is behind, and the run degrades by whichever of these policies are
+enabled:
+
+* ``skip_polish``: return the draft instead of polishing it. With
+  per-section polishing, sections whose polish call times out keep their
+  drafted text.
+* ``cap_pages``: draft fewer pages, in proportion to the time left for
+  drafting (direct generator).
+* ``reduce_research``: run fewer perspectives and conversation turns when
+  the research budget cannot fit the engine profile (STORM).
+
+Every model call gets a timeout of the time left until the deadline (but
+at least :data:`MIN_CALL_SECONDS`), so a hung HTTP call cannot block the
+run forever. Streams that run past it are closed. The policies that fired
+are recorded under ``deadline`` in ``metadata.json``.
+"""
+
+import math
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+DEGRADATIONS = ("skip_polish", "cap_pages", "reduce_research")
+
+# Fraction of the deadline each phase may use, in pipeline order
+DIRECT_PHASE_SHARES = {"outline": 0.1, "paper": 0.6, "polish": 0.3}
+STORM_PHASE_SHARES = {"research": 0.5, "outline": 0.1, "article": 0.3, "polish": 0.1}
+
+# Floor for per-call timeouts, so calls made late in a run still get a chance
+MIN_CALL_SECONDS = 20.0
+MIN_PAGES = 2
+
+# Rough wall time of one STORM conversation turn: a question, query
+# generation, the searches and an answer
+STORM_TURN_SECONDS = 20.0
+
+
+class DeadlineExceeded(TimeoutError):
+    """A model call was cancelled because it ran past its timeout."""
+
+
+def parse_degradations(spec=None) -> tuple:
+    """
+    Policies from a comma-separated string or an iterable; None enables all
+    of them and ``"none"`` (or an empty string) none.
+    """
+    if spec is None:
+        return DEGRADATIONS
+    if isinstance(spec, str):
+        spec = [] if spec.strip().lower() == "none" else spec.split(",")
+    policies = tuple(policy.strip() for policy in spec if policy.strip())
+    unknown = [policy for policy in policies if policy not in DEGRADATIONS]
+    if unknown:
+        raise ValueError(
+            f"Unknown degradation policy: {', '.join(unknown)} (expected {', '.join(DEGRADATIONS)})"
+        )
+    return policies
+
+
+def is_timeout(error: Exception) -> bool:
+    """Whether ``error`` is a request timeout (Anthropic, LiteLLM, httpx or ours)."""
+    return isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower()
+
+
+# Deadline for LiteLLM calls made without one bound to the model; each run
+# activates its own in its own context
+_active = contextvars.ContextVar("rpa_deadline", default=None)
+
+
+def current_deadline() -> Optional["Deadline"]:
+    """The deadline activated in the calling context, or None."""
+    return _active.get()
+
+
+class Deadline:
+    """
+    A run's time budget, counted from construction. ``shares`` splits it
+    between the phases (in pipeline order); ``degradations`` are the
+    policies the run may apply when it falls behind.
+    """
+
+    def __init__(
+        self,
+        seconds: float,
+        shares: dict,
+        degradations=None,
+        min_call_seconds: float = MIN_CALL_SECONDS
+    ):
+        if seconds <= 0:
+            raise ValueError(f"Deadline must be positive, got {seconds}")
+        self.seconds = float(seconds)
+        self.shares = dict(shares)
+        self.degradations = parse_degradations(degradations)
+        self.min_call_seconds = min_call_seconds
+        self.started = time.monotonic()
+        self.fired = []
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        return self.seconds - self.elapsed()
+
+    def phase_start(self, phase: str) -> float:
+        """Seconds into the run at which ``phase`` is due to start."""
+        offset = 0.0
+        for name, share in self.shares.items():
+            if name == phase:
+                return offset
+            offset += share * self.seconds
+        raise KeyError(phase)
+
+    def phase_budget(self, phase: str) -> float:
+        return self.shares[phase] * self.seconds
+
+    def phase_remaining(self, phase: str) -> float:
+        """Seconds left until ``phase`` is due to end."""
+        return self.phase_start(phase) + self.phase_budget(phase) - self.elapsed()
+
+    def behind(self, phase: str) -> bool:
+        """Whether the phases before ``phase`` overran their shares."""
+        return self.elapsed() > self.phase_start(phase)
+
+    def call_timeout(self) -> float:
+        return max(self.remaining(), self.min_call_seconds)
+
+    def allows(self, policy: str) -> bool:
+        return policy in self.degradations
+
+    def degrade(self, policy: str, phase: str, **details):
+        """Record that ``policy`` fired in ``phase``."""
+        event = {"policy": policy, "phase": phase, "elapsed": round(self.elapsed(), 1), **details}
+        with self._lock:
+            self.fired.append(event)
+        logger.warning(
+            f"{self.seconds:g}s deadline: applying {policy} in {phase}"
+            + "".join(f", {key}={value}" for key, value in details.items())
+        )
+
+    def timed_out(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def skip_polish(self, phase: str = "polish") -> bool:
+        """Whether to skip ``phase``, recording the degradation if so."""
+        if not self.allows("skip_polish") or not self.behind(phase):
+            return False
+        self.degrade("skip_polish", phase, remaining=round(self.remaining(), 1))
+        return True
+
+    def cap_pages(self, target_pages: int, phase: str = "paper") -> int:
+        """``target_pages`` scaled down to the share of ``phase``'s budget that is left."""
+        if not self.allows("cap_pages") or not self.behind(phase):
+            return target_pages
+        left = max(0.0, self.phase_remaining(phase)) / self.phase_budget(phase)
+        pages = max(MIN_PAGES, int(target_pages * left))
+        if pages < target_pages:
+            self.degrade("cap_pages", phase, from_pages=target_pages, to_pages=pages)
+        return min(pages, target_pages)
+
+    def reduce_research(
+        self,
+        settings: dict,
+        phase: str = "research",
+        turn_seconds: float = STORM_TURN_SECONDS
+    ) -> dict:
+        """
+        STORM engine ``settings`` (see profiles.py) with perspectives and
+        conversation turns cut, perspectives first, until the research is
+        estimated to fit the time left for ``phase``.
+        """
+        if not self.allows("reduce_research"):
+            return settings
+
+        def estimate(perspectives, turns):
+            # STORM adds a general perspective and runs the conversations
+            # on max_thread_num threads
+            rounds = math.ceil((perspectives + 1) / max(1, settings["max_thread_num"]))
+            return rounds * turns * turn_seconds
+
+        budget = self.phase_remaining(phase)
+        perspectives, turns = settings["max_perspective"], settings["max_conv_turn"]
+        while estimate(perspectives, turns) > budget:
+            if perspectives > 2:
+                perspectives -= 1
+            elif turns > 2:
+                turns -= 1
+            elif perspectives > 1:
+                perspectives -= 1
+            elif turns > 1:
+                turns -= 1
+            else:
+                break
+
+        if (perspectives, turns) == (settings["max_perspective"], settings["max_conv_turn"]):
+            return settings
+        self.degrade(
+            "reduce_research", phase,
+            max_perspective=[settings["max_perspective"], perspectives],
+            max_conv_turn=[settings["max_conv_turn"], turns],
+        )
+        return dict(settings, max_perspective=perspectives, max_conv_turn=turns)
+
+    @contextmanager
+    def activate(self):
+        """
+        Apply this deadline to LiteLLM calls made meanwhile in the current
+        context (see :func:`deadline_litellm_class`).
+        """
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    def report(self) -> dict:
+        elapsed = self.elapsed()
+        with self._lock:
+            return {
+                "seconds": self.seconds,
+                "elapsed": round(elapsed, 1),
+                "met": elapsed <= self.seconds,
+                "policies": list(self.degradations),
+                "degraded": list(self.fired),
+                "timeouts": self.timeouts,
+            }
+
+    def wrap_anthropic(self, client) -> "DeadlineAnthropicClient":
+        return DeadlineAnthropicClient(client, self)
+
+
+class DeadlineAnthropicClient:
+    """
+    Wrapper over an Anthropic client passing each ``messages`` call a
+    timeout of the time left until the deadline, and closing streams that
+    run past it.
+    """
+
+    def __init__(self, client, deadline: Deadline):
+        self._client = client
+        self.deadline = deadline
+        self.messages = _DeadlineMessages(client.messages, deadline)
+
+    def with_options(self, **options):
+        return DeadlineAnthropicClient(self._client.with_options(**options), self.deadline)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class _DeadlineMessages:
+    def __init__(self, messages, deadline: Deadline):
+        self._messages = messages
+        self._deadline = deadline
+
+    def create(self, **kwargs):
+        try:
+            return self._messages.create(timeout=self._deadline.call_timeout(), **kwargs)
+        except Exception as e:
+            if is_timeout(e):
+                self._deadline.timed_out()
+            raise
+
+    def stream(self, **kwargs):
+        return _DeadlineStream(self._messages, self._deadline, kwargs)
+
+
+class _DeadlineStream:
+    """``messages.stream`` context manager cancelled once its timeout passes."""
+
+    def __init__(self, messages, deadline: Deadline, kwargs: dict):
+        self._messages = messages
+        self._deadline = deadline
+        self._kwargs = kwargs
+        self._manager = None
+        self._stream = None
+
+    def __enter__(self):
+        timeout = self._deadline.call_timeout()
+        self._until = time.monotonic() + timeout
+        try:
+            self._manager = self._messages.stream(timeout=timeout, **self._kwargs)
+            self._stream = self._manager.__enter__()
+        except Exception as e:
+            if is_timeout(e):
+                self._deadline.timed_out()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Leaving the SDK's stream closes its connection
+        return self._manager.__exit__(exc_type, exc, tb)
+
+    @property
+    def text_stream(self):
+        try:
+            for text in self._stream.text_stream:
+                yield text
+                if time.monotonic() > self._until:
+                    raise DeadlineExceeded(f"{self._kwargs.get('model')} stream ran past its deadline")
+        except Exception as e:
+            if is_timeout(e):
+                self._deadline.timed_out()
+            raise
+
+    def get_final_message(self):
+        return self._stream.get_final_message()
+
+
+_deadline_litellm_classes = {}
+
+
+def deadline_litellm_class(base):
+    """
+    Subclass of the LitellmModel class ``base`` whose calls time out when
+    their :class:`Deadline` leaves them no more time. That is the model's
+    ``deadline`` attribute when set, which also reaches calls made on threads
+    the caller does not control (STORM's thread pools), and the active
+    deadline otherwise.
+    """
+    if base not in _deadline_litellm_classes:
+
+        class DeadlineLitellmModel(base):
+            """LitellmModel whose calls time out at its deadline."""
+
+            deadline = None
+
+            def __call__(self, *args, **call_kwargs):
+                deadline = self.deadline or current_deadline()
+                if deadline is None:
+                    return super().__call__(*args, **call_kwargs)
+                try:
+                    return super().__call__(*args, timeout=deadline.call_timeout(), **call_kwargs)
+                except Exception as e:
+                    if is_timeout(e):
+                        deadline.timed_out()
+                    raise
+
+        DeadlineLitellmModel.__name__ = f"Deadline{base.__name__}"
+        _deadline_litellm_classes[base] = DeadlineLitellmModel
+
+    return _deadline_litellm_classes[base]
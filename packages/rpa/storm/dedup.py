@@ -0,0 +1,325 @@
+"""
+Research Paper Agent (RPA) - Snippet Deduplication
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+A retrieval post-processing stage for STORM. STORM asks several simulated
+experts several questions each, so the same passage comes back again and
+again: from the same URL under different queries, and from syndicated
+copies and mirrors under different URLs. All of it is fed to the
+conversation, outline and article prompts.
+
+:class:`DedupRM` wraps a retrieval module and, for every search:
+
+* merges results whose normalized URLs match,
+* drops snippets whose normalized text was already seen in the response,
+* clusters near-duplicate snippets (MinHash over word shingles, with LSH
+  banding to find candidates) and keeps the longest one of each cluster,
+* rewrites a snippet that near-duplicates one returned by an *earlier*
+  search to that earlier URL and text. The search still answers its
+  question, and STORM's information table, which merges snippets by URL,
+  stores the passage once instead of once per mirror.
+
+Snippets, results and an estimate of the tokens removed are counted in
+:meth:`DedupRM.stats`.
+"""
+
+import re
+import random
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+try:
+    from .quota import estimate_tokens
+    from .retrieval import normalize_url
+except ImportError:  # Executed as a script
+    from quota import estimate_tokens
+    from retrieval import normalize_url
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_THRESHOLD = 0.7
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_WORDS = 3
+# Snippets remembered from earlier searches, for cross-search merging
+DEFAULT_MEMORY = 5000
+
+_MERSENNE_61 = (1 << 61) - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase words of ``text`` joined by single spaces."""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set:
+    """The set of ``size``-word shingles of ``text`` (the whole text if it is shorter)."""
+    words = normalize_text(text).split()
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    MinHash signatures of shingle sets. The fraction of equal positions in
+    two signatures estimates the Jaccard similarity of the sets.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_61), rng.randrange(0, _MERSENNE_61))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, items: set) -> tuple:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+            for item in items
+        ]
+        return tuple(
+            min((a * h + b) % _MERSENNE_61 for h in hashes)
+            for a, b in self._perms
+        )
+
+    @staticmethod
+    def similarity(first: tuple, second: tuple) -> float:
+        return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+class _Index:
+    """LSH buckets over signatures: signatures agreeing on any band are candidates."""
+
+    def __init__(self, bands: int, rows: int):
+        self.bands = bands
+        self.rows = rows
+        self._buckets = {}
+
+    def _keys(self, signature: tuple):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def add(self, key, signature: tuple):
+        for bucket in self._keys(signature):
+            self._buckets.setdefault(bucket, []).append(key)
+
+    def remove(self, key, signature: tuple):
+        for bucket in self._keys(signature):
+            members = self._buckets.get(bucket)
+            if members is not None and key in members:
+                members.remove(key)
+                if not members:
+                    del self._buckets[bucket]
+
+    def candidates(self, signature: tuple) -> list:
+        found = []
+        for bucket in self._keys(signature):
+            for key in self._buckets.get(bucket, ()):
+                if key not in found:
+                    found.append(key)
+        return found
+
+
+class DedupRM:
+    """
+    Retrieval module wrapper suppressing duplicate and near-duplicate
+    snippets (see the module docstring).
+
+    Snippets are near-duplicates when their estimated shingle Jaccard
+    similarity is at least ``threshold``. Up to ``memory`` snippets from
+    earlier searches are remembered for cross-search merging; call
+    :meth:`reset` to start afresh.
+    """
+
+    def __init__(
+        self,
+        rm,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = NUM_PERM,
+        bands: int = BANDS,
+        memory: int = DEFAULT_MEMORY
+    ):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Dedup threshold must be in (0, 1], got {threshold}")
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+
+        self._rm = rm
+        self.threshold = threshold
+        self.memory = memory
+        self._hasher = MinHasher(num_perm)
+        self._bands = bands
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys((
+            "searches", "results_in", "results_out", "snippets_in", "snippets_out",
+            "url_duplicates", "exact_duplicates", "near_duplicates", "merged_across_searches",
+            "tokens_in", "tokens_removed", "tokens_merged",
+        ), 0)
+        self.reset()
+
+    def __call__(self, *args, **kwargs):
+        """Make the wrapper callable, delegating to forward."""
+        return self.forward(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._rm, name)
+
+    def reset(self):
+        """Forget snippets returned by earlier searches."""
+        with self._lock:
+            # (url, text) of earlier snippets -> (signature, canonical result fields)
+            self._seen = OrderedDict()
+            self._seen_index = _Index(self._bands, self._hasher.num_perm // self._bands)
+            self._seen_exact = {}
+
+    def forward(self, query_or_queries, exclude_urls=None):
+        raw = self._rm.forward(query_or_queries, exclude_urls=exclude_urls)
+        if isinstance(raw, dict):
+            raw = [result for results in raw.values() for result in results]
+        return self.deduplicate(list(raw or []))
+
+    def _similar(self, signature: tuple, candidates, signatures) -> object:
+        best, best_score = None, self.threshold
+        for key in candidates:
+            score = MinHasher.similarity(signature, signatures(key))
+            if score >= best_score:
+                best, best_score = key, score
+        return best
+
+    def deduplicate(self, results: list) -> list:
+        """Deduplicate one search response (a list of STORM result dicts), best-ranked first."""
+        counts = dict.fromkeys(self._stats, 0)
+        counts["searches"] = 1
+        counts["results_in"] = len(results)
+
+        # Results from the same page (after URL normalization) become one
+        by_url = OrderedDict()
+        for result in results:
+            url = normalize_url(result.get("url", ""))
+            snippets = [s for s in result.get("snippets") or [] if s and s.strip()]
+            counts["snippets_in"] += len(snippets)
+            counts["tokens_in"] += sum(estimate_tokens(s, 0) for s in snippets)
+            if url in by_url:
+                counts["url_duplicates"] += 1
+                by_url[url]["snippets"].extend(snippets)
+            else:
+                by_url[url] = dict(result, snippets=snippets)
+
+        # Every snippet, in rank order, with its exact-text key and signature
+        entries = []
+        first_exact = {}
+        for url, result in by_url.items():
+            for snippet in result["snippets"]:
+                key = normalize_text(snippet)
+                entry = {"url": url, "text": snippet, "key": key, "rank": len(entries)}
+                if key in first_exact:
+                    counts["exact_duplicates"] += 1
+                    counts["tokens_removed"] += estimate_tokens(snippet, 0)
+                    continue
+                first_exact[key] = entry
+                entry["signature"] = self._hasher.signature(shingles(snippet))
+                entries.append(entry)
+
+        # Cluster near-duplicates within the response; each cluster keeps its longest snippet
+        index = _Index(self._bands, self._hasher.num_perm // self._bands)
+        cluster_of = {}
+        clusters = []
+        for entry in entries:
+            match = self._similar(
+                entry["signature"],
+                index.candidates(entry["signature"]),
+                lambda rank: entries[rank]["signature"]
+            )
+            if match is None:
+                cluster_of[entry["rank"]] = len(clusters)
+                clusters.append([entry])
+                index.add(entry["rank"], entry["signature"])
+            else:
+                clusters[cluster_of[match]].append(entry)
+
+        kept = {}
+        for cluster in clusters:
+            best = max(cluster, key=lambda e: (len(e["text"]), -e["rank"]))
+            for entry in cluster:
+                if entry is not best:
+                    counts["near_duplicates"] += 1
+                    counts["tokens_removed"] += estimate_tokens(entry["text"], 0)
+            kept.setdefault(best["url"], []).append(best)
+
+        # Point snippets that repeat an earlier search's at that one's URL and text
+        with self._lock:
+            for url, chosen in kept.items():
+                for entry in chosen:
+                    canonical = self._seen_exact.get(entry["key"])
+                    if canonical is None:
+                        match = self._similar(
+                            entry["signature"],
+                            self._seen_index.candidates(entry["signature"]),
+                            lambda seen_key: self._seen[seen_key][0]
+                        )
+                        canonical = self._seen[match][1] if match is not None else None
+                    if canonical is None:
+                        self._remember(entry, by_url[url])
+                    elif canonical["url"] != url or canonical["text"] != entry["text"]:
+                        entry["canonical"] = canonical
+                        counts["merged_across_searches"] += 1
+                        counts["tokens_merged"] += estimate_tokens(entry["text"], 0)
+
+        output = OrderedDict()
+        for url, result in by_url.items():
+            chosen = sorted(kept.get(url, []), key=lambda e: e["rank"])
+            if result["snippets"] and not chosen:
+                continue
+            for entry in chosen or [None]:
+                if entry is not None and "canonical" in entry:
+                    canonical = entry["canonical"]
+                    target_url, base, text = canonical["url"], canonical["result"], canonical["text"]
+                else:
+                    target_url, base, text = url, result, entry and entry["text"]
+                target = output.setdefault(target_url, dict(base, snippets=[]))
+                if text is not None and text not in target["snippets"]:
+                    target["snippets"].append(text)
+        deduplicated = list(output.values())
+
+        counts["results_out"] = len(deduplicated)
+        counts["snippets_out"] = sum(len(r["snippets"]) for r in deduplicated)
+        with self._lock:
+            for name, count in counts.items():
+                self._stats[name] += count
+        if counts["tokens_removed"] or counts["merged_across_searches"]:
+            logger.debug(
+                f"Dedup: {counts['snippets_in']} -> {counts['snippets_out']} snippets, "
+                f"~{counts['tokens_removed']} tokens removed, "
+                f"{counts['merged_across_searches']} merged with earlier searches"
+            )
+        return deduplicated
+
+    def _remember(self, entry: dict, result: dict):
+        """Record a delivered snippet for later searches; caller holds the lock."""
+        seen_key = (entry["url"], entry["key"])
+        if seen_key in self._seen:
+            return
+        canonical = {
+            "url": entry["url"],
+            "text": entry["text"],
+            "result": {k: v for k, v in result.items() if k != "snippets"},
+        }
+        self._seen[seen_key] = (entry["signature"], canonical)
+        self._seen_index.add(seen_key, entry["signature"])
+        self._seen_exact.setdefault(entry["key"], canonical)
+        while len(self._seen) > self.memory:
+            (url, key), (signature, dropped) = self._seen.popitem(last=False)
+            self._seen_index.remove((url, key), signature)
+            if self._seen_exact.get(key) is dropped:
+                del self._seen_exact[key]
+
+    def stats(self) -> dict:
+        """Cumulative counts since construction; token figures are estimates."""
+        with self._lock:
+            return dict(self._stats)
@@ -8,12 +8,39 @@ This bypasses the STORM pipeline issues with search engines.
 """
 
 import os
+import re
+import math
 import sys
 import json
+import shutil
+import hashlib
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
+
+try:
+    from .checkpoint import Checkpoint, create_run_dir
+    from .deadline import DIRECT_PHASE_SHARES, DEGRADATIONS, Deadline, is_timeout
+    from .evidence import BACKENDS as EVIDENCE_BACKENDS, DEFAULT_K as EVIDENCE_K, EvidenceIndex, format_evidence
+    from .hedging import Hedger
+    from .llm_cache import DEFAULT_MAX_MB, ResponseCache
+    from .quota import PHASE_PRIORITY, QuotaGovernor, get_governor
+    from .store import ArtifactStore
+    from .events import EventWriter, result_event, span_listener
+    from .telemetry import TracedAnthropicClient, Tracer, match_model
+except ImportError:  # Executed as a script
+    from checkpoint import Checkpoint, create_run_dir
+    from deadline import DIRECT_PHASE_SHARES, DEGRADATIONS, Deadline, is_timeout
+    from evidence import BACKENDS as EVIDENCE_BACKENDS, DEFAULT_K as EVIDENCE_K, EvidenceIndex, format_evidence
+    from hedging import Hedger
+    from llm_cache import DEFAULT_MAX_MB, ResponseCache
+    from quota import PHASE_PRIORITY, QuotaGovernor, get_governor
+    from store import ArtifactStore
+    from events import EventWriter, result_event, span_listener
+    from telemetry import TracedAnthropicClient, Tracer, match_model
 
 # Load .env file if present
 def load_dotenv():
@@ -48,33 +75,726 @@ VERSION = "1.0.0"
 AUTHOR = "Aditya Patange"
 
 
-def generate_research_paper(topic: str, output_dir: str = "./output", target_pages: int = 12) -> dict:
-    """
-    Generate a comprehensive research paper using Anthropic Claude.
+DEFAULT_MODEL = "claude-sonnet-4-20250514"
+FAST_MODEL = "claude-3-5-haiku-20241022"
 
-    Copyright (c) 2025 Aditya Patange. All rights reserved.
-    """
+PHASES = ("outline", "paper", "polish")
+
+# Fast model for the outline and first draft, strong model for the polish
+CASCADE_MODELS = {"outline": FAST_MODEL, "paper": FAST_MODEL, "polish": DEFAULT_MODEL}
+
+# Largest max_tokens each model family accepts, matched by longest prefix
+MODEL_MAX_OUTPUT = {
+    "claude-opus-4": 32000,
+    "claude-sonnet-4": 64000,
+    "claude-3-7-sonnet": 64000,
+    "claude-3-5-sonnet": 8192,
+    "claude-3-5-haiku": 8192,
+    "claude-3-opus": 4096,
+    "claude-3-haiku": 4096,
+}
+
+# Output kept as context when a truncated response is continued
+CONTINUATION_TAIL_CHARS = 4000
+
+_clamp_warned = set()
+
+
+def resolve_models(models: Optional[dict] = None) -> dict:
+    """Fill in :data:`DEFAULT_MODEL` for every phase missing from ``models``."""
+    models = {phase: model for phase, model in (models or {}).items() if model}
+    unknown = set(models) - set(PHASES)
+    if unknown:
+        raise ValueError(f"Unknown phases in models: {', '.join(sorted(unknown))}")
+    return {phase: models.get(phase, DEFAULT_MODEL) for phase in PHASES}
+
+
+def phase_models(cascade: bool = False, outline=None, paper=None, polish=None) -> dict:
+    """Build a ``models`` mapping from the ``--cascade`` preset and per-phase overrides."""
+    models = dict(CASCADE_MODELS) if cascade else {}
+    models.update({
+        phase: model for phase, model in (("outline", outline), ("paper", paper), ("polish", polish))
+        if model
+    })
+    return models
+
+
+def _max_output(model: str, max_tokens: int) -> int:
+    """Clamp ``max_tokens`` to what ``model`` can produce in one response."""
+    limit = match_model(MODEL_MAX_OUTPUT, model)
+    if limit is None or max_tokens <= limit:
+        return max_tokens
+    if model not in _clamp_warned:
+        _clamp_warned.add(model)
+        logger.warning(f"{model} returns at most {limit} tokens; clamping max_tokens={max_tokens}")
+    return limit
+
+
+def _anthropic_client():
+    """Create an Anthropic client from ``ANTHROPIC_API_KEY``."""
     import anthropic
 
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
         raise ValueError("ANTHROPIC_API_KEY environment variable is required")
 
-    client = anthropic.Anthropic(api_key=api_key)
+    return anthropic.Anthropic(api_key=api_key)
+
+
+def _stream_once(client, prompt: str, max_tokens: int, stream: bool, model: str, outcome: dict):
+    """Yield one response chunk by chunk, noting its ``stop_reason`` in ``outcome``."""
+    messages = [{"role": "user", "content": prompt}]
+
+    if stream:
+        with client.messages.stream(
+            model=model,
+            max_tokens=max_tokens,
+            messages=messages
+        ) as response:
+            for text in response.text_stream:
+                yield text
+            outcome["stop_reason"] = getattr(response.get_final_message(), "stop_reason", None)
+    else:
+        response = client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            messages=messages
+        )
+        outcome["stop_reason"] = getattr(response, "stop_reason", None)
+        yield response.content[0].text
+
+
+def _continuation_prompt(prompt: str, tail: str) -> str:
+    return f"""{prompt}
+
+Your previous response was cut off by the output limit. It ended with:
+
+<tail>
+{tail}
+</tail>
+
+Continue exactly where it stops, mid-sentence if need be. Do not repeat any of that text, do not restate headings already written and do not add any preamble."""
+
+
+def _stream_text(
+    client,
+    prompt: str,
+    max_tokens: int,
+    stream: bool = False,
+    model: str = DEFAULT_MODEL,
+    budget: Optional[int] = None,
+    outcome: Optional[dict] = None
+):
+    """
+    Yield ``model``'s response to ``prompt`` chunk by chunk.
+
+    In streaming mode chunks are yielded as tokens arrive; otherwise the
+    full response is yielded as a single chunk once the call returns.
+    ``max_tokens`` is clamped to the model's output limit.
+
+    A response cut off at ``max_tokens`` is continued with the original
+    prompt plus the last :data:`CONTINUATION_TAIL_CHARS` of output, until
+    about ``budget`` output tokens have been requested in total. Each call
+    therefore has the same size however long the text gets. ``outcome``
+    receives the number of ``continuations`` and whether the text is still
+    ``truncated``.
+    """
+    max_tokens = _max_output(model, max_tokens)
+    parts = max(1, math.ceil((budget or max_tokens) / max_tokens))
+
+    outcome = {} if outcome is None else outcome
+    outcome.update(continuations=0, truncated=False)
+    tail = ""
+    for part in range(parts):
+        call = {}
+        call_prompt = _continuation_prompt(prompt, tail) if part else prompt
+        for text in _stream_once(client, call_prompt, max_tokens, stream, model, call):
+            tail = (tail + text)[-CONTINUATION_TAIL_CHARS:]
+            yield text
+        if call.get("stop_reason") != "max_tokens":
+            return
+        if part + 1 < parts:
+            outcome["continuations"] += 1
+            logger.info(f"Response hit max_tokens={max_tokens}; continuing ({part + 2}/{parts})")
+
+    outcome["truncated"] = True
+    logger.warning(f"Response is still truncated after {parts} call(s) of {max_tokens} tokens")
+
+
+def _run_phase(
+    phase: str, client, prompt: str, max_tokens: int, path: Path, stream: bool,
+    model: str = DEFAULT_MODEL, budget: Optional[int] = None
+):
+    """
+    Run one generation phase, appending chunks to ``path`` as they arrive.
+
+    The response is never held in memory as a whole; callers that need the
+    text read it back from ``path``. Output beyond ``max_tokens`` is
+    generated in continuation calls up to ``budget`` tokens.
+    """
+    yield {"event": "phase_start", "phase": phase}
+
+    chars = 0
+    outcome = {}
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in _stream_text(
+            client, prompt, max_tokens, stream=stream, model=model, budget=budget, outcome=outcome
+        ):
+            f.write(chunk)
+            f.flush()
+            chars += len(chunk)
+            yield {"event": "chunk", "phase": phase, "text": chunk}
+
+    yield {"event": "phase_end", "phase": phase, "path": str(path), "chars": chars, **outcome}
+
+
+# Top-level outline headings: "## 3. Methods", "II. History", "**4) Results**",
+# "Section 5: Applications". Sub-numbering such as "3.1" is deliberately excluded.
+OUTLINE_SECTION_RE = re.compile(
+    r"^\s*(?:#{1,4}\s*)?(?:\*\*)?(?:Section\s+)?(\d+|[IVXL]+)[.:)]\s+(.+?)(?:\*\*)?\s*$",
+    re.IGNORECASE
+)
+
+# Outline entries that are not body sections of the paper
+FRONT_BACK_MATTER = (
+    "title", "abstract", "introduction", "conclusion", "references",
+    "bibliography", "keywords", "main sections", "key points", "suggested references"
+)
+
+CITATION_RE = re.compile(r"\[([^\[\]]*?\d{4}[a-z]?)\]")
+
+
+def parse_outline_sections(outline: str) -> list:
+    """
+    Parse the body sections out of a Phase 1 outline.
+
+    Returns a list of dicts with ``number``, ``title`` and ``notes`` (the
+    outline lines under that heading), in outline order. Title, abstract,
+    introduction, conclusion and references entries are left out since they
+    are drafted as front and back matter. When the outline uses markdown
+    headings, only numbered headings at the shallowest level count, so
+    numbered key points under a heading stay in its notes. Likewise only the
+    predominant numbering style (arabic or roman) is treated as sections.
+    """
+    lines = outline.splitlines()
+    heading_levels = [
+        len(line) - len(line.lstrip("#"))
+        for line in lines
+        if line.startswith("#") and OUTLINE_SECTION_RE.match(line)
+    ]
+    level = min(heading_levels) if heading_levels else 0
+
+    numbers = [
+        match.group(1) for match in map(OUTLINE_SECTION_RE.match, lines)
+        if match and not match.string.startswith((" ", "\t"))
+    ]
+    arabic = sum(number.isdigit() for number in numbers) * 2 >= len(numbers)
+
+    sections = []
+    current = None
+
+    for line in lines:
+        match = OUTLINE_SECTION_RE.match(line)
+        is_heading = (
+            match is not None
+            and not line.startswith((" ", "\t"))
+            and len(line) - len(line.lstrip("#")) == level
+            and match.group(1).isdigit() == arabic
+        )
+        if is_heading:
+            title = match.group(2).strip().strip("*#: ").strip()
+            if title.lower().startswith(FRONT_BACK_MATTER):
+                current = None
+                continue
+            current = {"number": match.group(1), "title": title, "notes": []}
+            sections.append(current)
+        elif current is not None and line.strip():
+            current["notes"].append(line.rstrip())
+
+    for section in sections:
+        section["notes"] = "\n".join(section["notes"])
+
+    return sections
+
+
+def _evidence_block(passages: list) -> str:
+    """Prompt text presenting retrieved passages, or nothing when there are none."""
+    if not passages:
+        return ""
+    return f"""
+
+Research passages relevant to this part. Ground your claims in them where they apply and cite their sources; do not attribute anything to them that they do not say:
+{format_evidence(passages)}"""
+
+
+def _section_prompt(
+    topic: str, outline: str, part: str, heading: str, words: int, evidence: Optional[list] = None
+) -> str:
+    """Build the drafting prompt for one part of a section-parallel paper."""
+    return f"""You are an expert academic researcher and writer. You are writing one part of a research paper on the topic: "{topic}"
+
+The full outline of the paper, for context:
+{outline}
+
+Write ONLY {part}. The other parts of the paper are written separately, so do not repeat or summarize them.{_evidence_block(evidence)}
+
+Requirements:
+1. Write approximately {words} words
+2. Use academic tone and style
+3. Include inline citations in [Author, Year] format
+4. Be thorough, insightful, and provide deep analysis
+5. Include relevant examples, case studies, or evidence
+6. Format in clean markdown, starting with {heading}
+
+Write this part now."""
+
+
+def _extract_citations(text: str) -> list:
+    """Collect distinct [Author, Year] citations from drafted text, in order."""
+    citations = []
+    for match in CITATION_RE.finditer(text):
+        for citation in match.group(1).split(";"):
+            citation = citation.strip()
+            if citation and citation not in citations:
+                citations.append(citation)
+    return citations
+
+
+def _draft_sections(
+    client,
+    topic: str,
+    outline: str,
+    sections: list,
+    target_pages: int,
+    path: Path,
+    stream: bool,
+    concurrency: int,
+    model: str = DEFAULT_MODEL,
+    find_evidence=None
+):
+    """
+    Draft the paper section by section on a bounded worker pool.
+
+    Front matter and body sections are drafted concurrently, each with the
+    full outline for coherence. The conclusion and references are drafted
+    once the body is done so they can cite what the body actually cites.
+    Parts are written to ``path`` strictly in outline order.
+
+    ``find_evidence`` maps a query to the passages to put in that part's
+    prompt; the body sections query with their title and outline notes.
+    """
+    find_evidence = find_evidence or (lambda query: [])
+    yield {"event": "phase_start", "phase": "paper", "sections": len(sections)}
+
+    total_words = target_pages * 500
+    matter_words = max(300, total_words // 10)
+    section_words = max(400, (total_words - 2 * matter_words) // len(sections))
+
+    def draft(prompt, words):
+        max_tokens = min(16000, max(2000, words * 2))
+        outcome = {}
+        text = "".join(_stream_text(
+            client, prompt, max_tokens, stream=stream, model=model, budget=words * 2, outcome=outcome
+        ))
+        return text.strip(), outcome
+
+    parts = [(
+        "front matter",
+        _section_prompt(
+            topic, outline,
+            "the paper title, the Abstract and the Introduction",
+            "the paper title as a `#` heading, followed by `## Abstract` and `## Introduction`",
+            matter_words,
+            evidence=find_evidence(topic)
+        )
+    )]
+    for section in sections:
+        heading = f"{section['number']}. {section['title']}"
+        parts.append((
+            heading,
+            _section_prompt(
+                topic, outline,
+                f"section {heading}, covering these points from the outline:\n{section['notes']}",
+                f"the heading `## {heading}`",
+                section_words,
+                evidence=find_evidence(f"{section['title']}\n{section['notes']}")
+            )
+        ))
+
+    chars = 0
+    citations = []
+    outcomes = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool, \
+            open(path, "w", encoding="utf-8") as f:
+        futures = [
+            pool.submit(draft, prompt, matter_words if index == 0 else section_words)
+            for index, (_, prompt) in enumerate(parts)
+        ]
+
+        for index, ((name, _), future) in enumerate(zip(parts, futures)):
+            text, outcome = future.result()
+            outcomes.append(outcome)
+            text += "\n\n"
+            if index > 0:
+                citations.extend(c for c in _extract_citations(text) if c not in citations)
+            f.write(text)
+            f.flush()
+            chars += len(text)
+            yield {"event": "chunk", "phase": "paper", "text": text}
+            yield {"event": "section_end", "phase": "paper", "index": index, "section": name}
+
+        cited = "\n".join(f"- {c}" for c in citations) or "- (no inline citations were found)"
+        back_prompt = _section_prompt(
+            topic, outline,
+            "the Conclusion and the References section. The body of the paper cites the works "
+            f"below; list each of them in References with properly formatted citations:\n{cited}",
+            "`## Conclusion`, followed by `## References`",
+            matter_words
+        )
+        text, outcome = pool.submit(draft, back_prompt, matter_words).result()
+        outcomes.append(outcome)
+        text += "\n"
+        f.write(text)
+        chars += len(text)
+        yield {"event": "chunk", "phase": "paper", "text": text}
+        yield {"event": "section_end", "phase": "paper", "index": len(parts), "section": "back matter"}
+
+    yield {
+        "event": "phase_end",
+        "phase": "paper",
+        "path": str(path),
+        "chars": chars,
+        "continuations": sum(outcome["continuations"] for outcome in outcomes),
+        "truncated": sum(outcome["truncated"] for outcome in outcomes)
+    }
+
+
+def split_markdown_sections(markdown: str) -> list:
+    """
+    Split a markdown document at its ``#`` and ``##`` headings.
+
+    Any text before the first heading becomes its own leading section, and
+    headings inside fenced code blocks are ignored. Joining the returned
+    sections reproduces the document.
+    """
+    sections = []
+    current = []
+    in_fence = False
+
+    for line in markdown.splitlines(keepends=True):
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        is_heading = not in_fence and re.match(r"^#{1,2}\s", line)
+        if is_heading and current:
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+
+    if current:
+        sections.append("".join(current))
+
+    return sections
+
+
+def _polish_sections(
+    client,
+    topic: str,
+    paper_path: Path,
+    polished_path: Path,
+    stream: bool,
+    concurrency: int,
+    model: str = DEFAULT_MODEL,
+    deadline: Optional[Deadline] = None
+):
+    """
+    Polish the paper one markdown section at a time on a bounded worker pool.
+
+    Polished text is remembered in ``polish_state.json`` keyed by the SHA-256
+    of the source section, so sections unchanged since the last polish are
+    reused instead of being sent to the model again. Sections are written to
+    ``polished_path`` in document order.
+
+    When a ``deadline`` allows ``skip_polish``, a section whose polish call
+    times out keeps its drafted text (and is polished again next time).
+    """
+    state_path = paper_path.parent / "polish_state.json"
+    previous = {}
+    if state_path.exists():
+        previous = json.loads(state_path.read_text(encoding="utf-8")).get("sections", {})
+
+    sections = split_markdown_sections(paper_path.read_text(encoding="utf-8"))
+    digests = [hashlib.sha256(section.strip().encode("utf-8")).hexdigest() for section in sections]
+
+    yield {"event": "phase_start", "phase": "polish", "sections": len(sections)}
+
+    def polish(section):
+        prompt = f"""Review and enhance this section of a research paper on the topic: "{topic}". Improve clarity, fix any issues, ensure academic rigor, and make it publication-ready.
+
+Section:
+{section}
+
+Provide only the enhanced, polished version of this section, starting with its heading. Maintain the markdown formatting and keep every [Author, Year] citation."""
+        draft = (section.strip(), {"continuations": 0, "truncated": False, "unpolished": True})
+        degradable = deadline is not None and deadline.allows("skip_polish")
+        if degradable and deadline.remaining() <= 0:
+            return draft
+
+        budget = max(1024, len(section) // 2)
+        outcome = {}
+        try:
+            text = "".join(_stream_text(
+                client, prompt, min(16000, budget), stream=stream, model=model,
+                budget=budget, outcome=outcome
+            ))
+        except Exception as e:
+            if not degradable or not is_timeout(e):
+                raise
+            logger.warning(f"Polish call timed out; keeping the drafted section: {e}")
+            return draft
+        return text.strip(), outcome
+
+    chars = 0
+    skipped = 0
+    unpolished = 0
+    polished = {}
+    outcomes = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool, \
+            open(polished_path, "w", encoding="utf-8") as f:
+        futures = []
+        for section, digest in zip(sections, digests):
+            if digest in previous:
+                futures.append(previous[digest])
+            elif len(section.strip().splitlines()) <= 1:
+                # A bare heading has nothing to polish
+                futures.append(section.strip())
+            else:
+                futures.append(pool.submit(polish, section))
+
+        for index, (digest, future) in enumerate(zip(digests, futures)):
+            if isinstance(future, str):
+                text = future
+                skipped += 1
+                polished[digest] = text
+            else:
+                text, outcome = future.result()
+                outcomes.append(outcome)
+                if outcome.get("unpolished"):
+                    # Not remembered, so the next polish retries it
+                    unpolished += 1
+                else:
+                    polished[digest] = text
+            text += "\n\n"
+            f.write(text)
+            f.flush()
+            chars += len(text)
+            yield {"event": "chunk", "phase": "polish", "text": text}
+            yield {"event": "section_end", "phase": "polish", "index": index}
+
+    tmp_path = state_path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps({"sections": polished}), encoding="utf-8")
+    os.replace(tmp_path, state_path)
+
+    logger.info(f"Polished {len(sections) - skipped - unpolished} sections ({skipped} unchanged)")
+    if unpolished:
+        deadline.degrade("skip_polish", "polish", sections=unpolished)
+    yield {
+        "event": "phase_end",
+        "phase": "polish",
+        "path": str(polished_path),
+        "chars": chars,
+        "sections": len(sections),
+        "skipped": skipped,
+        "unpolished": unpolished,
+        "continuations": sum(outcome["continuations"] for outcome in outcomes),
+        "truncated": sum(outcome["truncated"] for outcome in outcomes)
+    }
+
+
+def polish_paper(
+    paper_dir: str,
+    topic: Optional[str] = None,
+    stream: bool = False,
+    concurrency: int = 4,
+    on_event=None,
+    client=None,
+    cache: Optional[ResponseCache] = None,
+    model: Optional[str] = None
+) -> dict:
+    """
+    Re-polish an existing ``paper.md``, e.g. after it was edited by hand.
+
+    Only sections whose text changed since the last polish are sent to the
+    model. The topic and polish model default to those recorded in
+    ``metadata.json``.
+    """
+    paper_dir = Path(paper_dir)
+    paper_path = paper_dir / "paper.md"
+    if not paper_path.exists():
+        raise FileNotFoundError(f"No paper.md found in {paper_dir}")
+
+    metadata_path = paper_dir / "metadata.json"
+    metadata = {}
+    if metadata_path.exists():
+        metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
+    topic = topic or metadata.get("topic")
+    model = model or metadata.get("models", {}).get("polish") or DEFAULT_MODEL
+
+    client = client or _anthropic_client()
+    if cache is not None:
+        client = cache.wrap_anthropic(client)
+
+    summary = {}
+    for event in _polish_sections(
+        client, topic or paper_dir.name, paper_path,
+        paper_dir / "paper_polished.md", stream, concurrency, model=model
+    ):
+        if on_event is not None:
+            on_event(event)
+        if event["event"] == "phase_end":
+            summary = event
+
+    return {
+        "success": True,
+        "output_dir": str(paper_dir),
+        "article_path": summary["path"],
+        "sections": summary["sections"],
+        "skipped": summary["skipped"]
+    }
+
+
+def iter_research_paper(
+    topic: Optional[str],
+    output_dir: str = "./output",
+    target_pages: int = 12,
+    stream: bool = True,
+    client=None,
+    parallel_sections: bool = False,
+    concurrency: int = 4,
+    polish_mode: str = "sections",
+    cache: Optional[ResponseCache] = None,
+    resume_dir: Optional[str] = None,
+    trace_path: Optional[str] = None,
+    quota: Optional[QuotaGovernor] = None,
+    hedge_percentile: Optional[float] = None,
+    models: Optional[dict] = None,
+    on_span=None,
+    evidence: Optional[EvidenceIndex] = None,
+    evidence_k: int = EVIDENCE_K,
+    deadline: Optional[float] = None,
+    degrade=None
+):
+    """
+    Generate a research paper, yielding progress events as it goes.
+
+    Events are dicts with an ``event`` key: ``start``, ``phase_start``,
+    ``chunk`` (with the new ``text``), ``phase_end`` and finally ``result``.
+    With ``parallel_sections`` the paper is drafted per outline section on
+    up to ``concurrency`` workers, with a ``section_end`` event per part.
+    ``polish_mode="sections"`` polishes each markdown section separately and
+    concurrently; ``"whole"`` resends the entire paper in a single call.
+    A ``cache`` serves repeated model calls from disk.
+
+    ``resume_dir`` continues an interrupted run in its existing output
+    directory: phases whose artifacts are complete are skipped (with a
+    ``phase_skip`` event) and generation starts at the first missing one.
+    The topic and page target then default to those the run started with.
+
+    Every phase and model call is traced; the summary (time, tokens and
+    estimated cost per phase) goes to ``metadata.json`` under ``telemetry``
+    and, with ``trace_path``, each span is appended to that NDJSON file.
+    ``on_span`` is called with each span as it ends, from whichever thread
+    made the call.
+
+    A ``quota`` governor admits each model call against the model's
+    requests- and tokens-per-minute budget, shared with every other paper
+    using the same governor; calls from later phases go first.
 
-    # Create output directory
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
+    With ``hedge_percentile`` short calls (the outline, section drafts and
+    section polishes) that have not produced a first token by that
+    percentile of recent first-token latency are duplicated, and the first
+    copy to finish wins.
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    safe_topic = "".join(c if c.isalnum() or c in " -_" else "_" for c in topic)
-    safe_topic = safe_topic.replace(" ", "_")[:50]
+    ``models`` picks the model per phase (``outline``, ``paper``,
+    ``polish``); phases left out use :data:`DEFAULT_MODEL`.
+    :data:`CASCADE_MODELS` drafts with the fast model and polishes with the
+    strong one. Per-phase seconds, tokens and cost are reported in
+    ``metadata.json`` under ``phases``.
 
-    topic_dir = output_path / f"{safe_topic}_{timestamp}"
-    topic_dir.mkdir(parents=True, exist_ok=True)
+    Responses cut off at ``max_tokens`` are continued from their tail until
+    the output matches ``target_pages``; each phase records how many
+    ``continuations`` it needed and how many responses stayed ``truncated``.
+
+    With an ``evidence`` index, each drafting prompt carries the
+    ``evidence_k`` passages most relevant to its section (see evidence.py)
+    instead of no research at all.
+
+    ``deadline`` is a time budget in seconds, split between the phases by
+    :data:`DIRECT_PHASE_SHARES`. Every model call times out when it is
+    spent. A run that falls behind degrades by the ``degrade`` policies
+    (default: all of :data:`DEGRADATIONS`): ``cap_pages`` drafts fewer
+    pages and ``skip_polish`` returns the draft unpolished. The policies
+    that fired are recorded in ``metadata.json`` under ``deadline``.
+
+    Copyright (c) 2025 Aditya Patange. All rights reserved.
+    """
+    if client is None:
+        client = _anthropic_client()
+    if cache is not None:
+        cache_before = cache.stats()
+    timer = Deadline(deadline, DIRECT_PHASE_SHARES, degrade) if deadline else None
+
+    if resume_dir:
+        topic_dir = Path(resume_dir)
+        checkpoint = Checkpoint.load(topic_dir)
+        topic = topic or checkpoint.info.get("topic")
+        if not topic:
+            raise ValueError(f"No topic recorded in {topic_dir}; pass the topic explicitly")
+        target_pages = checkpoint.info.get("target_pages", target_pages)
+        models = resolve_models({**checkpoint.info.get("models", {}), **(models or {})})
+        timestamp = checkpoint.info.get("timestamp") or datetime.now().strftime("%Y%m%d_%H%M%S")
+        logger.info(f"Resuming run in {topic_dir} (completed: {checkpoint.completed() or 'none'})")
+    else:
+        models = resolve_models(models)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        topic_dir = create_run_dir(output_dir, topic, timestamp)
+        checkpoint = Checkpoint.start(
+            topic_dir, topic=topic, target_pages=target_pages, timestamp=timestamp,
+            models=models
+        )
+
+    # Quota admission sits closest to the API, so cache hits never wait on it
+    tracer = Tracer(trace_path, run=topic_dir.name, on_span=on_span)
+    if timer is not None:
+        client = timer.wrap_anthropic(client)
+    if quota is not None:
+        client = quota.wrap_anthropic(client, priority=lambda: PHASE_PRIORITY.get(tracer.phase, 0))
+    if cache is not None:
+        client = cache.wrap_anthropic(client)
+    hedger = Hedger(hedge_percentile) if hedge_percentile else None
+    if hedger is not None:
+        client = hedger.wrap_anthropic(client)
+    client = TracedAnthropicClient(client, tracer)
+
+    outline_path = topic_dir / "outline.txt"
+    paper_path = topic_dir / "paper.md"
+    polished_path = topic_dir / "paper_polished.md"
 
     logger.info(f"Generating research paper on: {topic}")
     logger.info(f"Target length: ~{target_pages} pages (~{target_pages * 500} words)")
+    logger.info("Models: " + ", ".join(f"{phase}={model}" for phase, model in models.items()))
+    yield {"event": "start", "topic": topic, "output_dir": str(topic_dir)}
+
+    # Continuations and truncation of each phase, recorded in the checkpoint
+    phase_ends = {}
+
+    def track(events):
+        for event in events:
+            if event["event"] == "phase_end":
+                phase_ends[event["phase"]] = {
+                    key: int(event.get(key, 0)) for key in ("continuations", "truncated")
+                }
+            yield event
 
     # Step 1: Generate outline
     logger.info("Phase 1: Generating outline...")
@@ -91,100 +811,294 @@ Create a structured outline with:
 
 Format the outline clearly with hierarchical numbering."""
 
-    outline_response = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=2000,
-        messages=[{"role": "user", "content": outline_prompt}]
-    )
-    outline = outline_response.content[0].text
-
-    # Save outline
-    (topic_dir / "outline.txt").write_text(outline, encoding="utf-8")
-    logger.info("Outline generated successfully")
+    if checkpoint.is_done("outline", outline_path):
+        logger.info("Outline already generated, skipping")
+        yield {"event": "phase_skip", "phase": "outline", "path": str(outline_path)}
+    else:
+        checkpoint.begin("outline")
+        with tracer.span("outline", "phase"):
+            yield from track(_run_phase(
+                "outline", client, outline_prompt, 2000, outline_path, stream,
+                model=models["outline"]
+            ))
+        checkpoint.mark_done("outline", **phase_ends["outline"])
+        logger.info("Outline generated successfully")
+    outline = outline_path.read_text(encoding="utf-8")
 
     # Step 2: Generate the full paper
     logger.info("Phase 2: Generating full research paper...")
 
+    evidence_used = {"prompts": 0, "passages": 0, "chars": 0}
+
+    def find_evidence(query):
+        if evidence is None:
+            return []
+        passages = evidence.search(topic, query, k=evidence_k)
+        evidence_used["prompts"] += 1
+        evidence_used["passages"] += len(passages)
+        evidence_used["chars"] += sum(len(p["text"]) for p in passages)
+        return passages
+
+    sections = parse_outline_sections(outline) if parallel_sections else []
+    if parallel_sections and len(sections) < 2:
+        logger.warning("Could not find numbered sections in the outline; drafting in one call")
+        sections = []
+
+    # Evidence is looked up only for parts about to be drafted
+    paper_done = checkpoint.is_done("paper", paper_path)
+    pages = target_pages
+    if timer is not None and not paper_done:
+        pages = timer.cap_pages(target_pages)
+    paper_evidence = find_evidence(topic) if not sections and not paper_done else []
     paper_prompt = f"""You are an expert academic researcher and writer. Write a comprehensive, well-researched paper on the topic: "{topic}"
 
 Use this outline as your guide:
 {outline}
 
 Requirements:
-1. Write approximately {target_pages * 500} words ({target_pages} pages)
+1. Write approximately {pages * 500} words ({pages} pages)
 2. Use academic tone and style
 3. Include an Abstract, Introduction, multiple body sections, and Conclusion
 4. Include inline citations in [Author, Year] format
 5. Add a References section at the end with properly formatted citations
 6. Be thorough, insightful, and provide deep analysis
 7. Include relevant examples, case studies, or evidence
-8. Make it suitable for publication on a professional website
+8. Make it suitable for publication on a professional website{_evidence_block(paper_evidence)}
 
 Write the complete paper now, formatted in clean markdown."""
 
-    paper_response = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=16000,
-        messages=[{"role": "user", "content": paper_prompt}]
-    )
-    paper = paper_response.content[0].text
-
-    # Save paper
-    (topic_dir / "paper.md").write_text(paper, encoding="utf-8")
-    logger.info("Paper generated successfully")
+    if paper_done:
+        logger.info("Paper already drafted, skipping")
+        yield {"event": "phase_skip", "phase": "paper", "path": str(paper_path)}
+    else:
+        checkpoint.begin("paper")
+        with tracer.span("paper", "phase", sections=len(sections)):
+            if sections:
+                logger.info(f"Drafting {len(sections)} sections with up to {concurrency} workers")
+                yield from track(_draft_sections(
+                    client, topic, outline, sections, pages, paper_path, stream, concurrency,
+                    model=models["paper"], find_evidence=find_evidence
+                ))
+            else:
+                yield from track(_run_phase(
+                    "paper", client, paper_prompt, 16000, paper_path, stream,
+                    model=models["paper"], budget=pages * 500 * 2
+                ))
+        checkpoint.mark_done("paper", sections=len(sections), **phase_ends["paper"])
+        logger.info("Paper generated successfully")
 
     # Step 3: Polish and enhance
     logger.info("Phase 3: Polishing and enhancing...")
 
-    polish_prompt = f"""Review and enhance this research paper. Improve clarity, fix any issues, ensure academic rigor, and make it publication-ready.
+    polish_summary = checkpoint.data["phases"].get("polish", {}).get("summary", {})
+    if checkpoint.is_done("polish", polished_path):
+        logger.info("Paper already polished, skipping")
+        yield {"event": "phase_skip", "phase": "polish", "path": str(polished_path)}
+    elif timer is not None and timer.skip_polish():
+        # Left pending, so resuming the run polishes it
+        shutil.copyfile(paper_path, polished_path)
+        yield {"event": "phase_skip", "phase": "polish", "path": str(polished_path), "degraded": True}
+    elif polish_mode == "whole":
+        checkpoint.begin("polish")
+        polish_prompt = f"""Review and enhance this research paper. Improve clarity, fix any issues, ensure academic rigor, and make it publication-ready.
 
 Paper:
-{paper}
+{paper_path.read_text(encoding="utf-8")}
 
 Provide the enhanced, polished version. Maintain the markdown formatting."""
 
-    polish_response = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=16000,
-        messages=[{"role": "user", "content": polish_prompt}]
-    )
-    polished_paper = polish_response.content[0].text
-
-    # Save polished paper
-    (topic_dir / "paper_polished.md").write_text(polished_paper, encoding="utf-8")
-    logger.info("Paper polished successfully")
+        try:
+            with tracer.span("polish", "phase", mode="whole"):
+                yield from track(_run_phase(
+                    "polish", client, polish_prompt, 16000, polished_path, stream,
+                    model=models["polish"], budget=paper_path.stat().st_size // 2
+                ))
+        except Exception as e:
+            if timer is None or not timer.allows("skip_polish") or not is_timeout(e):
+                raise
+            timer.degrade("skip_polish", "polish", error=str(e))
+            shutil.copyfile(paper_path, polished_path)
+            yield {"event": "phase_skip", "phase": "polish", "path": str(polished_path), "degraded": True}
+        else:
+            checkpoint.mark_done("polish", **phase_ends["polish"])
+            logger.info("Paper polished successfully")
+    else:
+        checkpoint.begin("polish")
+        unpolished = 0
+        with tracer.span("polish", "phase", mode="sections"):
+            for event in track(_polish_sections(
+                client, topic, paper_path, polished_path, stream, concurrency,
+                model=models["polish"], deadline=timer
+            )):
+                if event["event"] == "phase_end":
+                    polish_summary = {"sections": event["sections"], "skipped": event["skipped"]}
+                    unpolished = event["unpolished"]
+                yield event
+        if unpolished:
+            logger.warning(f"{unpolished} sections were left unpolished at the deadline")
+        else:
+            checkpoint.mark_done("polish", summary=polish_summary, **phase_ends["polish"])
+            logger.info("Paper polished successfully")
 
     # Save metadata
+    telemetry = tracer.summary()
+    phase_seconds = checkpoint.phase_seconds()
+    phase_usage = telemetry["llm"]["by_phase"]
+    phases = {
+        phase: {
+            "model": models[phase],
+            "seconds": phase_seconds.get(phase),
+            **{
+                key: checkpoint.data["phases"].get(phase, {}).get(key, 0)
+                for key in ("continuations", "truncated")
+            },
+            **{
+                key: phase_usage.get(phase, {}).get(key, 0)
+                for key in ("calls", "input_tokens", "output_tokens", "cost_usd")
+            }
+        }
+        for phase in PHASES
+    }
     metadata = {
         "topic": topic,
         "timestamp": timestamp,
         "output_dir": str(topic_dir),
         "version": VERSION,
         "author": AUTHOR,
-        "model": "claude-sonnet-4-20250514",
+        "model": models["polish"],
+        "models": models,
         "target_pages": target_pages,
+        "streaming": stream,
+        "parallel_sections": checkpoint.data["phases"]["paper"].get("sections", 0),
+        "resumed": bool(resume_dir),
+        "phase_seconds": phase_seconds,
+        "phases": phases,
+        "polish_mode": polish_mode,
+        "polish": polish_summary,
+        "cache": {
+            name: count - cache_before[name] for name, count in cache.stats().items()
+        } if cache is not None else None,
+        "telemetry": telemetry,
+        "quota": quota.metrics() if quota is not None else None,
+        "hedging": hedger.stats() if hedger is not None else None,
+        "evidence": {
+            "index": str(evidence.root),
+            "backend": evidence.backend,
+            "k": evidence_k,
+            **evidence_used
+        } if evidence is not None else None,
+        "deadline": timer.report() if timer is not None else None,
         "files": {
             "outline": "outline.txt",
             "paper": "paper.md",
-            "polished": "paper_polished.md"
+            "polished": "paper_polished.md",
+            "checkpoint": Checkpoint.FILENAME,
+            **({"polish_state": "polish_state.json"} if polish_mode != "whole" else {})
         }
     }
     (topic_dir / "metadata.json").write_text(json.dumps(metadata, indent=2), encoding="utf-8")
 
     logger.info(f"Research paper saved to: {topic_dir}")
 
-    return {
-        "success": True,
-        "topic": topic,
-        "timestamp": timestamp,
-        "output_dir": str(topic_dir),
-        "outline": outline,
-        "article": polished_paper,
-        "version": VERSION,
-        "author": AUTHOR
+    yield {
+        "event": "result",
+        "result": {
+            "success": True,
+            "topic": topic,
+            "timestamp": timestamp,
+            "output_dir": str(topic_dir),
+            "outline": outline,
+            "outline_path": str(outline_path),
+            "article_path": str(polished_path),
+            "models": models,
+            "phases": phases,
+            "telemetry": telemetry,
+            "deadline": metadata["deadline"],
+            "version": VERSION,
+            "author": AUTHOR
+        }
     }
 
 
+def generate_research_paper(
+    topic: Optional[str],
+    output_dir: str = "./output",
+    target_pages: int = 12,
+    stream: bool = False,
+    on_event=None,
+    client=None,
+    parallel_sections: bool = False,
+    concurrency: int = 4,
+    polish_mode: str = "sections",
+    cache: Optional[ResponseCache] = None,
+    resume_dir: Optional[str] = None,
+    trace_path: Optional[str] = None,
+    quota: Optional[QuotaGovernor] = None,
+    hedge_percentile: Optional[float] = None,
+    models: Optional[dict] = None,
+    on_span=None,
+    evidence: Optional[EvidenceIndex] = None,
+    evidence_k: int = EVIDENCE_K,
+    deadline: Optional[float] = None,
+    degrade=None
+) -> dict:
+    """
+    Generate a comprehensive research paper using Anthropic Claude.
+
+    With ``stream=True`` responses are consumed as token streams and written
+    to disk incrementally; ``on_event`` receives every progress event from
+    :func:`iter_research_paper`. ``parallel_sections`` drafts the outline's
+    sections concurrently, with at most ``concurrency`` calls in flight;
+    the same cap applies to the per-section polish pass. Pass a
+    :class:`ResponseCache` as ``cache`` to reuse earlier model responses.
+    ``resume_dir`` resumes an interrupted run from its first missing phase.
+    ``trace_path`` appends per-phase and per-call spans to an NDJSON file.
+    ``quota`` admits calls against per-model RPM/TPM budgets, and
+    ``hedge_percentile`` hedges short calls that are slow to start.
+    ``models`` maps phases to models, e.g. :data:`CASCADE_MODELS`.
+    ``on_span`` receives every finished telemetry span (see
+    :func:`events.span_listener`). ``evidence`` grounds each section's
+    prompt in its top ``evidence_k`` passages from an :class:`EvidenceIndex`.
+    ``deadline`` bounds the run to that many seconds, degrading by the
+    ``degrade`` policies when it falls behind.
+    The polished article is only inlined in the
+    result when not streaming; streaming callers read ``article_path``.
+
+    Copyright (c) 2025 Aditya Patange. All rights reserved.
+    """
+    result = None
+    for event in iter_research_paper(
+        topic,
+        output_dir=output_dir,
+        target_pages=target_pages,
+        stream=stream,
+        client=client,
+        parallel_sections=parallel_sections,
+        concurrency=concurrency,
+        polish_mode=polish_mode,
+        cache=cache,
+        resume_dir=resume_dir,
+        trace_path=trace_path,
+        quota=quota,
+        hedge_percentile=hedge_percentile,
+        models=models,
+        on_span=on_span,
+        evidence=evidence,
+        evidence_k=evidence_k,
+        deadline=deadline,
+        degrade=degrade
+    ):
+        if on_event is not None:
+            on_event(event)
+        if event["event"] == "result":
+            result = event["result"]
+
+    if not stream:
+        result["article"] = Path(result["article_path"]).read_text(encoding="utf-8")
+
+    return result
+
+
 def main():
     """CLI entry point for Research Paper Agent - Direct Generator."""
     parser = argparse.ArgumentParser(
@@ -194,7 +1108,6 @@ def main():
 
     parser.add_argument(
         "--topic", "-t",
-        required=True,
         help="The research topic to generate a paper about"
     )
 
@@ -211,12 +1124,158 @@ def main():
         help="Target number of pages (default: 12)"
     )
 
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream tokens to disk and stdout as they are generated"
+    )
+
+    parser.add_argument(
+        "--parallel-sections",
+        action="store_true",
+        help="Draft the outline's sections concurrently instead of in one call"
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Maximum concurrent section drafts (default: 4)"
+    )
+
+    parser.add_argument(
+        "--polish-mode",
+        default="sections",
+        choices=["sections", "whole"],
+        help="Polish per markdown section, or resend the whole paper (default: sections)"
+    )
+
+    parser.add_argument(
+        "--resume",
+        metavar="DIR",
+        help="Resume an interrupted run from its output directory"
+    )
+
+    parser.add_argument(
+        "--repolish",
+        metavar="DIR",
+        help="Re-polish the edited paper.md in an existing output directory"
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory for the persistent LLM response cache (disabled by default)"
+    )
+
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_MB,
+        help=f"Size cap for the response cache in MB (default: {DEFAULT_MAX_MB})"
+    )
+
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Append phase and LLM call spans to this NDJSON file"
+    )
+
+    parser.add_argument(
+        "--quota",
+        action="store_true",
+        help="Admit model calls against per-model requests/tokens-per-minute budgets"
+    )
+
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        help="Requests per minute allowed per model (implies --quota)"
+    )
+
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        help="Tokens per minute allowed per model (implies --quota)"
+    )
+
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        metavar="P",
+        help="Duplicate outline/section calls with no first token by the P-th percentile "
+             "of recent first-token latency (e.g. 95; disabled by default)"
+    )
+
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Time budget for the paper: model calls time out when it is spent, and a run "
+             "that falls behind degrades by the --degrade policies"
+    )
+
+    parser.add_argument(
+        "--degrade",
+        default=",".join(DEGRADATIONS),
+        metavar="POLICIES",
+        help=f"Comma-separated degradations allowed under --deadline, or 'none' "
+             f"(default: {','.join(DEGRADATIONS)}; reduce_research applies to STORM only)"
+    )
+
+    parser.add_argument(
+        "--cascade",
+        action="store_true",
+        help=f"Outline and draft with {FAST_MODEL}, polish with {DEFAULT_MODEL}"
+    )
+
+    for phase, what in (("outline", "the outline"), ("draft", "the first draft"),
+                        ("polish", "the polish pass")):
+        parser.add_argument(
+            f"--{phase}-model",
+            metavar="MODEL",
+            help=f"Model for {what} (default: {DEFAULT_MODEL}, or the --cascade preset)"
+        )
+
+    parser.add_argument(
+        "--evidence",
+        metavar="DIR",
+        help="Evidence index (see storm/evidence.py) to ground each section's prompt in"
+    )
+
+    parser.add_argument(
+        "--evidence-k",
+        type=int,
+        default=EVIDENCE_K,
+        metavar="N",
+        help=f"Passages per section prompt from the evidence index (default: {EVIDENCE_K})"
+    )
+
+    parser.add_argument(
+        "--evidence-backend",
+        default="bm25",
+        choices=EVIDENCE_BACKENDS,
+        help="How evidence passages are ranked (default: bm25)"
+    )
+
     parser.add_argument(
         "--json",
         action="store_true",
         help="Output result as JSON"
     )
 
+    parser.add_argument(
+        "--store",
+        metavar="DIR",
+        help="Add the finished paper to the artifact store in DIR (see storm/store.py)"
+    )
+
+    parser.add_argument(
+        "--events",
+        action="store_true",
+        help="Write newline-delimited JSON progress events to stdout; the final result "
+             "event points to the output files instead of inlining the paper"
+    )
+
     parser.add_argument(
         "--version", "-v",
         action="version",
@@ -225,7 +1284,14 @@ def main():
 
     args = parser.parse_args()
 
-    print(f"""
+    if not args.topic and not args.repolish and not args.resume:
+        parser.error("--topic is required")
+
+    events = EventWriter() if args.events else None
+    if events is not None:
+        logging.getLogger().addHandler(events.log_handler())
+    else:
+        print(f"""
 ╔══════════════════════════════════════════════════════════════════╗
 ║         Research Paper Agent (RPA) v{VERSION}                      ║
 ║         Copyright (c) 2025 Aditya Patange                        ║
@@ -233,18 +1299,92 @@ def main():
 ╚══════════════════════════════════════════════════════════════════╝
     """)
 
+    def print_progress(event):
+        """Echo streamed chunks to stdout as they arrive."""
+        if event["event"] == "phase_start":
+            print(f"\n--- {event['phase']} ---\n", flush=True)
+        elif event["event"] == "chunk":
+            print(event["text"], end="", flush=True)
+
+    def emit_progress(event):
+        """Forward progress events; the result is emitted once generation returns."""
+        if event["event"] != "result":
+            events.emit(event)
+
+    if events is not None:
+        on_event = emit_progress
+    elif args.stream and not args.json:
+        on_event = print_progress
+    else:
+        on_event = None
+
+    models = phase_models(args.cascade, args.outline_model, args.draft_model, args.polish_model)
+
+    cache = ResponseCache(args.cache_dir, max_mb=args.cache_max_mb) if args.cache_dir else None
+    evidence = EvidenceIndex(args.evidence, backend=args.evidence_backend) if args.evidence else None
+    quota = None
+    if args.quota or args.rpm or args.tpm:
+        quota = get_governor()
+        quota.configure(rpm=args.rpm, tpm=args.tpm)
+
     try:
+        if args.repolish:
+            result = polish_paper(
+                args.repolish,
+                topic=args.topic,
+                stream=args.stream,
+                concurrency=args.concurrency,
+                cache=cache,
+                model=models.get("polish"),
+                on_event=on_event
+            )
+            if args.store:
+                result["stored_as"] = ArtifactStore(args.store).ingest(result["output_dir"])["run"]
+            if events is not None:
+                events.emit(result_event(result))
+            elif args.json:
+                print(json.dumps(result, indent=2))
+            else:
+                print(f"\nPolished {result['sections'] - result['skipped']} changed sections "
+                      f"({result['skipped']} unchanged): {result['article_path']}")
+            return
+
         result = generate_research_paper(
             topic=args.topic,
             output_dir=args.output,
-            target_pages=args.pages
+            target_pages=args.pages,
+            stream=args.stream,
+            parallel_sections=args.parallel_sections,
+            concurrency=args.concurrency,
+            polish_mode=args.polish_mode,
+            cache=cache,
+            resume_dir=args.resume,
+            trace_path=args.trace,
+            quota=quota,
+            hedge_percentile=args.hedge_percentile,
+            models=models or None,
+            on_event=on_event,
+            on_span=span_listener(events.emit) if events is not None else None,
+            evidence=evidence,
+            evidence_k=args.evidence_k,
+            deadline=args.deadline,
+            degrade=args.degrade
         )
 
-        if args.json:
+        if args.store:
+            result["stored_as"] = ArtifactStore(args.store).ingest(result["output_dir"])["run"]
+
+        if events is not None:
+            events.emit(result_event(result))
+        elif args.json:
             print(json.dumps(result, indent=2))
+        elif args.stream:
+            print(f"\n\n{'='*60}")
+            print(f"Output saved to: {result['output_dir']}")
+            print(f"{'='*60}\n")
         else:
             print(f"\n{'='*60}")
-            print(f"RESEARCH PAPER: {args.topic}")
+            print(f"RESEARCH PAPER: {result['topic']}")
             print(f"{'='*60}\n")
             print(result.get("article", "No article generated"))
             print(f"\n{'='*60}")
@@ -255,7 +1395,9 @@ def main():
         logger.error(f"Failed to generate research paper: {e}")
         import traceback
         traceback.print_exc()
-        if args.json:
+        if events is not None:
+            events.emit({"event": "error", "error": str(e), "type": type(e).__name__})
+        elif args.json:
             print(json.dumps({"success": False, "error": str(e)}))
         sys.exit(1)
 
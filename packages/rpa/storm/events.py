@@ -0,0 +1,126 @@
+"""
+Research Paper Agent (RPA) - Progress Events
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+Newline-delimited JSON progress events for ``--events`` mode. Each line is
+one object with an ``event`` type and a ``ts`` timestamp:
+
+    {"event": "start", "topic": "...", "output_dir": "..."}
+    {"event": "phase_start", "phase": "outline"}
+    {"event": "search", "phase": "research", "engine": "duckduckgo", "query": "...", "results": 10}
+    {"event": "llm_call", "phase": "paper", "model": "...", "input_tokens": 812, "output_tokens": 2048}
+    {"event": "chunk", "phase": "paper", "text": "..."}
+    {"event": "phase_end", "phase": "paper", "seconds": 41.2}
+    {"event": "log", "level": "WARNING", "message": "..."}
+    {"event": "error", "error": "..."}
+    {"event": "result", "result": {"article_path": "...", ...}}
+
+The ``result`` event points to the artifacts on disk instead of inlining
+the article, so a consumer can parse the stream line by line in constant
+memory whatever the size of the paper.
+"""
+
+import sys
+import json
+import time
+import logging
+import threading
+from typing import Optional
+
+
+# Result keys holding whole documents; --events results carry paths instead
+INLINE_KEYS = ("article", "outline")
+
+
+def span_event(span: dict) -> Optional[dict]:
+    """
+    Progress event for a finished telemetry span, or None for span kinds
+    the generators report themselves (phases).
+    """
+    attrs = span["attrs"]
+    if span["kind"] == "llm":
+        event = {
+            "event": "llm_call",
+            "phase": span["phase"],
+            "model": attrs.get("model"),
+            "input_tokens": attrs.get("input_tokens", 0),
+            "output_tokens": attrs.get("output_tokens", 0),
+            "cost_usd": attrs.get("cost_usd"),
+            "cache_hit": bool(attrs.get("cache_hit")),
+            "seconds": round(span["duration"], 3),
+        }
+    elif span["kind"] == "search":
+        event = {
+            "event": "search",
+            "phase": span["phase"],
+            "engine": attrs.get("engine"),
+            "query": span["name"],
+            "results": attrs.get("results", 0),
+            "cache_hit": bool(attrs.get("cache_hit")),
+            "seconds": round(span["duration"], 3),
+        }
+    else:
+        return None
+    if "error" in span:
+        event["error"] = span["error"]
+    return event
+
+
+def span_listener(on_event):
+    """A :class:`Tracer` ``on_span`` callback passing span events to ``on_event``."""
+    def on_span(span: dict):
+        event = span_event(span)
+        if event is not None:
+            on_event(event)
+
+    return on_span
+
+
+def result_event(result: dict) -> dict:
+    """The final ``result`` event, with inlined documents dropped."""
+    return {
+        "event": "result",
+        "result": {key: value for key, value in result.items() if key not in INLINE_KEYS},
+    }
+
+
+class EventWriter:
+    """
+    Writes events to ``stream`` (stdout by default) as NDJSON.
+
+    Safe to call from several threads; every line is flushed immediately so
+    the consumer sees progress as it happens.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, event: dict):
+        line = json.dumps({**event, "ts": round(time.time(), 3)}, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    __call__ = emit
+
+    def log_handler(self, level: int = logging.WARNING) -> logging.Handler:
+        """A logging handler forwarding records at ``level`` and above as ``log`` events."""
+        return _EventLogHandler(self, level)
+
+
+class _EventLogHandler(logging.Handler):
+    def __init__(self, writer: EventWriter, level: int):
+        super().__init__(level)
+        self.writer = writer
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.writer.emit({
+                "event": "log",
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+            })
+        except Exception:
+            self.handleError(record)
@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+Research Paper Agent (RPA) - Evidence Index
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+A local index of research passages, so each section of a paper is drafted
+from the handful of passages relevant to it rather than from all of the
+research or none of it. Prompt sizes then stay bounded however much
+research has been gathered on a topic.
+
+Documents (the sources STORM collected for a run, or any text or markdown
+file) are split into passages of at most ``PASSAGE_WORDS`` words and stored
+per topic under the index directory::
+
+    evidence/
+    └── sonic-symbols-in-yoga/
+        ├── manifest.json      # topic, passages per source, embedding model
+        ├── passages.jsonl     # one passage per line: id, url, title, text
+        └── embeddings.npy     # with the embedding backend only
+
+Passages are ranked with BM25 (pure Python), or with the ``embedding``
+backend by cosine similarity of sentence-transformers embeddings, computed
+once per passage, cached next to the passages and searched as one NumPy
+matrix product. Both need nothing beyond what knowledge-storm installs.
+
+Searches may also draw on related topics: other topics in the index whose
+names share enough words with the one being written about.
+
+    python3 storm/evidence.py --index ./evidence add-run output/Sonic_Symbols_20250101_120000
+    python3 storm/evidence.py --index ./evidence add notes.md --topic "Sonic Symbols"
+    python3 storm/evidence.py --index ./evidence search "Sonic Symbols" "mantra and breath" -k 5
+    python3 storm/evidence.py --index ./evidence topics
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import hashlib
+import argparse
+import itertools
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+try:
+    from .retrieval import normalize_url
+    from .store import normalize_topic
+except ImportError:  # Executed as a script
+    from retrieval import normalize_url
+    from store import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+
+VERSION = "1.0.0"
+AUTHOR = "Aditya Patange"
+
+BACKENDS = ("bm25", "embedding")
+# Same encoder STORM uses to rank its own collected snippets
+EMBEDDING_MODEL = "paraphrase-MiniLM-L6-v2"
+
+PASSAGE_WORDS = 150
+DEFAULT_K = 5
+# Word-set Jaccard similarity at which another topic counts as related
+RELATED_SIMILARITY = 0.34
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or that the their this
+to was were which with
+""".split())
+
+_WORD_RE = re.compile(r"\w+")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def tokenize(text: str) -> list:
+    """Lowercase terms of ``text`` for BM25, without stopwords."""
+    return [word for word in _WORD_RE.findall(text.lower()) if word not in STOPWORDS]
+
+
+def topic_key(topic: str) -> str:
+    """Directory name of a topic's passages."""
+    return re.sub(r"[^a-z0-9]+", "-", normalize_topic(topic)).strip("-")[:80] or "topic"
+
+
+def chunk_text(text: str, max_words: int = PASSAGE_WORDS) -> list:
+    """
+    Split ``text`` into passages of at most ``max_words`` words, breaking at
+    paragraph and then sentence boundaries where possible.
+    """
+    passages = []
+    current = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        sentences = _SENTENCE_END_RE.split(" ".join(paragraph.split()))
+        for sentence in sentences:
+            words = sentence.split()
+            while len(words) > max_words:
+                # A single overlong sentence: cut it at the word limit
+                if current:
+                    passages.append(" ".join(current))
+                    current = []
+                passages.append(" ".join(words[:max_words]))
+                words = words[max_words:]
+            if current and len(current) + len(words) > max_words:
+                passages.append(" ".join(current))
+                current = []
+            current.extend(words)
+        if current and len(current) >= max_words // 2:
+            passages.append(" ".join(current))
+            current = []
+    if current:
+        passages.append(" ".join(current))
+    return [passage for passage in passages if passage.strip()]
+
+
+def run_documents(run_dir: str) -> list:
+    """
+    The source documents STORM collected for a run, as ``{url, title, text}``.
+
+    Read from ``url_to_info.json`` (the sources behind the article), or from
+    ``raw_search_results.json`` when the run stopped before the article.
+    """
+    run_dir = Path(run_dir)
+    documents = {}
+    for name in ("url_to_info.json", "raw_search_results.json"):
+        for path in sorted(run_dir.glob(f"*/{name}")) + sorted(run_dir.glob(name)):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping {path}: {e}")
+                continue
+            if isinstance(data, dict):
+                data = data.get("url_to_info", data)
+                data = list(data.values()) if isinstance(data, dict) else data
+            for info in data if isinstance(data, list) else []:
+                if not isinstance(info, dict) or not info.get("url"):
+                    continue
+                document = documents.setdefault(normalize_url(info["url"]), {
+                    "url": info["url"],
+                    "title": info.get("title") or "",
+                    "snippets": [],
+                })
+                for snippet in info.get("snippets") or [info.get("description") or ""]:
+                    if snippet and snippet not in document["snippets"]:
+                        document["snippets"].append(snippet)
+        if documents:
+            break
+    return [
+        {"url": document["url"], "title": document["title"], "text": "\n\n".join(document["snippets"])}
+        for document in documents.values()
+    ]
+
+
+class BM25:
+    """Okapi BM25 over a list of token lists, with an inverted index."""
+
+    def __init__(self, documents: list, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.lengths = [len(tokens) for tokens in documents]
+        self.average_length = sum(self.lengths) / len(documents) if documents else 0
+        self.postings = {}
+        for index, tokens in enumerate(documents):
+            for term, count in Counter(tokens).items():
+                self.postings.setdefault(term, []).append((index, count))
+        total = len(documents)
+        self.idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def search(self, query: list, k: int) -> list:
+        """``(score, index)`` of the ``k`` best documents for the query tokens."""
+        scores = {}
+        for term in set(query):
+            for index, count in self.postings.get(term, ()):
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / self.average_length)
+                scores[index] = scores.get(index, 0.0) + \
+                    self.idf[term] * count * (self.k1 + 1) / (count + norm)
+        return sorted(((score, index) for index, score in scores.items()), reverse=True)[:k]
+
+
+class _Embedder:
+    """Lazily loaded sentence-transformers encoder, shared by every index in the process."""
+
+    _models = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def encode(cls, texts: list, model: str = EMBEDDING_MODEL):
+        """Unit-length embeddings of ``texts`` as a float32 NumPy matrix."""
+        import numpy as np
+
+        with cls._lock:
+            if model not in cls._models:
+                from sentence_transformers import SentenceTransformer
+
+                logger.info(f"Loading embedding model {model}")
+                cls._models[model] = SentenceTransformer(model, device="cpu")
+            encoder = cls._models[model]
+        vectors = np.asarray(encoder.encode(texts, batch_size=64, show_progress_bar=False), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Hold an exclusive lock on ``path`` across processes (in-process only without fcntl)."""
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        yield
+        return
+
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _replace(path: Path, write):
+    """Write ``path`` through a temporary file, so readers never see it half-written."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+class TopicEvidence:
+    """The passages stored for one topic."""
+
+    def __init__(self, path: Path, topic: Optional[str] = None):
+        self.path = path
+        manifest_path = path / "manifest.json"
+        self.manifest = {"topic": topic, "passages": 0, "sources": {}, "embedding_model": None}
+        if manifest_path.exists():
+            self.manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        self.topic = self.manifest["topic"] or topic
+        self.passages = []
+        passages_path = path / "passages.jsonl"
+        if passages_path.exists():
+            # Only what the manifest counts: lines past it may still be being
+            # written by another process
+            with open(passages_path, encoding="utf-8") as f:
+                lines = itertools.islice((line for line in f if line.strip()), self.manifest.get("passages"))
+                self.passages = [json.loads(line) for line in lines]
+        self._ids = {passage["id"] for passage in self.passages}
+
+    def add(self, documents: list, source: str) -> int:
+        """Chunk and append ``documents``; returns how many new passages were stored."""
+        path = self.path / "passages.jsonl"
+        self.path.mkdir(parents=True, exist_ok=True)
+        added = 0
+        with open(path, "a", encoding="utf-8") as f:
+            for document in documents:
+                for text in chunk_text(document["text"]):
+                    passage_id = hashlib.sha256(
+                        f"{normalize_url(document.get('url') or '')}\n{text}".encode("utf-8")
+                    ).hexdigest()[:16]
+                    if passage_id in self._ids:
+                        continue
+                    passage = {
+                        "id": passage_id,
+                        "url": document.get("url") or "",
+                        "title": document.get("title") or "",
+                        "text": text,
+                    }
+                    f.write(json.dumps(passage, ensure_ascii=False) + "\n")
+                    self.passages.append(passage)
+                    self._ids.add(passage_id)
+                    added += 1
+        self.manifest["topic"] = self.topic
+        self.manifest["sources"][source] = self.manifest["sources"].get(source, 0) + added
+        self.manifest["passages"] = len(self.passages)
+        self._save_manifest()
+        return added
+
+    def _save_manifest(self):
+        data = json.dumps(self.manifest, indent=2).encode("utf-8")
+        _replace(self.path / "manifest.json", lambda f: f.write(data))
+
+    def embeddings(self, model: str = EMBEDDING_MODEL):
+        """Passage embeddings, computing and caching any the file does not have yet."""
+        import numpy as np
+
+        path = self.path / "embeddings.npy"
+        vectors = None
+        if path.exists() and self.manifest.get("embedding_model") == model:
+            vectors = np.load(path)
+        if vectors is None or len(vectors) < len(self.passages):
+            done = 0 if vectors is None else len(vectors)
+            fresh = _Embedder.encode([p["text"] for p in self.passages[done:]], model)
+            vectors = fresh if vectors is None else np.concatenate([vectors, fresh])
+            _replace(path, lambda f: np.save(f, vectors))
+            self.manifest["embedding_model"] = model
+            self._save_manifest()
+        # Another process may have embedded passages added after ours were loaded
+        return vectors[:len(self.passages)]
+
+
+class EvidenceIndex:
+    """
+    Per-topic passage indexes under ``root``, searched by BM25 or by
+    embedding similarity. Several processes may add to one index.
+
+    ``search`` draws on the topic's own passages and, with ``related``, on
+    topics whose names are similar enough. Rankers are built on first use
+    per topic set and reused until one of the topics gains passages.
+    """
+
+    def __init__(self, root: str, backend: str = "bm25", embedding_model: str = EMBEDDING_MODEL):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown evidence backend: {backend} (expected one of {', '.join(BACKENDS)})")
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.backend = backend
+        self.embedding_model = embedding_model
+        self._topics = {}
+        self._related = {}
+        self._rankers = {}
+        self._lock = threading.RLock()
+
+    def topic(self, topic: str) -> TopicEvidence:
+        """
+        The passages of ``topic``, reloaded (and its rankers dropped) when
+        another process has added to it since it was loaded.
+        """
+        key = topic_key(topic)
+        manifest_path = self.root / key / "manifest.json"
+        count = None
+        if manifest_path.exists():
+            count = json.loads(manifest_path.read_text(encoding="utf-8")).get("passages", 0)
+        with self._lock:
+            cached = self._topics.get(key)
+            if cached is None or (count is not None and count != len(cached.passages)):
+                if cached is not None:
+                    self._rankers = {
+                        topics: ranker for topics, ranker in self._rankers.items()
+                        if key not in map(topic_key, topics)
+                    }
+                self._topics[key] = TopicEvidence(self.root / key, topic)
+            return self._topics[key]
+
+    def topics(self) -> list:
+        """Every indexed topic with its passage count."""
+        found = []
+        for path in sorted(self.root.iterdir()):
+            manifest_path = path / "manifest.json"
+            if manifest_path.exists():
+                manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+                found.append({
+                    "topic": manifest["topic"],
+                    "key": path.name,
+                    "passages": manifest.get("passages", 0),
+                })
+        return found
+
+    def related_topics(self, topic: str, min_similarity: float = RELATED_SIMILARITY) -> list:
+        """Indexed topics whose content words overlap ``topic``'s, most similar first."""
+        words = set(tokenize(topic))
+        scored = []
+        for entry in self.topics():
+            other = set(tokenize(entry["topic"] or entry["key"]))
+            if entry["key"] == topic_key(topic) or not words or not other:
+                continue
+            similarity = len(words & other) / len(words | other)
+            if similarity >= min_similarity:
+                scored.append((similarity, entry["topic"]))
+        return [name for _, name in sorted(scored, reverse=True)]
+
+    def add(self, topic: str, documents: list, source: str) -> int:
+        """Index ``documents`` (``{url, title, text}`` dicts) under ``topic``."""
+        with self._lock, _file_lock(self.root / ".lock"):
+            # Another process may have added passages since the topic was loaded
+            self._topics.pop(topic_key(topic), None)
+            added = self.topic(topic).add(documents, source)
+            self._related.clear()
+            self._rankers.clear()
+        logger.info(f"Indexed {added} new passages for {topic!r} from {source}")
+        return added
+
+    def add_run(self, run_dir: str, topic: Optional[str] = None) -> int:
+        """Index the sources a STORM run collected; the topic defaults to the run's."""
+        run_dir = Path(run_dir)
+        if topic is None:
+            metadata = json.loads((run_dir / "metadata.json").read_text(encoding="utf-8"))
+            topic = metadata["topic"]
+        documents = run_documents(run_dir)
+        if not documents:
+            logger.warning(f"No collected sources found in {run_dir}")
+        return self.add(topic, documents, source=str(run_dir))
+
+    def _ranker(self, topics: tuple):
+        with self._lock:
+            for topic in topics:
+                self.topic(topic)
+            if topics not in self._rankers:
+                passages = [p for topic in topics for p in self.topic(topic).passages]
+                if self.backend == "bm25":
+                    ranker = BM25([tokenize(p["title"] + " " + p["text"]) for p in passages])
+                else:
+                    import numpy as np
+
+                    matrices = [self.topic(topic).embeddings(self.embedding_model) for topic in topics]
+                    matrices = [m for m in matrices if len(m)]
+                    ranker = np.concatenate(matrices) if matrices else np.zeros((0, 1), dtype=np.float32)
+                self._rankers[topics] = (passages, ranker)
+            return self._rankers[topics]
+
+    def search(self, topic: str, query: str, k: int = DEFAULT_K, related: bool = True) -> list:
+        """
+        The ``k`` passages most relevant to ``query`` among ``topic``'s (and,
+        with ``related``, related topics'), best first, each with a ``score``.
+        """
+        topics = (topic,)
+        if related:
+            with self._lock:
+                if topic_key(topic) not in self._related:
+                    self._related[topic_key(topic)] = tuple(self.related_topics(topic))
+                topics += self._related[topic_key(topic)]
+        passages, ranker = self._ranker(topics)
+        if not passages:
+            return []
+        if self.backend == "bm25":
+            ranked = ranker.search(tokenize(query), k)
+        else:
+            import numpy as np
+
+            scores = ranker @ _Embedder.encode([query], self.embedding_model)[0]
+            top = np.argsort(-scores)[:k]
+            ranked = [(float(scores[index]), int(index)) for index in top]
+        return [dict(passages[index], score=round(score, 4)) for score, index in ranked]
+
+
+def format_evidence(passages: list) -> str:
+    """Passages as a numbered block for a prompt."""
+    return "\n\n".join(
+        f"[{number}] {passage['title'] or passage['url']} ({passage['url']})\n{passage['text']}"
+        for number, passage in enumerate(passages, start=1)
+    )
+
+
+def main():
+    """CLI entry point for the evidence index."""
+    parser = argparse.ArgumentParser(
+        description="Research Paper Agent (RPA) - Local evidence index for section grounding",
+        epilog="Copyright (c) 2025 Aditya Patange. All rights reserved."
+    )
+
+    parser.add_argument(
+        "--index", "-i",
+        required=True,
+        metavar="DIR",
+        help="Evidence index directory"
+    )
+
+    parser.add_argument(
+        "--backend",
+        default="bm25",
+        choices=BACKENDS,
+        help="Ranking backend for search (default: bm25)"
+    )
+
+    parser.add_argument(
+        "--version", "-v",
+        action="version",
+        version=f"Research Paper Agent v{VERSION} by {AUTHOR}"
+    )
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add_run = commands.add_parser("add-run", help="Index the sources of STORM run directories")
+    add_run.add_argument("runs", nargs="+", metavar="RUN_DIR")
+    add_run.add_argument("--topic", help="Index under this topic instead of each run's own")
+
+    add = commands.add_parser("add", help="Index text or markdown files")
+    add.add_argument("files", nargs="+", metavar="FILE")
+    add.add_argument("--topic", required=True)
+    add.add_argument("--url", help="Source URL to cite for the files (default: the file path)")
+
+    search = commands.add_parser("search", help="Show the passages best matching a query")
+    search.add_argument("topic")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=DEFAULT_K, help=f"Passages to show (default: {DEFAULT_K})")
+    search.add_argument("--no-related", action="store_true", help="Search only the topic's own passages")
+
+    commands.add_parser("topics", help="List indexed topics")
+
+    args = parser.parse_args()
+    index = EvidenceIndex(args.index, backend=args.backend)
+
+    if args.command == "add-run":
+        for run in args.runs:
+            print(json.dumps({"run": run, "added": index.add_run(run, topic=args.topic)}))
+    elif args.command == "add":
+        for name in args.files:
+            path = Path(name)
+            document = {
+                "url": args.url or str(path.resolve()),
+                "title": path.stem.replace("_", " "),
+                "text": path.read_text(encoding="utf-8"),
+            }
+            print(json.dumps({"file": name, "added": index.add(args.topic, [document], source=name)}))
+    elif args.command == "search":
+        passages = index.search(args.topic, args.query, k=args.k, related=not args.no_related)
+        if not passages:
+            print("No passages found", file=sys.stderr)
+        print(format_evidence(passages))
+    else:
+        for entry in index.topics():
+            print(json.dumps(entry))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Research Paper Agent (RPA) - Site Export
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+Export generated papers to the website's papers data. Each paper gets
+the fields of the site's ``Paper`` type (``lib/papers.ts``): slug, title,
+subtitle, abstract, author, date, reading time, keywords and category.
+They are precomputed once and written to a compact ``index.json``, while
+each paper's ``content`` goes to its own shard, so a listing page loads the
+index and a paper page loads one shard.
+
+Exports are incremental: ``export_state.json`` remembers each paper's
+content hash, and papers whose article and metadata are unchanged are not
+reprocessed or rewritten.
+
+    python3 storm/export.py ./output --dest ../../public/papers-data
+    python3 storm/export.py --store ./store --dest ../../public/papers-data
+"""
+
+import os
+import re
+import json
+import math
+import hashlib
+import argparse
+import logging
+import tempfile
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+try:
+    from .store import ARTICLE_CANDIDATES, ArtifactStore
+except ImportError:  # Executed as a script
+    from store import ARTICLE_CANDIDATES, ArtifactStore
+
+logger = logging.getLogger(__name__)
+
+
+VERSION = "1.0.0"
+AUTHOR = "Aditya Patange"
+
+INDEX_FILENAME = "index.json"
+STATE_FILENAME = "export_state.json"
+SHARD_DIR = "papers"
+
+WORDS_PER_MINUTE = 200
+ABSTRACT_MAX_CHARS = 1200
+MAX_KEYWORDS = 10
+
+# Values of the site's Paper["category"], with terms that suggest each one;
+# papers matching none of them are filed under DEFAULT_CATEGORY
+CATEGORY_TERMS = {
+    "tantra": ("tantra", "tantric", "shakti", "bhairav", "kundalini", "mantra", "yantra", "shaiva"),
+    "meditation": ("meditation", "mindfulness", "dhyana", "contemplative", "samadhi", "awareness"),
+    "yoga": ("yoga", "yogic", "asana", "pranayama", "patanjali", "hatha"),
+    "science": ("quantum", "neuroscience", "physics", "neural", "brain", "empirical", "scientific"),
+    "philosophy": ("philosophy", "vedanta", "metaphysics", "ontology", "epistemology", "advaita"),
+    "spirituality": ("spiritual", "devotion", "divine", "sacred", "ritual", "dharma"),
+}
+DEFAULT_CATEGORY = "spirituality"
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before
+being below between both but by can could did do does doing down during each either etc
+few for from further had has have having here how however i if in into is it its itself
+just may more most much must no nor not now of off on once only or other our out over own
+paper per rather same section several should so some such than that the their them then
+there these they this those through thus to too under until up upon use used using very
+via was we were what when where whether which while who whom why will with within without
+would yet
+""".split())
+
+# Level-1 headings that name a section rather than the paper
+SECTION_HEADINGS = frozenset({
+    "abstract", "summary", "outline", "contents", "table of contents", "introduction",
+})
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+KEYWORDS_RE = re.compile(r"^\s*(?:\*\*|__)?keywords?:?(?:\*\*|__)?:?\s*(.+)$", re.IGNORECASE)
+CITATION_RE = re.compile(r"\s*\[[^\]]*\d{4}[^\]]*\]|\s*\[\d+(?:[,-]\s*\d+)*\]")
+
+
+def slugify(text: str) -> str:
+    """Lowercase, ASCII-only, hyphen-separated form of ``text`` for URLs."""
+    text = text.lower().replace("&", " and ")
+    return re.sub(r"[^a-z0-9]+", "-", text).strip("-")[:80].rstrip("-") or "paper"
+
+
+def _plain(text: str) -> str:
+    """Strip inline markdown emphasis, links and citation markers."""
+    text = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text)
+    text = CITATION_RE.sub("", text)
+    text = re.sub(r"(\*\*|__|\*|_|`)", "", text)
+    return " ".join(text.split())
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Cut ``text`` to ``limit`` characters at a sentence boundary where possible."""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    end = max(cut.rfind(". "), cut.rfind("? "), cut.rfind("! "))
+    return cut[:end + 1] if end > limit // 2 else cut.rsplit(" ", 1)[0] + "…"
+
+
+def split_title(heading: str) -> tuple:
+    """``"Title: Subtitle"`` as ``(title, subtitle)``; subtitle is None without a colon."""
+    title, sep, subtitle = _plain(heading).partition(": ")
+    return (title.strip(), subtitle.strip() or None) if sep else (title.strip(), None)
+
+
+def parse_article(content: str, topic: str) -> dict:
+    """
+    Title, subtitle, abstract and any author-supplied keywords of a
+    markdown article.
+
+    The title is the first ``#`` heading (STORM articles have none, so the
+    topic is used). The abstract is the ``Abstract`` section, or else the
+    first paragraph of prose.
+    """
+    title = subtitle = None
+    abstract_lines = []
+    first_paragraph = []
+    lead = ""
+    keywords = None
+    in_abstract = False
+    in_fence = False
+
+    for line in content.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+
+        heading = HEADING_RE.match(line)
+        if heading:
+            level, text = len(heading.group(1)), heading.group(2)
+            if title is None and level == 1 and _plain(text).lower().rstrip(":") not in SECTION_HEADINGS:
+                title, subtitle = split_title(text)
+            in_abstract = _plain(text).lower().rstrip(":") == "abstract"
+            continue
+
+        match = KEYWORDS_RE.match(line)
+        if match and keywords is None:
+            keywords = [k for k in (_plain(k) for k in re.split(r"[;,]", match.group(1))) if k]
+            in_abstract = False
+            continue
+
+        if in_abstract:
+            if stripped in ("---", "***"):
+                in_abstract = False
+            else:
+                abstract_lines.append(stripped)
+        elif not lead:
+            # The first run of prose lines; tables, lists and quotes don't count
+            if stripped and not stripped.startswith(("|", ">", "- ", "* ", "!", "<")):
+                first_paragraph.append(stripped)
+            elif first_paragraph:
+                lead = " ".join(first_paragraph)
+
+    if title is None:
+        title, subtitle = split_title(topic)
+    lead = lead or " ".join(first_paragraph)
+
+    return {
+        "title": title,
+        "subtitle": subtitle,
+        "abstract": _truncate(_plain(" ".join(abstract_lines)) or _plain(lead), ABSTRACT_MAX_CHARS),
+        "keywords": keywords,
+    }
+
+
+def keyword_candidates(content: str, title: str, limit: int = MAX_KEYWORDS) -> list:
+    """
+    Likely keywords of ``content``: its most frequent one- and two-word
+    terms outside stopwords, with terms from the title and headings boosted.
+    """
+    counts = Counter()
+    boosted = set()
+    for line in content.splitlines():
+        heading = HEADING_RE.match(line)
+        words = re.findall(r"[a-zA-Z][a-zA-Z'-]+", _plain(heading.group(2) if heading else line).lower())
+        if heading:
+            boosted.update(words)
+        previous = None
+        for word in words:
+            if word in STOPWORDS or len(word) < 3:
+                previous = None
+                continue
+            counts[word] += 1
+            if previous is not None:
+                counts[f"{previous} {word}"] += 1
+            previous = word
+    boosted.update(re.findall(r"[a-z][a-z'-]+", title.lower()))
+
+    def score(term):
+        words = term.split()
+        count = counts[term]
+        # Two-word terms are rarer but more specific; they need to recur
+        bonus = 2.5 if len(words) > 1 and count >= 3 else 1.0
+        if any(word in boosted for word in words):
+            bonus *= 1.5
+        return count * bonus
+
+    chosen = []
+    for term in sorted(counts, key=lambda t: (-score(t), t)):
+        if len(chosen) >= limit:
+            break
+        # Skip a term already covered by a chosen phrase, and vice versa
+        if any(term in c.split() or c in term.split() for c in chosen):
+            continue
+        chosen.append(term)
+    return chosen
+
+
+def guess_category(title: str, abstract: str, keywords: list) -> str:
+    """The site category whose terms best match the title, abstract and keywords."""
+    text = " ".join([title, title, abstract, " ".join(keywords)]).lower()
+    scores = {
+        category: sum(text.count(term) for term in terms)
+        for category, terms in CATEGORY_TERMS.items()
+    }
+    best = max(scores, key=lambda category: scores[category])
+    return best if scores[best] else DEFAULT_CATEGORY
+
+
+def build_paper(content: str, metadata: dict, category: Optional[str] = None) -> dict:
+    """The site's ``Paper`` fields (without ``content``) for one article."""
+    topic = metadata.get("topic") or ""
+    parsed = parse_article(content, topic)
+    words = len(content.split())
+    keywords = parsed["keywords"] or keyword_candidates(content, parsed["title"])
+
+    timestamp = metadata.get("timestamp")
+    try:
+        date = datetime.strptime(timestamp, "%Y%m%d_%H%M%S").strftime("%Y-%m-%d")
+    except (TypeError, ValueError):
+        date = datetime.now().strftime("%Y-%m-%d")
+
+    paper = {
+        "id": slugify(topic or parsed["title"]),
+        "slug": slugify(parsed["title"]),
+        "title": parsed["title"],
+        "abstract": parsed["abstract"],
+        "author": metadata.get("author") or AUTHOR,
+        "date": date,
+        "readingTime": f"{max(1, math.ceil(words / WORDS_PER_MINUTE))} min",
+        "keywords": keywords,
+        "category": category or guess_category(parsed["title"], parsed["abstract"], keywords),
+        "words": words,
+    }
+    if parsed["subtitle"]:
+        paper["subtitle"] = parsed["subtitle"]
+    return paper
+
+
+def _write_json(path: Path, data):
+    """Write compact JSON atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def find_runs(paths: list) -> list:
+    """Run directories among ``paths``, which may also be parents of run directories."""
+    runs = []
+    for path in map(Path, paths):
+        if (path / "metadata.json").exists():
+            runs.append(path)
+        elif path.is_dir():
+            runs.extend(sorted(p for p in path.iterdir() if (p / "metadata.json").exists()))
+        else:
+            logger.warning(f"Skipping {path}: not a run directory")
+    return runs
+
+
+def _run_source(run_dir: Path):
+    """``(source, metadata, content)`` of a run directory, or None without an article."""
+    article = next(
+        (p for pattern in ARTICLE_CANDIDATES for p in sorted(run_dir.glob(pattern))), None
+    )
+    if article is None:
+        logger.warning(f"Skipping {run_dir}: no article found")
+        return None
+    metadata = json.loads((run_dir / "metadata.json").read_text(encoding="utf-8"))
+    return str(run_dir), metadata, article.read_text(encoding="utf-8")
+
+
+def _store_sources(store: ArtifactStore):
+    """The latest stored paper on each topic, as ``(source, metadata, content)``."""
+    seen = set()
+    for paper in store.list():
+        key = paper["topic"].lower()
+        if key in seen or paper["article"] is None:
+            continue
+        seen.add(key)
+        yield f"store:{paper['run']}", store.metadata(paper["run"]), store.get(paper["run"])
+
+
+class Exporter:
+    """Incrementally maintains ``index.json`` and per-paper shards in ``dest``."""
+
+    def __init__(self, dest: str):
+        self.dest = Path(dest)
+        state_path = self.dest / STATE_FILENAME
+        self.state = {"papers": {}}
+        if state_path.exists():
+            self.state = json.loads(state_path.read_text(encoding="utf-8"))
+        self.index = {}
+        index_path = self.dest / INDEX_FILENAME
+        if index_path.exists():
+            self.index = {
+                paper["id"]: paper
+                for paper in json.loads(index_path.read_text(encoding="utf-8"))["papers"]
+            }
+
+    def _unique_slug(self, slug: str, paper_id: str) -> str:
+        taken = {p["slug"] for other, p in self.index.items() if other != paper_id}
+        candidate, n = slug, 2
+        while candidate in taken:
+            candidate, n = f"{slug}-{n}", n + 1
+        return candidate
+
+    def export(self, sources, category: Optional[str] = None, prune: bool = False) -> dict:
+        """
+        Export ``(source, metadata, content)`` triples; returns counts of
+        papers ``added``, ``updated``, ``unchanged`` and ``removed``.
+
+        When several sources share a paper id (the same topic), the newest
+        one wins. With ``prune`` papers not among ``sources`` are dropped.
+        """
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        seen = set()
+        newest = {}
+        for source, metadata, content in sources:
+            paper_id = slugify(metadata.get("topic") or source)
+            previous = newest.get(paper_id)
+            if previous is not None and (previous[1].get("timestamp") or "") >= (metadata.get("timestamp") or ""):
+                continue
+            newest[paper_id] = (source, metadata, content)
+
+        for paper_id, (source, metadata, content) in newest.items():
+            seen.add(paper_id)
+            digest = hashlib.sha256(
+                (content + json.dumps([metadata.get("topic"), metadata.get("timestamp"), category])).encode("utf-8")
+            ).hexdigest()
+            known = self.state["papers"].get(paper_id)
+            if known is not None and known["hash"] == digest and paper_id in self.index \
+                    and (self.dest / self.index[paper_id]["shard"]).exists():
+                counts["unchanged"] += 1
+                continue
+
+            paper = build_paper(content, metadata, category=category)
+            paper["id"] = paper_id
+            paper["slug"] = self._unique_slug(
+                known["slug"] if known is not None else paper["slug"], paper_id
+            )
+            paper["contentHash"] = digest[:16]
+            paper["shard"] = f"{SHARD_DIR}/{paper['slug']}.{paper['contentHash']}.json"
+            _write_json(self.dest / paper["shard"], {"id": paper_id, "slug": paper["slug"], "content": content})
+
+            if paper_id in self.index:
+                self._remove_shard(self.index[paper_id], keep=paper["shard"])
+                counts["updated"] += 1
+            else:
+                counts["added"] += 1
+            self.index[paper_id] = paper
+            self.state["papers"][paper_id] = {"hash": digest, "slug": paper["slug"], "source": source}
+            logger.info(f"Exported {paper['slug']} ({paper['words']} words) from {source}")
+
+        if prune:
+            for paper_id in [p for p in self.index if p not in seen]:
+                self._remove_shard(self.index.pop(paper_id))
+                self.state["papers"].pop(paper_id, None)
+                counts["removed"] += 1
+
+        if counts["added"] or counts["updated"] or counts["removed"] or \
+                not (self.dest / INDEX_FILENAME).exists():
+            papers = sorted(self.index.values(), key=lambda p: (p["date"], p["id"]), reverse=True)
+            _write_json(self.dest / INDEX_FILENAME, {"version": VERSION, "papers": papers})
+            _write_json(self.dest / STATE_FILENAME, self.state)
+        return counts
+
+    def _remove_shard(self, paper: dict, keep: Optional[str] = None):
+        if paper.get("shard") and paper["shard"] != keep:
+            try:
+                (self.dest / paper["shard"]).unlink()
+            except FileNotFoundError:
+                pass
+
+
+def main():
+    """CLI entry point for the site exporter."""
+    parser = argparse.ArgumentParser(
+        description="Research Paper Agent (RPA) - Export papers to the website's papers data",
+        epilog="Copyright (c) 2025 Aditya Patange. All rights reserved."
+    )
+
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        metavar="DIR",
+        help="Run directories, or directories containing them (e.g. ./output)"
+    )
+
+    parser.add_argument(
+        "--store",
+        metavar="DIR",
+        help="Also export the latest paper on each topic in this artifact store"
+    )
+
+    parser.add_argument(
+        "--dest", "-d",
+        required=True,
+        help="Directory for index.json and the paper shards"
+    )
+
+    parser.add_argument(
+        "--category",
+        choices=sorted(CATEGORY_TERMS),
+        help="Category for every exported paper (default: guessed per paper)"
+    )
+
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Remove exported papers that are not among the sources"
+    )
+
+    parser.add_argument(
+        "--version", "-v",
+        action="version",
+        version=f"Research Paper Agent v{VERSION} by {AUTHOR}"
+    )
+
+    args = parser.parse_args()
+    if not args.paths and not args.store:
+        parser.error("give run directories and/or --store")
+
+    def sources():
+        for run_dir in find_runs(args.paths):
+            source = _run_source(run_dir)
+            if source is not None:
+                yield source
+        if args.store:
+            yield from _store_sources(ArtifactStore(args.store))
+
+    counts = Exporter(args.dest).export(sources(), category=args.category, prune=args.prune)
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,390 @@
+"""
+Research Paper Agent (RPA) - Hedged LLM Requests
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+Tail-latency hedging for short, idempotent model calls (outlines, section
+drafts and polishes, STORM's conversation turns). If a call has not
+produced its first token by a percentile of recent first-token latency, a
+duplicate is fired; the first to finish wins and the other is cancelled.
+Streaming callers commit to whichever attempt produces a token first.
+"""
+
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from typing import Optional
+
+try:
+    from .telemetry import annotate, carry_span, percentile
+except ImportError:  # Executed as a script
+    from telemetry import annotate, carry_span, percentile
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PERCENTILE = 95.0
+
+# Calls allowed to produce more than this many tokens are not hedged: they
+# are the long, expensive ones where a duplicate costs the most
+HEDGE_MAX_TOKENS = 4096
+
+# First-token latencies needed before the percentile is trusted, and the
+# delay used until then
+MIN_SAMPLES = 8
+DEFAULT_FIRST_TOKEN_TIMEOUT = 10.0
+
+
+class LatencyTracker:
+    """Rolling window of recent first-token latencies for one model."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """The ``pct`` percentile, or None until there are enough samples."""
+        with self._lock:
+            samples = list(self._samples)
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return percentile(samples, pct)
+
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def get_tracker(key: str) -> LatencyTracker:
+    """The process-wide tracker for ``key``, so warm-up carries across papers."""
+    with _trackers_lock:
+        if key not in _trackers:
+            _trackers[key] = LatencyTracker()
+        return _trackers[key]
+
+
+_END = object()
+
+
+class _Attempt:
+    """One copy of a hedged call, running on its own daemon thread."""
+
+    def __init__(self, index: int, fn, cond: threading.Condition):
+        self.index = index
+        self.cancelled = threading.Event()
+        self.chunks = queue.Queue()
+        self.started = time.monotonic()
+        self.first_token_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self._cond = cond
+        # Daemon threads, so a cancelled attempt still waiting on its first
+        # byte never holds up interpreter exit
+        threading.Thread(
+            target=self._run, args=(fn,), daemon=True, name=f"hedge-{index}"
+        ).start()
+
+    def first_token(self):
+        """Called by the attempt when its first token arrives."""
+        with self._cond:
+            if self.first_token_at is None:
+                self.first_token_at = time.monotonic()
+                self._cond.notify_all()
+
+    def _run(self, fn):
+        try:
+            self.result = fn(self)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.chunks.put(_END)
+            with self._cond:
+                self.finished_at = time.monotonic()
+                if self.first_token_at is None and self.error is None:
+                    # Non-streaming attempts: the whole response is the first token
+                    self.first_token_at = self.finished_at
+                self._cond.notify_all()
+
+
+class Hedger:
+    """
+    Fires a duplicate of a slow call and keeps whichever copy wins.
+
+    The hedge delay is the ``percentile`` of recent first-token latency for
+    the call's model (``first_token_timeout`` until enough calls have been
+    seen). Only calls with ``max_tokens`` up to ``max_tokens`` are hedged.
+    """
+
+    def __init__(
+        self,
+        percentile: float = DEFAULT_PERCENTILE,
+        max_tokens: int = HEDGE_MAX_TOKENS,
+        first_token_timeout: float = DEFAULT_FIRST_TOKEN_TIMEOUT
+    ):
+        self.percentile = percentile
+        self.max_tokens = max_tokens
+        self.first_token_timeout = first_token_timeout
+        self._calls = []
+        self._lock = threading.Lock()
+
+    def hedgeable(self, max_tokens: Optional[int]) -> bool:
+        return max_tokens is not None and max_tokens <= self.max_tokens
+
+    def delay(self, key: str) -> float:
+        threshold = get_tracker(key).percentile(self.percentile)
+        return threshold if threshold is not None else self.first_token_timeout
+
+    def run(self, key: str, fn, until: str = "finish") -> _Attempt:
+        """
+        Run ``fn(attempt)`` and hedge it if it is slow.
+
+        ``fn`` should call ``attempt.first_token()`` when output starts and
+        give up once ``attempt.cancelled`` is set. With ``until="finish"``
+        the first attempt to complete wins; with ``"first_token"`` the first
+        to produce a token does. Returns the winning attempt; losers are
+        cancelled.
+        """
+        cond = threading.Condition()
+        fn = carry_span(fn)
+        delay = self.delay(key)
+
+        with cond:
+            attempts = [_Attempt(0, fn, cond)]
+            deadline = attempts[0].started + delay
+            while True:
+                winner = self._winner(attempts, until)
+                if winner is not None:
+                    break
+                if all(attempt.finished_at is not None for attempt in attempts):
+                    # Every attempt failed; a hedge is not a retry
+                    for attempt in attempts:
+                        attempt.cancelled.set()
+                    self._record(attempts, None, time.monotonic(), until)
+                    raise attempts[0].error
+
+                now = time.monotonic()
+                waiting = len(attempts) == 1 and attempts[0].first_token_at is None
+                if waiting and now >= deadline:
+                    logger.info(f"No first token from {key} after {delay:.2f}s, hedging")
+                    attempts.append(_Attempt(1, fn, cond))
+                    continue
+                cond.wait(deadline - now if waiting else None)
+
+        for attempt in attempts:
+            if attempt is not winner:
+                attempt.cancelled.set()
+            if attempt.first_token_at is not None:
+                get_tracker(key).record(attempt.first_token_at - attempt.started)
+
+        self._record(attempts, winner, time.monotonic(), until)
+        annotate(hedged=len(attempts) > 1, hedge_winner=winner.index)
+        return winner
+
+    @staticmethod
+    def _winner(attempts: list, until: str) -> Optional[_Attempt]:
+        if until == "first_token":
+            ready = [a for a in attempts if a.first_token_at is not None and a.error is None]
+            return min(ready, key=lambda a: a.first_token_at) if ready else None
+        done = [a for a in attempts if a.finished_at is not None and a.error is None]
+        return min(done, key=lambda a: a.finished_at) if done else None
+
+    def _record(self, attempts: list, winner: Optional[_Attempt], now: float, until: str = "finish"):
+        # Attempts are kept so a cancelled primary's first token, which
+        # arrives after the decision, can still inform the estimate
+        with self._lock:
+            self._calls.append({
+                "attempts": attempts,
+                "winner": winner,
+                "until": until,
+                "latency": now - attempts[0].started,
+            })
+
+    @staticmethod
+    def _primary_latency(call: dict) -> float:
+        """
+        How long the call would have taken without hedging.
+
+        A cancelled primary stops at its first token, so its full latency
+        is estimated as its own first-token time plus the winner's time
+        from first token to finish. A primary that never produced a token
+        counts as finishing when it was cancelled (a lower bound).
+        """
+        primary, winner = call["attempts"][0], call["winner"]
+        if winner is None or winner is primary:
+            return call["latency"]
+        if primary.first_token_at is None:
+            return call["latency"]
+        if call["until"] == "first_token" or primary.finished_at is not None and primary.result is not None:
+            end = primary.first_token_at if call["until"] == "first_token" else primary.finished_at
+            return end - primary.started
+        generation = (winner.finished_at or winner.first_token_at) - winner.first_token_at
+        return primary.first_token_at - primary.started + generation
+
+    def count(self) -> int:
+        """Calls recorded so far; pass to :meth:`stats` to report a window."""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self, since: int = 0) -> dict:
+        """
+        Hedge rate and latency saved for the calls recorded after ``since``.
+
+        ``primary_p99`` is the estimated p99 without hedging (see
+        :meth:`_primary_latency`) and ``p99_saved`` its difference from the
+        observed p99. Latency is to the first token for streaming calls and
+        to completion otherwise.
+        """
+        with self._lock:
+            calls = self._calls[since:]
+
+        report = {
+            "percentile": self.percentile,
+            "calls": len(calls),
+            "hedged": sum(len(c["attempts"]) > 1 for c in calls),
+            "backup_wins": sum(c["winner"] is not None and c["winner"].index > 0 for c in calls),
+            "errors": sum(c["winner"] is None for c in calls),
+        }
+        report["hedge_rate"] = round(report["hedged"] / len(calls), 3) if calls else 0.0
+        if calls:
+            latencies = [c["latency"] for c in calls]
+            primary = [self._primary_latency(c) for c in calls]
+            report["latency_p50"] = round(percentile(latencies, 50), 3)
+            report["latency_p99"] = round(percentile(latencies, 99), 3)
+            report["primary_p99"] = round(percentile(primary, 99), 3)
+            report["p99_saved"] = round(report["primary_p99"] - report["latency_p99"], 3)
+        return report
+
+    def wrap_anthropic(self, client) -> "HedgedAnthropicClient":
+        return HedgedAnthropicClient(client, self)
+
+
+class HedgedAnthropicClient:
+    """
+    Wrapper over an Anthropic client that hedges ``messages`` calls whose
+    ``max_tokens`` is small enough. Both copies are streamed internally so
+    the first token can be observed and the loser's connection closed.
+    """
+
+    def __init__(self, client, hedger: Hedger):
+        self._client = client
+        self.hedger = hedger
+        self.messages = _HedgedMessages(client.messages, hedger)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class _HedgedMessages:
+    def __init__(self, messages, hedger: Hedger):
+        self._messages = messages
+        self._hedger = hedger
+
+    def _attempt(self, kwargs: dict, forward_chunks: bool):
+        def run(attempt):
+            with self._messages.stream(**kwargs) as stream:
+                for text in stream.text_stream:
+                    # A cancelled copy still records its first token, which
+                    # tells us how long the call would have taken
+                    attempt.first_token()
+                    if attempt.cancelled.is_set():
+                        return None
+                    if forward_chunks:
+                        attempt.chunks.put(text)
+                return stream.get_final_message()
+        return run
+
+    def create(self, **kwargs):
+        if not self._hedger.hedgeable(kwargs.get("max_tokens")):
+            return self._messages.create(**kwargs)
+        winner = self._hedger.run(kwargs.get("model"), self._attempt(kwargs, False), until="finish")
+        return winner.result
+
+    def stream(self, **kwargs):
+        if not self._hedger.hedgeable(kwargs.get("max_tokens")):
+            return self._messages.stream(**kwargs)
+        return _HedgedStream(self, kwargs)
+
+
+class _HedgedStream:
+    """
+    ``messages.stream`` context manager that commits to whichever attempt
+    produces a token first and replays that attempt's chunks.
+    """
+
+    def __init__(self, messages: _HedgedMessages, kwargs: dict):
+        self._messages = messages
+        self._kwargs = kwargs
+        self._winner = None
+        self._drained = False
+
+    def __enter__(self):
+        self._winner = self._messages._hedger.run(
+            self._kwargs.get("model"),
+            self._messages._attempt(self._kwargs, True),
+            until="first_token"
+        )
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Stop the winner too if the caller bailed out early
+        if self._winner.finished_at is None:
+            self._winner.cancelled.set()
+        return False
+
+    @property
+    def text_stream(self):
+        while True:
+            chunk = self._winner.chunks.get()
+            if chunk is _END:
+                self._drained = True
+                break
+            yield chunk
+        if self._winner.error is not None:
+            raise self._winner.error
+
+    def get_final_message(self):
+        # The attempt's thread sets its result just before queueing _END
+        if not self._drained:
+            for _ in self.text_stream:
+                pass
+        return self._winner.result
+
+
+_hedged_litellm_classes = {}
+
+
+def hedged_litellm_class(base):
+    """
+    Subclass of the LitellmModel class ``base`` that hedges each call with
+    its ``hedger`` (when set). LiteLLM calls cannot be interrupted, so a
+    losing copy runs to completion in the background and its result is
+    discarded.
+    """
+    if base not in _hedged_litellm_classes:
+
+        class HedgedLitellmModel(base):
+            """LitellmModel whose slow calls are hedged with a duplicate."""
+
+            hedger = None
+
+            def __call__(self, *args, **call_kwargs):
+                if self.hedger is None:
+                    return super().__call__(*args, **call_kwargs)
+
+                model = call_kwargs.get("model") or getattr(self, "kwargs", {}).get("model")
+                call = super().__call__
+                winner = self.hedger.run(
+                    f"{model}:completion", lambda attempt: call(*args, **call_kwargs), until="finish"
+                )
+                return winner.result
+
+        HedgedLitellmModel.__name__ = f"Hedged{base.__name__}"
+        _hedged_litellm_classes[base] = HedgedLitellmModel
+
+    return _hedged_litellm_classes[base]
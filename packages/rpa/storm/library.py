@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Research Paper Agent (RPA) - Research Library
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+Reuse of STORM research across runs. The research phase (perspective
+discovery and the simulated expert conversations) is the slowest part of a
+STORM run, yet regenerating a topic with another model or page count
+repeats it in full.
+
+The library keeps the research artifacts of finished runs
+(``conversation_log.json`` and ``raw_search_results.json``), indexed in
+SQLite by normalized topic. A new run on the same or a near-identical
+topic, researched recently enough, is seeded with a copy of them, and
+STORM starts at the outline with ``do_research=False``.
+
+Topics match exactly after case and whitespace normalization, or by the
+Jaccard similarity of their content words (``"Sonic Symbols in Yoga"`` and
+``"Yoga and Sonic Symbols"`` score 1.0).
+
+    python3 storm/library.py --library ./library add output/*/
+    python3 storm/library.py --library ./library find "Sonic Symbols in Yoga"
+    python3 storm/library.py --library ./library list
+    python3 storm/library.py --library ./library prune --max-age-days 90
+"""
+
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+try:
+    from .evidence import tokenize
+    from .store import normalize_topic
+except ImportError:  # Executed as a script
+    from evidence import tokenize
+    from store import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+
+VERSION = "1.0.0"
+AUTHOR = "Aditya Patange"
+
+# STORM's research artifacts, as written to the per-article directory
+RESEARCH_ARTIFACTS = ("conversation_log.json", "raw_search_results.json")
+
+DEFAULT_SIMILARITY = 0.8
+DEFAULT_MAX_AGE_DAYS = 30
+
+
+def topic_similarity(first: str, second: str) -> float:
+    """1.0 for the same normalized topic, else the Jaccard similarity of their content words."""
+    if normalize_topic(first) == normalize_topic(second):
+        return 1.0
+    words, other = set(tokenize(first)), set(tokenize(second))
+    if not words or not other:
+        return 0.0
+    return len(words & other) / len(words | other)
+
+
+class ResearchLibrary:
+    """
+    Research artifacts under ``root/research/<id>/``, indexed in
+    ``library.sqlite`` (WAL mode). Safe to share between threads and
+    processes.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        (self.root / "research").mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """CREATE TABLE IF NOT EXISTS research (
+                id INTEGER PRIMARY KEY,
+                topic TEXT NOT NULL,
+                topic_key TEXT NOT NULL,
+                created REAL NOT NULL,
+                search_engine TEXT,
+                source TEXT,
+                bytes INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS research_topic ON research (topic_key, created);
+            CREATE INDEX IF NOT EXISTS research_created ON research (created);"""
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections are not thread-safe."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.root / "library.sqlite", timeout=30)
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _dir(self, entry_id: int) -> Path:
+        return self.root / "research" / str(entry_id)
+
+    def add(
+        self,
+        article_dir: str,
+        topic: str,
+        search_engine: Optional[str] = None,
+        source: Optional[str] = None,
+        created: Optional[float] = None
+    ) -> dict:
+        """
+        Copy the research artifacts in STORM's ``article_dir`` into the
+        library under ``topic``. ``created`` defaults to the artifacts' age.
+        """
+        article_dir = Path(article_dir)
+        paths = [article_dir / name for name in RESEARCH_ARTIFACTS]
+        missing = [path.name for path in paths if not path.exists()]
+        if missing:
+            raise FileNotFoundError(f"No research in {article_dir}: missing {', '.join(missing)}")
+        if created is None:
+            created = max(path.stat().st_mtime for path in paths)
+
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO research (topic, topic_key, created, search_engine, source, bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (topic, normalize_topic(topic), created, search_engine, source,
+                 sum(path.stat().st_size for path in paths))
+            )
+            entry_id = cursor.lastrowid
+            target = self._dir(entry_id)
+            target.mkdir(parents=True, exist_ok=True)
+            for path in paths:
+                shutil.copy2(path, target / path.name)
+        logger.info(f"Added research on {topic!r} to the library (#{entry_id})")
+        return self.entry(entry_id)
+
+    def add_run(self, run_dir: str) -> dict:
+        """Add the research of a finished STORM run directory."""
+        run_dir = Path(run_dir)
+        metadata = json.loads((run_dir / "metadata.json").read_text(encoding="utf-8"))
+        topic = metadata["topic"]
+        article_dir = next(
+            (path.parent for path in sorted(run_dir.glob(f"*/{RESEARCH_ARTIFACTS[0]}"))), None
+        )
+        if article_dir is None:
+            raise FileNotFoundError(f"No STORM research found in {run_dir}")
+        return self.add(
+            article_dir, topic, search_engine=metadata.get("search_engine"), source=str(run_dir)
+        )
+
+    @staticmethod
+    def _entry(row) -> dict:
+        entry = dict(row)
+        entry.pop("topic_key")
+        entry["age_days"] = round((time.time() - entry["created"]) / 86400, 2)
+        return entry
+
+    def entry(self, entry_id: int) -> Optional[dict]:
+        row = self._conn().execute("SELECT * FROM research WHERE id = ?", (entry_id,)).fetchone()
+        return self._entry(row) if row is not None else None
+
+    def list(self) -> list:
+        """All entries, newest first."""
+        return [
+            self._entry(row)
+            for row in self._conn().execute("SELECT * FROM research ORDER BY created DESC")
+        ]
+
+    def find(
+        self,
+        topic: str,
+        min_similarity: float = DEFAULT_SIMILARITY,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS
+    ) -> Optional[dict]:
+        """
+        The best entry for ``topic`` researched within ``max_age_days``: the
+        most similar topic scoring at least ``min_similarity``, newest first
+        among equals. The entry carries its ``similarity``.
+        """
+        since = time.time() - max_age_days * 86400
+        best = None
+        for row in self._conn().execute(
+            "SELECT * FROM research WHERE created >= ? ORDER BY created DESC", (since,)
+        ):
+            similarity = topic_similarity(topic, row["topic"])
+            if similarity >= min_similarity and (best is None or similarity > best["similarity"]):
+                if all((self._dir(row["id"]) / name).exists() for name in RESEARCH_ARTIFACTS):
+                    best = dict(self._entry(row), similarity=round(similarity, 3))
+        return best
+
+    def seed(self, entry: dict, article_dir: str):
+        """Copy an entry's research artifacts into a new run's STORM ``article_dir``."""
+        article_dir = Path(article_dir)
+        article_dir.mkdir(parents=True, exist_ok=True)
+        for name in RESEARCH_ARTIFACTS:
+            shutil.copyfile(self._dir(entry["id"]) / name, article_dir / name)
+
+    def prune(self, max_age_days: float) -> dict:
+        """Remove entries older than ``max_age_days``."""
+        since = time.time() - max_age_days * 86400
+        conn = self._conn()
+        with conn:
+            rows = conn.execute("SELECT id, bytes FROM research WHERE created < ?", (since,)).fetchall()
+            conn.execute("DELETE FROM research WHERE created < ?", (since,))
+        for row in rows:
+            shutil.rmtree(self._dir(row["id"]), ignore_errors=True)
+        return {"removed": len(rows), "bytes": sum(row["bytes"] for row in rows)}
+
+
+def main():
+    """CLI entry point for the research library."""
+    parser = argparse.ArgumentParser(
+        description="Research Paper Agent (RPA) - Library of reusable STORM research",
+        epilog="Copyright (c) 2025 Aditya Patange. All rights reserved."
+    )
+
+    parser.add_argument(
+        "--library", "-l",
+        required=True,
+        metavar="DIR",
+        help="Research library directory"
+    )
+
+    parser.add_argument(
+        "--version", "-v",
+        action="version",
+        version=f"Research Paper Agent v{VERSION} by {AUTHOR}"
+    )
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Add the research of finished STORM run directories")
+    add.add_argument("runs", nargs="+", metavar="RUN_DIR")
+
+    find = commands.add_parser("find", help="Show the research a new run on TOPIC would reuse")
+    find.add_argument("topic")
+    find.add_argument("--similarity", type=float, default=DEFAULT_SIMILARITY,
+                      help=f"Minimum topic similarity (default: {DEFAULT_SIMILARITY})")
+    find.add_argument("--max-age-days", type=float, default=DEFAULT_MAX_AGE_DAYS,
+                      help=f"Oldest research to reuse (default: {DEFAULT_MAX_AGE_DAYS})")
+
+    commands.add_parser("list", help="List library entries, newest first")
+
+    prune = commands.add_parser("prune", help="Remove old research")
+    prune.add_argument("--max-age-days", type=float, required=True)
+
+    args = parser.parse_args()
+    library = ResearchLibrary(args.library)
+
+    if args.command == "add":
+        for run in args.runs:
+            try:
+                print(json.dumps(library.add_run(run)))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping {run}: {e}")
+    elif args.command == "find":
+        entry = library.find(args.topic, min_similarity=args.similarity, max_age_days=args.max_age_days)
+        if entry is None:
+            print(f"No reusable research for {args.topic!r}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(entry))
+    elif args.command == "list":
+        for entry in library.list():
+            print(json.dumps(entry))
+    else:
+        print(json.dumps(library.prune(args.max_age_days)))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
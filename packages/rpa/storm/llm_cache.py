@@ -0,0 +1,333 @@
+"""
+Research Paper Agent (RPA) - LLM Response Cache
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+A persistent, content-addressed cache for LLM responses. Entries are keyed
+by a hash of the request (model, prompt/messages, max_tokens, temperature,
+top_p), written atomically so several processes can share one cache
+directory, and evicted least-recently-used once the cache exceeds its size
+cap.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
+
+try:
+    from .telemetry import annotate
+except ImportError:  # Executed as a script
+    from telemetry import annotate
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_MB = 1024
+
+
+class ResponseCache:
+    """
+    On-disk LLM response cache with LRU eviction.
+
+    Each entry is a small JSON file under ``cache_dir``; its modification
+    time doubles as the last-used time, so recency survives restarts and is
+    shared between processes.
+    """
+
+    def __init__(self, cache_dir: str, max_mb: float = DEFAULT_MAX_MB):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # Lazily computed on the first write
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        messages,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        **extra
+    ) -> str:
+        """Hash the parameters that determine a response into a cache key."""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": top_p,
+            **extra,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached entry for ``key``, or None on a miss."""
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)  # Mark as recently used
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: dict):
+        """Store ``entry`` under ``key`` atomically, evicting if over the cap."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(entry).encode("utf-8")
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except OSError:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - replaced
+            over_cap = self._size > self.max_bytes
+
+        if over_cap:
+            self.evict()
+
+    def _entries(self) -> list:
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Evicted by another process
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Delete least-recently-used entries until the cache is below 90% of its cap."""
+        entries = sorted(self._entries())
+        size = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+        with self._lock:
+            self._size = size
+        if removed:
+            logger.info(f"Evicted {removed} entries from LLM response cache")
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this cache instance."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def wrap_anthropic(self, client) -> "CachedAnthropicClient":
+        """Wrap an ``anthropic.Anthropic`` client so its messages API is cached."""
+        return CachedAnthropicClient(client, self)
+
+
+def _cached_message(entry: dict, model: str):
+    """Rebuild a response object with the attributes callers read."""
+    usage = entry.get("usage") or {}
+    return SimpleNamespace(
+        content=[SimpleNamespace(type="text", text=entry["text"])],
+        stop_reason=entry.get("stop_reason"),
+        model=model,
+        usage=SimpleNamespace(
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+        ),
+        cached=True,
+    )
+
+
+def _message_entry(message) -> dict:
+    """Extract the cacheable parts of an Anthropic message."""
+    usage = getattr(message, "usage", None)
+    return {
+        "text": "".join(
+            getattr(block, "text", "") for block in message.content
+        ),
+        "stop_reason": getattr(message, "stop_reason", None),
+        "usage": {
+            "input_tokens": getattr(usage, "input_tokens", 0),
+            "output_tokens": getattr(usage, "output_tokens", 0),
+        },
+        "created": time.time(),
+    }
+
+
+class CachedAnthropicClient:
+    """
+    Drop-in wrapper over ``anthropic.Anthropic`` whose ``messages.create``
+    and ``messages.stream`` calls are served from a :class:`ResponseCache`.
+
+    Attributes other than ``messages`` are delegated to the wrapped client.
+    """
+
+    def __init__(self, client, cache: ResponseCache):
+        self._client = client
+        self.cache = cache
+        self.messages = _CachedMessages(client.messages, cache)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class _CachedMessages:
+    def __init__(self, messages, cache: ResponseCache):
+        self._messages = messages
+        self._cache = cache
+
+    def _key(self, kwargs: dict) -> str:
+        return self._cache.make_key(
+            kwargs.get("model"),
+            kwargs.get("messages"),
+            max_tokens=kwargs.get("max_tokens"),
+            temperature=kwargs.get("temperature"),
+            top_p=kwargs.get("top_p"),
+            system=kwargs.get("system"),
+        )
+
+    def create(self, **kwargs):
+        key = self._key(kwargs)
+        entry = self._cache.get(key)
+        if entry is not None:
+            return _cached_message(entry, kwargs.get("model"))
+
+        message = self._messages.create(**kwargs)
+        self._cache.put(key, _message_entry(message))
+        return message
+
+    def stream(self, **kwargs):
+        return _CachedStream(self, kwargs)
+
+
+class _CachedStream:
+    """
+    Context manager mirroring ``messages.stream``. A hit replays the cached
+    text as a single chunk; a miss streams from the API and stores the final
+    message once the stream has been fully consumed.
+    """
+
+    def __init__(self, messages: _CachedMessages, kwargs: dict):
+        self._messages = messages
+        self._kwargs = kwargs
+        self._key = messages._key(kwargs)
+        self._entry = None
+        self._manager = None
+        self._stream = None
+        self._completed = False
+
+    def __enter__(self):
+        self._entry = self._messages._cache.get(self._key)
+        if self._entry is None:
+            self._manager = self._messages._messages.stream(**self._kwargs)
+            self._stream = self._manager.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._manager is None:
+            return False
+        try:
+            if exc_type is None and self._completed:
+                self._messages._cache.put(self._key, _message_entry(self._stream.get_final_message()))
+        finally:
+            suppress = self._manager.__exit__(exc_type, exc, tb)
+        return suppress
+
+    @property
+    def text_stream(self):
+        if self._entry is not None:
+            yield self._entry["text"]
+            return
+        yield from self._stream.text_stream
+        self._completed = True
+
+    def get_final_message(self):
+        if self._entry is not None:
+            return _cached_message(self._entry, self._kwargs.get("model"))
+        return self._stream.get_final_message()
+
+
+_cached_litellm_classes = {}
+
+
+def cached_litellm_class(base=None):
+    """
+    Subclass of the LitellmModel class ``base`` (default: knowledge-storm's
+    ``LitellmModel``) whose completions are served from its
+    ``response_cache``. Created lazily so importing this module does not
+    require knowledge-storm.
+    """
+    if base is None:
+        from knowledge_storm.lm import LitellmModel
+        base = LitellmModel
+
+    if base not in _cached_litellm_classes:
+
+        class CachedLitellmModel(base):
+            """LitellmModel with a persistent, content-addressed response cache."""
+
+            response_cache = None
+
+            def __call__(self, *args, **call_kwargs):
+                params = {**getattr(self, "kwargs", {}), **call_kwargs}
+                key = self.response_cache.make_key(
+                    params.get("model", getattr(self, "model", None)),
+                    {"args": args, "kwargs": {
+                        k: v for k, v in call_kwargs.items()
+                        if k not in ("max_tokens", "temperature", "top_p")
+                    }},
+                    max_tokens=params.get("max_tokens"),
+                    temperature=params.get("temperature"),
+                    top_p=params.get("top_p"),
+                )
+                entry = self.response_cache.get(key)
+                if entry is not None:
+                    annotate(cache_hit=True)
+                    return entry["outputs"]
+
+                outputs = super().__call__(*args, **call_kwargs)
+                self.response_cache.put(key, {"outputs": outputs, "created": time.time()})
+                return outputs
+
+        _cached_litellm_classes[base] = CachedLitellmModel
+
+    return _cached_litellm_classes[base]
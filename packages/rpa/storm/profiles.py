@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Research Paper Agent (RPA) - STORM Engine Profiles
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+Named settings for the STORM engine: how many perspectives are researched,
+how long each simulated conversation runs, how many search results each
+query keeps, how many threads STORM runs them on, and the ``max_tokens``
+of the conversation and writing models.
+
+``balanced`` is what the runner has always used. ``fast`` researches less
+and answers more briefly; ``thorough`` researches more and writes longer
+sections. A profile can also be a JSON file, such as the one ``autotune``
+writes.
+
+``autotune`` picks ``max_thread_num`` and the number of papers generated
+at once for a given rate limit. It replays STORM's call pattern (persona
+generation, the simulated conversations with their searches, outline,
+per-section article drafting and polish) offline against the
+latency-modeled fake LLM and search backends from bench.py. Calls are
+admitted by the same quota governor the runner uses, and the setting
+with the best throughput is recommended.
+
+    python3 storm/profiles.py list
+    python3 storm/profiles.py autotune --profile balanced --rpm 50 --tpm 40000
+    python3 storm/profiles.py autotune --write tuned.json && python3 storm/runner.py -t "..." --profile tuned.json
+"""
+
+import sys
+import json
+import time
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+try:
+    from .quota import DEFAULT_LIMITS, MODEL_LIMITS, ModelBudget, QuotaGovernor
+    from .telemetry import match_model
+except ImportError:  # Executed as a script
+    from quota import DEFAULT_LIMITS, MODEL_LIMITS, ModelBudget, QuotaGovernor
+    from telemetry import match_model
+
+logger = logging.getLogger(__name__)
+
+
+VERSION = "1.0.0"
+AUTHOR = "Aditya Patange"
+
+PROFILES = {
+    "fast": {
+        "max_conv_turn": 3,
+        "max_perspective": 2,
+        "search_top_k": 5,
+        "max_thread_num": 8,
+        "conv_max_tokens": 400,
+        "main_max_tokens": 2000,
+    },
+    "balanced": {
+        "max_conv_turn": 5,
+        "max_perspective": 4,
+        "search_top_k": 10,
+        "max_thread_num": 4,
+        "conv_max_tokens": 500,
+        "main_max_tokens": 3000,
+    },
+    "thorough": {
+        "max_conv_turn": 6,
+        "max_perspective": 6,
+        "search_top_k": 15,
+        "max_thread_num": 6,
+        "conv_max_tokens": 700,
+        "main_max_tokens": 4000,
+    },
+}
+DEFAULT_PROFILE = "balanced"
+
+# Profile keys passed straight to STORMWikiRunnerArguments
+ENGINE_KNOBS = ("max_conv_turn", "max_perspective", "search_top_k", "max_thread_num")
+
+# STORM's fixed fan-out: search queries per conversation turn, and the
+# general "basic fact writer" perspective it adds to the generated ones
+SEARCH_QUERIES_PER_TURN = 3
+EXTRA_PERSPECTIVES = 1
+SIMULATED_SECTIONS = 6
+
+# Models the autotuner charges calls to, so their default quotas apply
+CONV_MODEL = "claude-3-haiku-20240307"
+MAIN_MODEL = "claude-3-5-sonnet-20241022"
+
+
+def resolve_profile(profile=None, **overrides) -> dict:
+    """
+    Settings for ``profile`` (a name from :data:`PROFILES`, a path to a
+    JSON file or a dict; default :data:`DEFAULT_PROFILE`), with any
+    ``overrides`` that are not None applied. Raises ValueError for unknown
+    names or keys.
+    """
+    if profile is None:
+        profile = DEFAULT_PROFILE
+    if isinstance(profile, dict):
+        settings = dict(profile)
+    elif profile in PROFILES:
+        settings = dict(PROFILES[profile])
+    elif Path(profile).is_file():
+        settings = json.loads(Path(profile).read_text(encoding="utf-8"))
+        settings = settings.get("profile", settings)
+    else:
+        raise ValueError(f"Unknown profile: {profile} (expected one of {', '.join(PROFILES)} or a JSON file)")
+
+    settings = {**PROFILES[DEFAULT_PROFILE], **settings}
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    unknown = set(settings) - set(PROFILES[DEFAULT_PROFILE])
+    if unknown:
+        raise ValueError(f"Unknown profile settings: {', '.join(sorted(unknown))}")
+    return {key: int(value) for key, value in settings.items()}
+
+
+class _ScaledBudget(ModelBudget):
+    """
+    A model budget for simulated time running ``1 / scale`` times faster:
+    it refills that much faster but, like the real one, holds at most one
+    minute of the unscaled limits.
+    """
+
+    def __init__(self, model: str, rpm: float, tpm: float, scale: float):
+        super().__init__(model, rpm / scale, tpm / scale)
+        self.capacity = (float(rpm), float(tpm))
+        self._requests, self._tokens = self.capacity
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._requests = min(self.capacity[0], self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.capacity[1], self._tokens + elapsed * self.tpm / 60)
+        self._updated = now
+
+    def acquire(self, tokens: int, priority: int = 0) -> float:
+        return super().acquire(min(tokens, int(self.capacity[1])), priority)
+
+    def settle(self, reserved: int, used: int):
+        with self._cond:
+            self._tokens = min(self.capacity[1], self._tokens + min(reserved, self.capacity[1]) - used)
+            self.metrics["used_tokens"] += used
+            self._cond.notify_all()
+
+
+class _ScaledGovernor(QuotaGovernor):
+    """A :class:`QuotaGovernor` whose budgets run on scaled time (see :class:`_ScaledBudget`)."""
+
+    def __init__(self, rpm: Optional[float], tpm: Optional[float], scale: float):
+        super().__init__(rpm=rpm, tpm=tpm)
+        self.scale = scale
+
+    def budget(self, model: Optional[str]) -> ModelBudget:
+        name = model or "default"
+        with self._lock:
+            if name not in self._budgets:
+                rpm, tpm = match_model(MODEL_LIMITS, name) or DEFAULT_LIMITS
+                self._budgets[name] = _ScaledBudget(name, self.rpm or rpm, self.tpm or tpm, self.scale)
+            return self._budgets[name]
+
+
+def _simulate_paper(settings: dict, backend, rm, governor):
+    """
+    One STORM run's worth of model calls and searches, with STORM's
+    concurrency: conversations and article sections each on a pool of
+    ``max_thread_num`` threads.
+    """
+    snippet_tokens = 100
+
+    def lm(model: str, max_tokens: int, input_tokens: int):
+        def complete():
+            delay, tokens, _ = backend.plan("", max_tokens)
+            time.sleep(delay + backend.stream_delay(tokens))
+            return tokens
+
+        governor.call(
+            model, complete, tokens=input_tokens + max_tokens,
+            used=lambda tokens: input_tokens + tokens
+        )
+
+    conv = lambda input_tokens: lm(CONV_MODEL, settings["conv_max_tokens"], input_tokens)
+    main = lambda input_tokens: lm(MAIN_MODEL, settings["main_max_tokens"], input_tokens)
+
+    def conversation(index):
+        history = 0
+        for turn in range(settings["max_conv_turn"]):
+            conv(300 + history)                                  # the writer asks a question
+            conv(300 + history)                                  # the expert plans search queries
+            for query in range(SEARCH_QUERIES_PER_TURN):
+                rm.forward(f"perspective {index} turn {turn} query {query}")
+            results = SEARCH_QUERIES_PER_TURN * settings["search_top_k"] * snippet_tokens
+            conv(300 + history + results)                         # the expert answers from the results
+            history += 2 * settings["conv_max_tokens"]
+
+    conv(300)                                                     # persona generation
+    perspectives = settings["max_perspective"] + EXTRA_PERSPECTIVES
+    with ThreadPoolExecutor(max_workers=settings["max_thread_num"]) as pool:
+        list(pool.map(conversation, range(perspectives)))
+
+    research = perspectives * settings["max_conv_turn"] * 2 * settings["conv_max_tokens"]
+    main(research)                                                # outline from the conversations
+    main(1000 + settings["main_max_tokens"])                      # outline refinement
+    with ThreadPoolExecutor(max_workers=settings["max_thread_num"]) as pool:
+        list(pool.map(
+            lambda section: main(1000 + settings["search_top_k"] * snippet_tokens),
+            range(SIMULATED_SECTIONS)
+        ))
+    main(SIMULATED_SECTIONS * settings["main_max_tokens"])        # polish: the lead section
+
+
+def measure(
+    settings: dict,
+    papers_at_once: int,
+    rpm: Optional[float] = None,
+    tpm: Optional[float] = None,
+    rounds: int = 2,
+    backend_options: Optional[dict] = None,
+    search_latency: Optional[str] = None
+) -> dict:
+    """
+    Simulate ``papers_at_once`` papers in parallel, ``rounds`` times over,
+    under a per-model ``rpm`` / ``tpm`` limit (the model defaults when
+    None). Times in the result are simulated (unscaled) seconds.
+    """
+    try:
+        from .bench import FakeBackend, FakeRM, LatencyModel
+    except ImportError:  # Executed as a script
+        from bench import FakeBackend, FakeRM, LatencyModel
+
+    backend_options = dict(backend_options or {})
+    backend = FakeBackend(**backend_options)
+    scale = backend.time_scale
+    rm = FakeRM(
+        latency=LatencyModel.parse(search_latency) if search_latency else None,
+        k=settings["search_top_k"], time_scale=scale, seed=backend_options.get("seed", 0)
+    )
+    governor = _ScaledGovernor(rpm, tpm, scale)
+
+    latencies = []
+    lock = threading.Lock()
+
+    def paper(_):
+        start = time.monotonic()
+        _simulate_paper(settings, backend, rm, governor)
+        with lock:
+            latencies.append((time.monotonic() - start) / scale)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=papers_at_once) as pool:
+        list(pool.map(paper, range(papers_at_once * rounds)))
+    wall = (time.monotonic() - start) / scale
+
+    waits = sum(budget["wait_seconds"] for budget in governor.metrics().values()) / scale
+    return {
+        "max_thread_num": settings["max_thread_num"],
+        "papers_at_once": papers_at_once,
+        "papers": len(latencies),
+        "papers_per_hour": round(len(latencies) / wall * 3600, 2),
+        "seconds_per_paper": round(sorted(latencies)[len(latencies) // 2], 1),
+        "quota_wait_seconds": round(waits, 1),
+        "llm_calls": backend.calls,
+        "searches": rm.calls,
+    }
+
+
+def autotune(
+    profile=None,
+    threads=(1, 2, 4, 6, 8, 12, 16),
+    papers_at_once=(1, 2, 4),
+    rpm: Optional[float] = None,
+    tpm: Optional[float] = None,
+    rounds: int = 2,
+    backend_options: Optional[dict] = None,
+    search_latency: Optional[str] = None,
+    tolerance: float = 0.05
+) -> dict:
+    """
+    Sweep ``max_thread_num`` and papers generated at once for ``profile``
+    and recommend a setting.
+
+    The recommendation is the cheapest setting (fewest threads in total,
+    then lowest per-paper latency) whose throughput is within
+    ``tolerance`` of the best: past the rate limit, more threads only
+    queue for quota.
+    """
+    base = resolve_profile(profile)
+    trials = []
+    for count in papers_at_once:
+        for thread_num in threads:
+            settings = dict(base, max_thread_num=thread_num)
+            trial = measure(settings, count, rpm=rpm, tpm=tpm, rounds=rounds,
+                            backend_options=backend_options, search_latency=search_latency)
+            logger.info(
+                f"max_thread_num={thread_num} papers_at_once={count}: "
+                f"{trial['papers_per_hour']} papers/h, {trial['seconds_per_paper']}s per paper"
+            )
+            trials.append(trial)
+
+    best = max(trial["papers_per_hour"] for trial in trials)
+    good = [trial for trial in trials if trial["papers_per_hour"] >= best * (1 - tolerance)]
+    choice = min(good, key=lambda t: (t["max_thread_num"] * t["papers_at_once"], t["seconds_per_paper"]))
+    current = next(
+        (t for t in trials if t["max_thread_num"] == base["max_thread_num"] and t["papers_at_once"] == 1),
+        None
+    )
+    return {
+        "profile": dict(base, max_thread_num=choice["max_thread_num"]),
+        "recommended": {
+            "max_thread_num": choice["max_thread_num"],
+            "papers_at_once": choice["papers_at_once"],
+            "papers_per_hour": choice["papers_per_hour"],
+            "seconds_per_paper": choice["seconds_per_paper"],
+        },
+        "baseline": current,
+        "rate_limit": {"rpm": rpm, "tpm": tpm},
+        "trials": trials,
+        "version": VERSION,
+    }
+
+
+def main():
+    """CLI entry point for STORM engine profiles."""
+    parser = argparse.ArgumentParser(
+        description="Research Paper Agent (RPA) - STORM engine profiles and auto-tuning",
+        epilog="Copyright (c) 2025 Aditya Patange. All rights reserved."
+    )
+
+    parser.add_argument(
+        "--version", "-v",
+        action="version",
+        version=f"Research Paper Agent v{VERSION} by {AUTHOR}"
+    )
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="Show the built-in profiles")
+
+    tune = commands.add_parser(
+        "autotune",
+        help="Recommend max_thread_num and papers at once for a rate limit, offline"
+    )
+    tune.add_argument("--profile", default=DEFAULT_PROFILE,
+                      help=f"Profile whose other settings stay fixed (default: {DEFAULT_PROFILE})")
+    tune.add_argument("--rpm", type=float, help="Requests per minute per model (default: model defaults)")
+    tune.add_argument("--tpm", type=float, help="Tokens per minute per model (default: model defaults)")
+    tune.add_argument("--threads", default="1,2,4,6,8,12,16",
+                      help="max_thread_num values to try (default: 1,2,4,6,8,12,16)")
+    tune.add_argument("--papers-at-once", default="1,2,4",
+                      help="Concurrent papers to try, as batch --workers (default: 1,2,4)")
+    tune.add_argument("--rounds", type=int, default=2,
+                      help="Papers simulated per concurrent slot (default: 2)")
+    tune.add_argument("--ttft", default="lognormal:0.8,0.5",
+                      help="First-token latency distribution, kind:a,b (default: lognormal:0.8,0.5)")
+    tune.add_argument("--tokens-per-second", type=float, default=60.0,
+                      help="Simulated decode rate (default: 60)")
+    tune.add_argument("--fill", type=float, default=0.5,
+                      help="Fraction of max_tokens each response uses (default: 0.5)")
+    tune.add_argument("--search-latency", default="lognormal:0.6,0.4",
+                      help="Search latency distribution (default: lognormal:0.6,0.4)")
+    tune.add_argument("--time-scale", type=float, default=0.002,
+                      help="Multiplier on every simulated delay (default: 0.002)")
+    tune.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    tune.add_argument("--write", metavar="FILE",
+                      help="Write the recommended profile to FILE, for --profile FILE")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        print(json.dumps(PROFILES, indent=2))
+        return
+
+    try:
+        from .bench import LatencyModel
+    except ImportError:  # Executed as a script
+        from bench import LatencyModel
+
+    try:
+        report = autotune(
+            profile=args.profile,
+            threads=[int(n) for n in args.threads.split(",")],
+            papers_at_once=[int(n) for n in args.papers_at_once.split(",")],
+            rpm=args.rpm,
+            tpm=args.tpm,
+            rounds=args.rounds,
+            backend_options={
+                "ttft": LatencyModel.parse(args.ttft),
+                "tokens_per_second": args.tokens_per_second,
+                "fill": args.fill,
+                "time_scale": args.time_scale,
+                "seed": args.seed,
+            },
+            search_latency=args.search_latency,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.write:
+        Path(args.write).write_text(json.dumps({
+            "profile": report["profile"],
+            "recommended": report["recommended"],
+            "rate_limit": report["rate_limit"],
+        }, indent=2) + "\n", encoding="utf-8")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr)
+    main()
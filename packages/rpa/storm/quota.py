@@ -0,0 +1,452 @@
+"""
+Research Paper Agent (RPA) - Provider Quota Governor
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+Process-wide admission control for LLM calls. Each model has a
+requests-per-minute and tokens-per-minute budget; every call reserves its
+estimated tokens (prompt length plus ``max_tokens``) up front, waits until
+the budget has room, and is reconciled against the actual ``usage``
+afterwards. Waiting calls are admitted in priority order, so papers that
+are further along finish first, and a 429 pauses the model's budget for
+its Retry-After instead of letting every thread retry on its own.
+"""
+
+import time
+import heapq
+import itertools
+import logging
+import threading
+from typing import Optional
+
+try:
+    from .ratelimit import backoff_delay, is_rate_limit_error, is_transient_error, retry_after_seconds
+    from .telemetry import annotate, current_tracer, match_model
+except ImportError:  # Executed as a script
+    from ratelimit import backoff_delay, is_rate_limit_error, is_transient_error, retry_after_seconds
+    from telemetry import annotate, current_tracer, match_model
+
+logger = logging.getLogger(__name__)
+
+
+# Default (requests, tokens) per minute by model prefix. Deliberately
+# conservative; raise them to match your provider tier with --rpm / --tpm.
+MODEL_LIMITS = {
+    "claude-opus-4": (50, 38_000),
+    "claude-sonnet-4": (50, 38_000),
+    "claude-3-7-sonnet": (50, 28_000),
+    "claude-3-5-sonnet": (50, 48_000),
+    "claude-3-5-haiku": (50, 60_000),
+    "claude-3-haiku": (50, 60_000),
+    "gpt-4o-mini": (500, 200_000),
+    "gpt-4o": (500, 30_000),
+    "gpt-4-turbo": (500, 30_000),
+    "gpt-3.5-turbo": (3_500, 200_000),
+}
+DEFAULT_LIMITS = (50, 40_000)
+
+# How far along a paper is in each phase; calls from later phases are
+# admitted first so papers that are nearly done are not starved by new ones
+PHASE_PRIORITY = {
+    "research": 0,
+    "outline": 1,
+    "paper": 2,
+    "article": 2,
+    "polish": 3,
+}
+
+
+def estimate_tokens(prompt, max_tokens: int) -> int:
+    """
+    Tokens to reserve for a call: roughly four characters per prompt token,
+    plus the full ``max_tokens`` the response may use.
+    """
+    if isinstance(prompt, (list, tuple)):
+        chars = sum(len(str(m.get("content", m))) + 16 if isinstance(m, dict) else len(str(m))
+                    for m in prompt)
+    else:
+        chars = len(str(prompt or ""))
+    return chars // 4 + 1 + (max_tokens or 0)
+
+
+def phase_priority() -> int:
+    """Priority for a call made in the active tracer's current phase."""
+    tracer = current_tracer()
+    return PHASE_PRIORITY.get(tracer.phase, 0) if tracer is not None else 0
+
+
+class ModelBudget:
+    """
+    Request and token buckets for one model, each refilling continuously at
+    its per-minute limit. Admission is strictly in priority order (then
+    arrival order): a waiting call is only admitted once it is at the head
+    of the queue and both buckets can cover it.
+    """
+
+    def __init__(self, model: str, rpm: float, tpm: float):
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.metrics = {
+            "admitted": 0,
+            "throttled": 0,
+            "wait_seconds": 0.0,
+            "reserved_tokens": 0,
+            "used_tokens": 0,
+        }
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+        self._updated = now
+
+    def acquire(self, tokens: int, priority: int = 0) -> float:
+        """Block until the call is admitted; returns the seconds spent waiting."""
+        # A single call larger than the whole budget would never fit
+        tokens = min(tokens, self.tpm)
+        start = time.monotonic()
+        ticket = (-priority, next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._queue[0] == ticket:
+                        if now >= self._paused_until and self._requests >= 1 and self._tokens >= tokens:
+                            heapq.heappop(self._queue)
+                            self._requests -= 1
+                            self._tokens -= tokens
+                            break
+                        timeout = max(
+                            self._paused_until - now,
+                            (1 - self._requests) * 60 / self.rpm,
+                            (tokens - self._tokens) * 60 / self.tpm,
+                            0.01,
+                        )
+                    else:
+                        # The head of the queue wakes us when it is admitted
+                        timeout = 1.0
+                    self._cond.wait(timeout)
+            except BaseException:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                raise
+            finally:
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            self.metrics["admitted"] += 1
+            self.metrics["reserved_tokens"] += tokens
+            self.metrics["wait_seconds"] += waited
+        return waited
+
+    def settle(self, reserved: int, used: int):
+        """Return the unused part of a reservation (or charge an overrun)."""
+        reserved = min(reserved, self.tpm)
+        with self._cond:
+            self._tokens = min(self.tpm, self._tokens + reserved - used)
+            self.metrics["used_tokens"] += used
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        """Admit nothing for ``seconds``, e.g. after a 429 with Retry-After."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._requests = 0.0
+            self.metrics["throttled"] += 1
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            metrics = dict(self.metrics)
+        metrics["wait_seconds"] = round(metrics["wait_seconds"], 3)
+        metrics["rpm"] = self.rpm
+        metrics["tpm"] = self.tpm
+        return metrics
+
+
+class QuotaGovernor:
+    """
+    Per-model budgets shared by every call in the process.
+
+    ``rpm`` / ``tpm`` override the per-model defaults for all models, and
+    ``share`` scales every limit, for processes that split one account's
+    quota between them (see ``batch.py``).
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        share: float = 1.0,
+        max_retries: int = 4
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.share = share
+        self.max_retries = max_retries
+        self._budgets = {}
+        self._lock = threading.Lock()
+
+    def configure(self, rpm: Optional[float] = None, tpm: Optional[float] = None, share: Optional[float] = None):
+        """
+        Change the limits; budgets are rebuilt on their next use. Limits
+        that are unchanged keep the current budgets, and what they have
+        already admitted this minute.
+        """
+        with self._lock:
+            limits = (
+                rpm if rpm is not None else self.rpm,
+                tpm if tpm is not None else self.tpm,
+                share if share is not None else self.share,
+            )
+            if limits == (self.rpm, self.tpm, self.share):
+                return
+            self.rpm, self.tpm, self.share = limits
+            self._budgets.clear()
+
+    def budget(self, model: Optional[str]) -> ModelBudget:
+        name = model or "default"
+        with self._lock:
+            if name not in self._budgets:
+                rpm, tpm = match_model(MODEL_LIMITS, name) or DEFAULT_LIMITS
+                self._budgets[name] = ModelBudget(
+                    name,
+                    max(1.0, (self.rpm or rpm) * self.share),
+                    max(1.0, (self.tpm or tpm) * self.share),
+                )
+            return self._budgets[name]
+
+    def acquire(self, model: Optional[str], tokens: int, priority: Optional[int] = None) -> float:
+        """Wait for ``model``'s budget to admit a call reserving ``tokens``."""
+        priority = phase_priority() if priority is None else priority
+        waited = self.budget(model).acquire(tokens, priority)
+        if waited >= 0.01:
+            annotate(quota_wait=round(waited, 3))
+        return waited
+
+    def settle(self, model: Optional[str], reserved: int, used: int):
+        self.budget(model).settle(reserved, used)
+
+    def throttled(self, model: Optional[str], reserved: int, error: Exception, attempt: int) -> float:
+        """
+        Record a 429: refund the reservation, pause the model's budget for
+        the Retry-After (or a jittered backoff) and return the pause.
+        """
+        delay = retry_after_seconds(error) or backoff_delay(attempt)
+        budget = self.budget(model)
+        budget.settle(reserved, 0)
+        budget.pause(delay)
+        annotate(retries=attempt + 1)
+        logger.warning(f"{model} rate limited, pausing its quota for {delay:.1f}s")
+        return delay
+
+    def retry(self, model: Optional[str], reserved: int, error: Exception, attempt: int) -> bool:
+        """
+        Handle a failed attempt: a 429 pauses the model's budget (see
+        :meth:`throttled`), a 5xx/529 or connection error refunds the
+        reservation and backs off this caller only. Returns whether the
+        call should be retried.
+        """
+        if attempt >= self.max_retries:
+            return False
+        if is_rate_limit_error(error):
+            self.throttled(model, reserved, error, attempt)
+            return True
+        if is_transient_error(error):
+            delay = backoff_delay(attempt)
+            self.settle(model, reserved, 0)
+            annotate(retries=attempt + 1)
+            logger.warning(f"{model} call failed ({type(error).__name__}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            return True
+        return False
+
+    def call(self, model: Optional[str], fn, tokens: int, used=None, priority: Optional[int] = None):
+        """
+        Run ``fn()`` once admitted, retrying rate-limited, overloaded and
+        dropped attempts.
+
+        ``used(result)`` returns the tokens the call actually consumed; by
+        default the reservation is kept as is.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(model, tokens, priority)
+            try:
+                result = fn()
+            except Exception as e:
+                if self.retry(model, tokens, e, attempt):
+                    continue
+                raise
+            self.settle(model, tokens, used(result) if used is not None else tokens)
+            return result
+
+    def metrics(self) -> dict:
+        with self._lock:
+            budgets = list(self._budgets.values())
+        return {budget.model: budget.snapshot() for budget in budgets}
+
+    def wrap_anthropic(self, client, priority=None) -> "GovernedAnthropicClient":
+        return GovernedAnthropicClient(client, self, priority=priority)
+
+
+_governor = QuotaGovernor()
+
+
+def get_governor() -> QuotaGovernor:
+    """The process-wide governor shared by every generator in this process."""
+    return _governor
+
+
+def _message_tokens(message) -> int:
+    usage = getattr(message, "usage", None)
+    return (getattr(usage, "input_tokens", 0) or 0) + (getattr(usage, "output_tokens", 0) or 0)
+
+
+class GovernedAnthropicClient:
+    """
+    Wrapper over an Anthropic client whose ``messages`` calls are admitted
+    by a :class:`QuotaGovernor`. The SDK's own retries are turned off, so
+    429s reach the governor and pause every caller, not just one; the
+    governor retries 5xx/529 and connection errors in their place.
+
+    ``priority`` is an optional callable returning the current call's
+    priority; by default it follows the active tracer's phase.
+    """
+
+    def __init__(self, client, governor: QuotaGovernor, priority=None):
+        if hasattr(client, "with_options"):
+            client = client.with_options(max_retries=0)
+        self._client = client
+        self.governor = governor
+        self.messages = _GovernedMessages(client.messages, governor, priority)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class _GovernedMessages:
+    def __init__(self, messages, governor: QuotaGovernor, priority):
+        self._messages = messages
+        self._governor = governor
+        self._priority = priority
+
+    def _reserve(self, kwargs: dict) -> tuple:
+        tokens = estimate_tokens(kwargs.get("messages"), kwargs.get("max_tokens"))
+        priority = self._priority() if self._priority is not None else None
+        return tokens, priority
+
+    def create(self, **kwargs):
+        tokens, priority = self._reserve(kwargs)
+        return self._governor.call(
+            kwargs.get("model"),
+            lambda: self._messages.create(**kwargs),
+            tokens,
+            used=_message_tokens,
+            priority=priority,
+        )
+
+    def stream(self, **kwargs):
+        return _GovernedStream(self, kwargs)
+
+
+class _GovernedStream:
+    """``messages.stream`` context manager admitted by the governor."""
+
+    def __init__(self, messages: _GovernedMessages, kwargs: dict):
+        self._messages = messages
+        self._kwargs = kwargs
+        self._manager = None
+        self._stream = None
+        self._completed = False
+
+    def __enter__(self):
+        governor = self._messages._governor
+        model = self._kwargs.get("model")
+        self._tokens, priority = self._messages._reserve(self._kwargs)
+
+        # The request is sent when the stream is opened, so that is where
+        # a 429 or 5xx surfaces and is retried
+        for attempt in range(governor.max_retries + 1):
+            governor.acquire(model, self._tokens, priority)
+            try:
+                self._manager = self._messages._messages.stream(**self._kwargs)
+                self._stream = self._manager.__enter__()
+                return self
+            except Exception as e:
+                if governor.retry(model, self._tokens, e, attempt):
+                    continue
+                governor.settle(model, self._tokens, self._tokens)
+                raise
+
+    def __exit__(self, exc_type, exc, tb):
+        used = self._tokens
+        try:
+            if exc_type is None and self._completed:
+                used = _message_tokens(self._stream.get_final_message())
+        finally:
+            self._messages._governor.settle(self._kwargs.get("model"), self._tokens, used)
+            suppress = self._manager.__exit__(exc_type, exc, tb)
+        return suppress
+
+    @property
+    def text_stream(self):
+        yield from self._stream.text_stream
+        self._completed = True
+
+    def get_final_message(self):
+        return self._stream.get_final_message()
+
+
+_governed_litellm_classes = {}
+_litellm_usage = threading.local()
+
+
+def governed_litellm_class(base):
+    """
+    Subclass of the LitellmModel class ``base`` whose calls are admitted by
+    the process-wide governor, with priority following the active tracer's
+    phase.
+    """
+    if base not in _governed_litellm_classes:
+
+        class GovernedLitellmModel(base):
+            """LitellmModel admitted by the process-wide quota governor."""
+
+            def __call__(self, prompt=None, messages=None, **call_kwargs):
+                params = {**getattr(self, "kwargs", {}), **call_kwargs}
+                model = params.get("model", getattr(self, "model", None))
+                tokens = estimate_tokens(messages or prompt, params.get("max_tokens"))
+
+                def complete():
+                    _litellm_usage.tokens = None
+                    return super(GovernedLitellmModel, self).__call__(prompt, messages, **call_kwargs)
+
+                return get_governor().call(
+                    model,
+                    complete,
+                    tokens,
+                    used=lambda _: _litellm_usage.tokens if _litellm_usage.tokens is not None else tokens,
+                )
+
+            def log_usage(self, response):
+                super().log_usage(response)
+                usage = response.get("usage") if isinstance(response, dict) \
+                    else getattr(response, "usage", None)
+                if usage is not None:
+                    get = usage.get if isinstance(usage, dict) else lambda k, d=0: getattr(usage, k, d)
+                    _litellm_usage.tokens = (get("prompt_tokens", 0) or 0) + (get("completion_tokens", 0) or 0)
+
+        GovernedLitellmModel.__name__ = f"Governed{base.__name__}"
+        _governed_litellm_classes[base] = GovernedLitellmModel
+
+    return _governed_litellm_classes[base]
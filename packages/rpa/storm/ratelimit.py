@@ -0,0 +1,246 @@
+"""
+Research Paper Agent (RPA) - Search Rate Limiting
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+Process-wide rate limiting for search engines. Every STORM worker thread
+talking to the same engine shares one adaptive token bucket (which slows
+down on 429/ratelimit signals and speeds back up on success) and one
+circuit breaker (which fails fast while the engine is unhealthy).
+"""
+
+import time
+import random
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether ``error`` signals throttling (HTTP 429 or a ratelimit exception)."""
+    if "ratelimit" in type(error).__name__.lower():
+        return True
+
+    for source in (error, getattr(error, "response", None)):
+        status = getattr(source, "status_code", None) or getattr(source, "status", None)
+        if status == 429:
+            return True
+
+    # Not a bare "429": URLs, request IDs and token counts contain it too
+    message = str(error).lower()
+    return any(marker in message for marker in ("ratelimit", "rate limit", "too many requests"))
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Whether ``error`` is a server-side failure worth retrying: HTTP 5xx
+    (including Anthropic's 529 overloaded), a timeout or a dropped
+    connection.
+    """
+    name = type(error).__name__.lower()
+    if "connection" in name or "timeout" in name:
+        return True
+
+    for source in (error, getattr(error, "response", None)):
+        status = getattr(source, "status_code", None) or getattr(source, "status", None)
+        if isinstance(status, int) and status >= 500:
+            return True
+    return False
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read a Retry-After header off an HTTP error, if there is one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter for the given zero-based attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket whose refill rate adapts to the engine's responses:
+    halved on every throttle signal, increased additively on success.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: float = 2.0,
+        min_rate: float = 0.1,
+        max_rate: float = 4.0,
+        increase: float = 0.05
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open breaker. Opens after
+    ``failure_threshold`` consecutive failures, rejects calls for
+    ``reset_timeout`` seconds, then lets a single trial call through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may proceed right now."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit breaker opened after {self._failures} consecutive failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class EngineGuard:
+    """Rate limiter, circuit breaker and metrics for one search engine."""
+
+    def __init__(self, engine: str, **limiter_kwargs):
+        self.engine = engine
+        self.limiter = AdaptiveTokenBucket(**limiter_kwargs)
+        self.breaker = CircuitBreaker()
+        self._metrics = {
+            "calls": 0,
+            "retries": 0,
+            "throttled": 0,
+            "failures": 0,
+            "short_circuited": 0,
+            "wait_seconds": 0.0,
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, amount=1):
+        with self._lock:
+            self._metrics[name] += amount
+
+    def allow(self) -> bool:
+        """Check the breaker; counts the call as short-circuited if it is open."""
+        if self.breaker.allow():
+            return True
+        self._count("short_circuited")
+        return False
+
+    def acquire(self):
+        """Wait for the shared rate limiter before issuing a request."""
+        self._count("calls")
+        self._count("wait_seconds", self.limiter.acquire())
+
+    def backoff(self, attempt: int, base: float = 1.0):
+        """Sleep a jittered exponential backoff before retry ``attempt``."""
+        delay = backoff_delay(attempt, base=base)
+        self._count("retries")
+        self._count("wait_seconds", delay)
+        time.sleep(delay)
+
+    def record_success(self):
+        self.breaker.record_success()
+        self.limiter.on_success()
+
+    def record_failure(self, error: Exception):
+        self._count("failures")
+        if is_rate_limit_error(error):
+            self._count("throttled")
+            self.limiter.on_throttle(retry_after_seconds(error))
+        self.breaker.record_failure()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics["wait_seconds"] = round(metrics["wait_seconds"], 3)
+        metrics["rate"] = round(self.limiter.rate, 3)
+        metrics["breaker_state"] = self.breaker.state
+        return metrics
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(engine: str, **limiter_kwargs) -> EngineGuard:
+    """Return the process-wide guard for ``engine``, creating it on first use."""
+    with _guards_lock:
+        if engine not in _guards:
+            _guards[engine] = EngineGuard(engine, **limiter_kwargs)
+        return _guards[engine]
+
+
+def engine_metrics() -> dict:
+    """Metrics for every engine that has been guarded in this process."""
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {guard.engine: guard.metrics() for guard in guards}
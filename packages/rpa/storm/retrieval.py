@@ -0,0 +1,185 @@
+"""
+Research Paper Agent (RPA) - Multi-Engine Retrieval
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+A composite retrieval module for STORM that queries several search engines
+concurrently (or hedges: fires the next engine only once the previous one
+is slow), merges their results by normalized URL and returns as soon as
+``k`` distinct results are in hand.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+try:
+    from .search_cache import results_for_query
+    from .telemetry import percentile
+except ImportError:  # Executed as a script
+    from search_cache import results_for_query
+    from telemetry import percentile
+
+logger = logging.getLogger(__name__)
+
+
+TRACKING_PARAMS = ("fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "ref")
+
+# Latency samples kept per engine; percentiles cover the most recent ones
+LATENCY_WINDOW = 1000
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for deduplication: http(s) folded to https,
+    lowercase host, no ``www.``, fragment, tracking parameters or trailing
+    slash, and sorted query parameters.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    scheme = parts.scheme.lower()
+    if scheme in ("", "http"):
+        scheme = "https"
+    return urlunsplit((scheme, host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+class CompositeRM:
+    """
+    Fan a query out to several retrieval modules and merge the results.
+
+    In ``fanout`` mode every engine is queried at once. In ``hedge`` mode
+    engines are tried in order and the next one is only fired when none of
+    the earlier ones has answered within ``hedge_after`` seconds. Either way
+    the call returns once ``k`` distinct URLs are collected or every
+    started engine has answered; stragglers finish in the background and
+    still count towards the latency stats.
+    """
+
+    def __init__(
+        self,
+        engines: dict,
+        k: int = 10,
+        mode: str = "fanout",
+        hedge_after: float = 2.0
+    ):
+        if not engines:
+            raise ValueError("CompositeRM needs at least one engine")
+        if mode not in ("fanout", "hedge"):
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+
+        self.engines = dict(engines)
+        self.k = k
+        self.mode = mode
+        self.hedge_after = hedge_after
+        # STORM calls us from several threads, each of which may fan out
+        self._pool = ThreadPoolExecutor(max_workers=4 * len(self.engines))
+        self._stats = {
+            name: {"calls": 0, "errors": 0, "results": 0, "latencies": deque(maxlen=LATENCY_WINDOW)}
+            for name in self.engines
+        }
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        """Make the wrapper callable, delegating to forward."""
+        return self.forward(*args, **kwargs)
+
+    def _query_engine(self, name: str, query: str, exclude_urls: list) -> list:
+        start = time.monotonic()
+        try:
+            results = results_for_query(
+                self.engines[name].forward(query, exclude_urls=exclude_urls), query
+            )
+        except Exception as e:
+            logger.warning(f"{name} search failed: {e}")
+            results = []
+            with self._lock:
+                self._stats[name]["errors"] += 1
+        elapsed = time.monotonic() - start
+
+        with self._lock:
+            stats = self._stats[name]
+            stats["calls"] += 1
+            stats["results"] += len(results)
+            stats["latencies"].append(elapsed)
+        return results
+
+    def _search(self, query: str, exclude_urls: list) -> list:
+        names = list(self.engines)
+        launched = {}
+        merged = {}
+        excluded = {normalize_url(url) for url in exclude_urls}
+
+        def launch(name):
+            launched[self._pool.submit(self._query_engine, name, query, exclude_urls)] = name
+
+        pending_names = names[1:] if self.mode == "hedge" else []
+        for name in (names[:1] if self.mode == "hedge" else names):
+            launch(name)
+
+        answered = []
+        while True:
+            outstanding = [future for future in launched if not future.done()]
+            if not outstanding and not pending_names:
+                break
+            timeout = self.hedge_after if pending_names else None
+            done, _ = wait(outstanding, timeout=timeout, return_when=FIRST_COMPLETED) \
+                if outstanding else (set(), set())
+
+            for future in done:
+                if future in answered:
+                    continue
+                answered.append(future)
+                for result in future.result():
+                    url = normalize_url(result.get("url", ""))
+                    if url in excluded:
+                        continue
+                    if url in merged:
+                        snippets = merged[url].setdefault("snippets", [])
+                        snippets.extend(s for s in result.get("snippets", []) if s not in snippets)
+                    else:
+                        merged[url] = dict(result, snippets=list(result.get("snippets", [])))
+
+            if len(merged) >= self.k:
+                break
+            if pending_names and (not done or not outstanding):
+                # Nothing answered within the hedge delay (or the last answer came
+                # up short): fire the next engine
+                launch(pending_names.pop(0))
+
+        return list(merged.values())[:self.k]
+
+    def forward(self, query_or_queries, exclude_urls=None):
+        """Search each query across the configured engines."""
+        queries = [query_or_queries] if isinstance(query_or_queries, str) else list(query_or_queries)
+        collected = []
+        for query in queries:
+            collected.extend(self._search(query, list(exclude_urls or [])))
+        return collected
+
+    def stats(self) -> dict:
+        """Per-engine call, error and latency statistics."""
+        with self._lock:
+            snapshot = {name: dict(stats, latencies=list(stats["latencies"]))
+                        for name, stats in self._stats.items()}
+
+        report = {}
+        for name, stats in snapshot.items():
+            latencies = stats.pop("latencies")
+            if latencies:
+                stats["latency_p50"] = round(percentile(latencies, 50), 3)
+                stats["latency_p95"] = round(percentile(latencies, 95), 3)
+                stats["latency_max"] = round(max(latencies), 3)
+            report[name] = stats
+        return {"mode": self.mode, "engines": report}
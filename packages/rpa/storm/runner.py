@@ -11,11 +11,46 @@ import os
 import sys
 import json
 import argparse
+import contextlib
 import logging
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
+try:
+    from .checkpoint import Checkpoint, create_run_dir
+    from .deadline import DEGRADATIONS, STORM_PHASE_SHARES, Deadline, deadline_litellm_class, is_timeout
+    from .dedup import DEFAULT_THRESHOLD as DEDUP_THRESHOLD, DedupRM
+    from .evidence import EvidenceIndex
+    from .library import DEFAULT_MAX_AGE_DAYS, DEFAULT_SIMILARITY, RESEARCH_ARTIFACTS, ResearchLibrary
+    from .events import EventWriter, result_event, span_listener
+    from .hedging import Hedger, hedged_litellm_class
+    from .llm_cache import DEFAULT_MAX_MB, ResponseCache, cached_litellm_class
+    from .profiles import DEFAULT_PROFILE, ENGINE_KNOBS, PROFILES, resolve_profile
+    from .quota import get_governor, governed_litellm_class
+    from .ratelimit import engine_metrics, get_guard
+    from .retrieval import CompositeRM
+    from .search_cache import CachedRM, SearchCache
+    from .store import ArtifactStore
+    from .telemetry import Tracer, TracedRM, annotate, traced_litellm_class
+except ImportError:  # Executed as a script
+    from checkpoint import Checkpoint, create_run_dir
+    from deadline import DEGRADATIONS, STORM_PHASE_SHARES, Deadline, deadline_litellm_class, is_timeout
+    from dedup import DEFAULT_THRESHOLD as DEDUP_THRESHOLD, DedupRM
+    from evidence import EvidenceIndex
+    from library import DEFAULT_MAX_AGE_DAYS, DEFAULT_SIMILARITY, RESEARCH_ARTIFACTS, ResearchLibrary
+    from events import EventWriter, result_event, span_listener
+    from hedging import Hedger, hedged_litellm_class
+    from llm_cache import DEFAULT_MAX_MB, ResponseCache, cached_litellm_class
+    from profiles import DEFAULT_PROFILE, ENGINE_KNOBS, PROFILES, resolve_profile
+    from quota import get_governor, governed_litellm_class
+    from ratelimit import engine_metrics, get_guard
+    from retrieval import CompositeRM
+    from search_cache import CachedRM, SearchCache
+    from store import ArtifactStore
+    from telemetry import Tracer, TracedRM, annotate, traced_litellm_class
+
 # Load .env file if present
 def load_dotenv():
     """Load environment variables from .env files."""
@@ -49,6 +84,10 @@ class ResilientDuckDuckGoRM:
     """
     A wrapper around DuckDuckGoSearchRM that handles rate limiting and errors gracefully.
     Falls back to empty results instead of crashing on transient errors.
+
+    All instances in a process share one adaptive rate limiter and circuit
+    breaker, so STORM's worker threads back off together instead of each
+    hammering the endpoint on its own schedule.
     """
 
     def __init__(self, k: int = 10, safe_search: str = "moderate", region: str = "us-en"):
@@ -56,7 +95,8 @@ class ResilientDuckDuckGoRM:
         self._rm = DuckDuckGoSearchRM(k=k, safe_search=safe_search, region=region)
         self.k = k
         self._retry_count = 3
-        self._retry_delay = 2  # seconds
+        self._retry_delay = 2  # seconds, base of the exponential backoff
+        self._guard = get_guard("duckduckgo")
 
     def __call__(self, *args, **kwargs):
         """Make the wrapper callable, delegating to forward."""
@@ -65,35 +105,45 @@ class ResilientDuckDuckGoRM:
     def forward(self, query_or_queries, exclude_urls=None):
         """
         Execute search with retry logic and error handling.
-        """
-        import time
 
+        Returns no results, without touching the network, while the circuit
+        breaker is open. STORM's Retriever iterates the returned result
+        dicts, so "no results" is an empty list.
+        """
         for attempt in range(self._retry_count):
+            if not self._guard.allow():
+                logger.warning("DuckDuckGo circuit breaker is open, skipping search")
+                annotate(retries=attempt, short_circuited=True, failed=True)
+                return []
+
+            self._guard.acquire()
             try:
-                return self._rm.forward(query_or_queries, exclude_urls=exclude_urls)
+                results = self._rm.forward(query_or_queries, exclude_urls=exclude_urls)
+                self._guard.record_success()
+                annotate(retries=attempt)
+                return results
             except Exception as e:
-                error_str = str(e)
-                logger.warning(f"DuckDuckGo search attempt {attempt + 1} failed: {error_str}")
-
-                # Check for rate limiting
-                if "ratelimit" in error_str.lower() or "rate" in error_str.lower():
-                    wait_time = self._retry_delay * (attempt + 1)
-                    logger.info(f"Rate limited. Waiting {wait_time}s before retry...")
-                    time.sleep(wait_time)
-                elif attempt < self._retry_count - 1:
-                    time.sleep(self._retry_delay)
-                else:
-                    # Final attempt failed, return empty results
-                    logger.error(f"DuckDuckGo search failed after {self._retry_count} attempts")
-                    # Return empty results structure that STORM expects
-                    if isinstance(query_or_queries, str):
-                        return {query_or_queries: []}
-                    return {q: [] for q in query_or_queries}
-
-        # Fallback
-        if isinstance(query_or_queries, str):
-            return {query_or_queries: []}
-        return {q: [] for q in query_or_queries}
+                logger.warning(f"DuckDuckGo search attempt {attempt + 1} failed: {e}")
+                self._guard.record_failure(e)
+
+                if attempt < self._retry_count - 1:
+                    self._guard.backoff(attempt, base=self._retry_delay)
+
+        logger.error(f"DuckDuckGo search failed after {self._retry_count} attempts")
+        annotate(retries=self._retry_count - 1, failed=True)
+        return []
+
+
+SEARCH_ENGINES = ("duckduckgo", "you", "bing", "tavily")
+
+# STORM pipeline phases, in order, with the artifacts each one leaves in the
+# article directory and the runner.run flag that executes it
+STORM_PHASES = [
+    ("research", ("conversation_log.json", "raw_search_results.json"), "do_research"),
+    ("outline", ("storm_gen_outline.txt",), "do_generate_outline"),
+    ("article", ("storm_gen_article.txt", "url_to_info.json"), "do_generate_article"),
+    ("polish", ("storm_gen_article_polished.txt",), "do_polish_article"),
+]
 
 
 class ResearchPaperAgent:
@@ -112,13 +162,67 @@ class ResearchPaperAgent:
         output_dir: str = "./output",
         model: str = "gpt-4o",
         search_engine: str = "duckduckgo",
-        max_pages: int = 12
+        max_pages: int = 12,
+        cache_dir: Optional[str] = None,
+        cache_max_mb: float = DEFAULT_MAX_MB,
+        search_cache: Optional[str] = None,
+        search_ttl: Optional[float] = None,
+        hedge_after: Optional[float] = None,
+        quota: bool = False,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        hedge_percentile: Optional[float] = None,
+        dedup_threshold: Optional[float] = DEDUP_THRESHOLD,
+        evidence: Optional[str] = None,
+        library: Optional[str] = None,
+        fresh_research: bool = False,
+        library_similarity: float = DEFAULT_SIMILARITY,
+        library_max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        profile: Optional[str] = None,
+        max_thread_num: Optional[int] = None
     ):
         self.output_dir = Path(output_dir)
         self.model = model
         self.search_engine = search_engine
         self.max_pages = max_pages
+        self.hedge_after = hedge_after
+        # STORM engine settings: a named profile (see profiles.py) or a
+        # JSON file written by its autotune command
+        self.profile_name = profile or DEFAULT_PROFILE
+        self.profile = resolve_profile(profile, max_thread_num=max_thread_num)
+        self.dedup_threshold = dedup_threshold
+        self.evidence = EvidenceIndex(evidence) if evidence else None
+        # Research of earlier runs on the same or a near-identical topic is
+        # reused instead of repeated, unless fresh_research is set
+        self.library = ResearchLibrary(library) if library else None
+        self.fresh_research = fresh_research
+        self.library_similarity = library_similarity
+        self.library_max_age_days = library_max_age_days
+        self._lm_configs = None
+        self._rm = None
+        self._dedup = None
+        # Traced models and retrieval modules, bound to each run's tracer,
+        # and the models, bound to its deadline
+        self._traced = []
+        self._models = []
+        # Papers share the configured models, retrieval and dedup state, so
+        # concurrent generate calls (see worker.py) run one at a time
+        self._generate_lock = threading.Lock()
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.cache = ResponseCache(cache_dir, max_mb=cache_max_mb) if cache_dir else None
+        self.search_cache = None
+        if search_cache:
+            ttls = None
+            if search_ttl is not None:
+                ttls = {engine: search_ttl for engine in SEARCH_ENGINES}
+            self.search_cache = SearchCache(search_cache, ttls=ttls)
+        # Model calls share the process-wide quota governor, so agents in
+        # the same process (see worker.py and batch.py) draw on one budget
+        self.quota = None
+        if quota or rpm or tpm:
+            self.quota = get_governor()
+            self.quota.configure(rpm=rpm, tpm=tpm)
+        self.hedger = Hedger(hedge_percentile) if hedge_percentile else None
 
     def _load_api_keys(self) -> dict:
         """Load API keys from environment variables."""
@@ -131,29 +235,104 @@ class ResearchPaperAgent:
         }
         return {k: v for k, v in keys.items() if v}
 
-    def _get_retrieval_module(self, api_keys: dict):
-        """Initialize the appropriate retrieval module based on available keys."""
-        if self.search_engine == "you" and api_keys.get("you"):
+    def _create_engine(self, engine: str, api_keys: dict):
+        """Initialize one search engine's retrieval module, or None if its key is missing."""
+        if engine == "you" and api_keys.get("you"):
             from knowledge_storm.rm import YouRM
             logger.info("Using You.com search")
-            return YouRM(ydc_api_key=api_keys["you"], k=10)
-        elif self.search_engine == "bing" and api_keys.get("bing"):
+            return YouRM(ydc_api_key=api_keys["you"], k=self.profile["search_top_k"])
+        elif engine == "bing" and api_keys.get("bing"):
             from knowledge_storm.rm import BingSearch
             logger.info("Using Bing search")
-            return BingSearch(bing_search_api_key=api_keys["bing"], k=10)
-        elif self.search_engine == "tavily" and api_keys.get("tavily"):
+            return BingSearch(bing_search_api_key=api_keys["bing"], k=self.profile["search_top_k"])
+        elif engine == "tavily" and api_keys.get("tavily"):
             from knowledge_storm.rm import TavilySearchRM
             logger.info("Using Tavily search")
-            return TavilySearchRM(tavily_api_key=api_keys["tavily"], k=10)
-        else:
-            # Default to DuckDuckGo with error-resilient wrapper
+            return TavilySearchRM(tavily_api_key=api_keys["tavily"], k=self.profile["search_top_k"])
+        elif engine == "duckduckgo":
+            # DuckDuckGo with error-resilient wrapper
             logger.info("Using DuckDuckGo search (no API key required)")
-            return ResilientDuckDuckGoRM(k=10, safe_search="moderate", region="us-en")
+            return ResilientDuckDuckGoRM(k=self.profile["search_top_k"], safe_search="moderate", region="us-en")
+        return None
+
+    def _get_retrieval_module(self, api_keys: dict):
+        """
+        Initialize the retrieval module based on available keys.
+
+        ``search_engine`` may name several comma-separated engines, in which
+        case they are combined in a CompositeRM: queried concurrently, or
+        hedged in the given order when ``hedge_after`` is set. Each engine is
+        fronted by the search cache when enabled, and traced per query.
+        """
+        engines = {}
+        for name in (e.strip() for e in self.search_engine.split(",")):
+            rm = self._create_engine(name, api_keys)
+            if rm is None:
+                logger.warning(f"No API key for {name} search, skipping it")
+                continue
+            if self.search_cache is not None:
+                region = "us-en" if name == "duckduckgo" else None
+                rm = CachedRM(rm, self.search_cache, name, k=self.profile["search_top_k"], region=region)
+            engines[name] = TracedRM(rm, name)
+
+        if not engines:
+            # Default to DuckDuckGo, which needs no API key
+            rm = self._create_engine("duckduckgo", api_keys)
+            if self.search_cache is not None:
+                rm = CachedRM(
+                    rm, self.search_cache, "duckduckgo", k=self.profile["search_top_k"], region="us-en"
+                )
+            engines["duckduckgo"] = TracedRM(rm, "duckduckgo")
+        self._traced.extend(engines.values())
+
+        if len(engines) == 1:
+            rm = next(iter(engines.values()))
+        else:
+            mode = "hedge" if self.hedge_after is not None else "fanout"
+            logger.info(f"Combining {', '.join(engines)} search ({mode})")
+            rm = CompositeRM(
+                engines,
+                k=self.profile["search_top_k"],
+                mode=mode,
+                hedge_after=self.hedge_after if self.hedge_after is not None else 2.0
+            )
+
+        if self.dedup_threshold is not None:
+            self._dedup = DedupRM(rm, threshold=self.dedup_threshold)
+            return self._dedup
+        return rm
+
+    def _make_lm(self, hedge: bool = False, **kwargs):
+        """
+        Create a LitellmModel that reports its calls to the active tracer,
+        backed by the response cache and admitted by the quota governor
+        when enabled. Cache hits never wait for quota. With ``hedge``, slow
+        calls are duplicated when LLM hedging is enabled. Calls time out at
+        the active run's deadline, if it has one.
+        """
+        from knowledge_storm.lm import LitellmModel
+
+        hedge = hedge and self.hedger is not None
+        model_class = deadline_litellm_class(LitellmModel)
+        if self.quota is not None:
+            model_class = governed_litellm_class(model_class)
+        if hedge:
+            model_class = hedged_litellm_class(model_class)
+        if self.cache is not None:
+            model_class = cached_litellm_class(model_class)
+
+        model = traced_litellm_class(model_class)(**kwargs)
+        self._traced.append(model)
+        self._models.append(model)
+        if self.cache is not None:
+            model.response_cache = self.cache
+        if hedge:
+            model.hedger = self.hedger
+        return model
 
     def _configure_language_models(self, api_keys: dict):
         """Configure language models for STORM pipeline."""
         from knowledge_storm import STORMWikiLMConfigs
-        from knowledge_storm.lm import LitellmModel
 
         lm_configs = STORMWikiLMConfigs()
 
@@ -167,17 +346,19 @@ class ResearchPaperAgent:
                 "top_p": 0.9,
             }
 
-            # Use Claude Haiku for conversation simulation (faster, cheaper)
-            conv_model = LitellmModel(
+            # Use Claude Haiku for conversation simulation (faster, cheaper);
+            # its short turns are the ones worth hedging
+            conv_model = self._make_lm(
                 model="claude-3-haiku-20240307",
-                max_tokens=500,
+                max_tokens=self.profile["conv_max_tokens"],
+                hedge=True,
                 **model_kwargs
             )
 
             # Use Claude Sonnet for complex tasks
-            main_model = LitellmModel(
+            main_model = self._make_lm(
                 model="claude-3-5-sonnet-20241022",
-                max_tokens=3000,
+                max_tokens=self.profile["main_max_tokens"],
                 **model_kwargs
             )
 
@@ -191,16 +372,17 @@ class ResearchPaperAgent:
             }
 
             # Use GPT-3.5-turbo for conversation simulation (faster, cheaper)
-            conv_model = LitellmModel(
+            conv_model = self._make_lm(
                 model="gpt-3.5-turbo",
-                max_tokens=500,
+                max_tokens=self.profile["conv_max_tokens"],
+                hedge=True,
                 **model_kwargs
             )
 
             # Use GPT-4o for complex tasks
-            main_model = LitellmModel(
+            main_model = self._make_lm(
                 model=self.model,
-                max_tokens=3000,
+                max_tokens=self.profile["main_max_tokens"],
                 **model_kwargs
             )
         else:
@@ -217,16 +399,106 @@ class ResearchPaperAgent:
 
         return lm_configs
 
-    def generate(self, topic: str) -> dict:
+    @staticmethod
+    def _article_dir(topic_output_dir: Path, topic: str) -> Path:
+        """Locate the per-article directory STORM writes its artifacts into."""
+        # STORM names it after the topic with spaces and slashes replaced
+        storm_name = topic.replace(" ", "_").replace("/", "_")[:125]
+        for name in (storm_name, topic):
+            if (topic_output_dir / name).is_dir():
+                return topic_output_dir / name
+        return topic_output_dir / storm_name
+
+    def _reuse_research(self, topic: str, checkpoint: Checkpoint, article_dir: Path) -> Optional[dict]:
+        """
+        Seed ``article_dir`` with research from the library and mark the
+        research phase done, when the phase is still pending and a match
+        exists. Returns what was reused, or None.
+        """
+        if self.library is None or self.fresh_research:
+            return None
+        if checkpoint.is_done("research", *(article_dir / name for name in RESEARCH_ARTIFACTS)):
+            return None
+
+        entry = self.library.find(
+            topic, min_similarity=self.library_similarity, max_age_days=self.library_max_age_days
+        )
+        if entry is None:
+            logger.info("No reusable research in the library; researching from scratch")
+            return None
+
+        self.library.seed(entry, article_dir)
+        reused = {
+            "reused_from": entry["source"] or f"library #{entry['id']}",
+            "reused_topic": entry["topic"],
+            "similarity": entry["similarity"],
+            "age_days": entry["age_days"],
+        }
+        checkpoint.mark_done("research", **reused)
+        logger.info(
+            f"Reusing research on {entry['topic']!r} ({entry['age_days']} days old, "
+            f"similarity {entry['similarity']})"
+        )
+        return reused
+
+    def generate(
+        self,
+        topic: Optional[str],
+        resume_dir: Optional[str] = None,
+        trace_path: Optional[str] = None,
+        on_event=None,
+        deadline: Optional[float] = None,
+        degrade=None
+    ) -> dict:
         """
         Generate a research paper on the given topic.
 
         Args:
             topic: The research topic to generate a paper about
+            resume_dir: Output directory of an interrupted run to resume. STORM
+                phases whose artifacts already exist are skipped and the
+                pipeline restarts at the first missing one; the topic defaults
+                to the one the run started with.
+            trace_path: Append every phase, LLM call and search query span
+                to this NDJSON file (a summary is always in metadata.json)
+            on_event: Called with progress events (``start``, ``phase_start``,
+                ``phase_skip``, ``phase_end``, ``search`` and ``llm_call``; see
+                events.py), from whichever thread produced them
+            deadline: Time budget in seconds, split between the STORM phases;
+                model calls time out when it is spent (see deadline.py)
+            degrade: Degradations allowed when the run falls behind
+                (default: all): ``reduce_research`` runs fewer perspectives
+                and turns, ``skip_polish`` returns the unpolished article
 
         Returns:
             dict containing the generated paper and metadata
         """
+        with self._generate_lock:
+            return self._generate(
+                topic,
+                resume_dir=resume_dir,
+                trace_path=trace_path,
+                on_event=on_event,
+                deadline=deadline,
+                degrade=degrade
+            )
+
+    def _generate(
+        self,
+        topic: Optional[str],
+        resume_dir: Optional[str],
+        trace_path: Optional[str],
+        on_event,
+        deadline: Optional[float],
+        degrade
+    ) -> dict:
+        timer = Deadline(deadline, STORM_PHASE_SHARES, degrade) if deadline else None
+        checkpoint = Checkpoint.load(resume_dir) if resume_dir else None
+        if checkpoint is not None:
+            topic = topic or checkpoint.info.get("topic")
+            if not topic:
+                raise ValueError(f"No topic recorded in {resume_dir}; pass the topic explicitly")
+
         logger.info(f"Starting research paper generation for: {topic}")
         logger.info(f"Target length: ~{self.max_pages} pages")
 
@@ -236,7 +508,9 @@ class ResearchPaperAgent:
             logger.error("knowledge-storm package not installed")
             logger.info("Installing knowledge-storm...")
             import subprocess
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "knowledge-storm"])
+            subprocess.check_call(
+                [sys.executable, "-m", "pip", "install", "knowledge-storm"], stdout=sys.stderr
+            )
             from knowledge_storm import STORMWikiRunnerArguments, STORMWikiRunner
 
         api_keys = self._load_api_keys()
@@ -245,62 +519,139 @@ class ResearchPaperAgent:
                 "Missing API key. Please set OPENAI_API_KEY or ANTHROPIC_API_KEY"
             )
 
-        # Configure models
-        lm_configs = self._configure_language_models(api_keys)
-
-        # Configure retrieval
-        rm = self._get_retrieval_module(api_keys)
-
-        # Sanitize topic for directory name
-        safe_topic = "".join(c if c.isalnum() or c in " -_" else "_" for c in topic)
-        safe_topic = safe_topic.replace(" ", "_")[:50]
+        cache_before = self.cache.stats() if self.cache is not None else None
+        hedged_before = self.hedger.count() if self.hedger is not None else 0
+        search_before = self.search_cache.stats() if self.search_cache is not None else None
+
+        # Configure models and retrieval once; a long-lived agent (see worker.py)
+        # reuses them, and their HTTP connection pools, across papers
+        if self._lm_configs is None:
+            self._lm_configs = self._configure_language_models(api_keys)
+            self._rm = self._get_retrieval_module(api_keys)
+        lm_configs = self._lm_configs
+        rm = self._rm
+        composite = rm._rm if isinstance(rm, DedupRM) else rm
+        if self._dedup is not None:
+            # Snippets are merged across the searches of one paper, not across papers
+            self._dedup.reset()
+            dedup_before = self._dedup.stats()
+
+        if checkpoint is not None:
+            topic_output_dir = Path(resume_dir)
+            timestamp = checkpoint.info.get("timestamp") or datetime.now().strftime("%Y%m%d_%H%M%S")
+            logger.info(f"Resuming run in {topic_output_dir}")
+        else:
+            # Create output directory for this topic
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            topic_output_dir = create_run_dir(self.output_dir, topic, timestamp)
+            checkpoint = Checkpoint.start(
+                topic_output_dir,
+                topic=topic,
+                timestamp=timestamp,
+                model=self.model,
+                search_engine=self.search_engine,
+            )
 
-        # Create output directory for this topic
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        topic_output_dir = self.output_dir / f"{safe_topic}_{timestamp}"
-        topic_output_dir.mkdir(parents=True, exist_ok=True)
+        article_dir = self._article_dir(topic_output_dir, topic)
+        reused = self._reuse_research(topic, checkpoint, article_dir)
 
-        # Configure runner arguments
+        # Configure runner arguments; research that cannot fit the deadline
+        # is cut down before STORM builds its conversation module from them
+        settings = self.profile
+        research_artifacts = (article_dir / name for name in STORM_PHASES[0][1])
+        if timer is not None and not checkpoint.is_done("research", *research_artifacts):
+            settings = timer.reduce_research(settings)
         engine_args = STORMWikiRunnerArguments(
             output_dir=str(topic_output_dir),
-            max_conv_turn=5,
-            max_perspective=4,
-            search_top_k=10,
-            max_thread_num=4,
+            **{knob: settings[knob] for knob in ENGINE_KNOBS}
         )
 
         # Initialize runner
         runner = STORMWikiRunner(engine_args, lm_configs, rm)
-
-        logger.info("Phase 1: Research and perspective gathering...")
-        logger.info("Phase 2: Outline generation...")
-        logger.info("Phase 3: Article generation...")
-        logger.info("Phase 4: Polish and refinement...")
-
-        # Execute the STORM pipeline
-        runner.run(
-            topic=topic,
-            do_research=True,
-            do_generate_outline=True,
-            do_generate_article=True,
-            do_polish_article=True,
+        tracer = Tracer(
+            trace_path,
+            run=topic_output_dir.name,
+            on_span=span_listener(on_event) if on_event is not None else None
         )
+        # STORM calls the models and search engines on its own threads,
+        # which do not see the tracer and deadline activated below
+        for component in self._traced:
+            component.tracer = tracer
+        for model in self._models:
+            model.deadline = timer
+        emit = on_event or (lambda event: None)
+        emit({"event": "start", "topic": topic, "output_dir": str(topic_output_dir)})
+
+        # Execute the STORM pipeline one phase at a time, so a crash leaves a
+        # checkpoint behind and a resumed run restarts at the first missing phase
+        pending = False
+        ran_phases = []
+        with tracer.activate(), timer.activate() if timer is not None else contextlib.nullcontext():
+            for number, (phase, artifacts, flag) in enumerate(STORM_PHASES, start=1):
+                pending = pending or not checkpoint.is_done(
+                    phase, *(article_dir / name for name in artifacts)
+                )
+                if not pending:
+                    logger.info(f"Phase {number}: {phase} already complete, skipping")
+                    emit({"event": "phase_skip", "phase": phase,
+                          **(reused if phase == "research" and reused else {})})
+                    continue
+
+                if phase == "polish" and timer is not None and timer.skip_polish():
+                    # Left pending, so resuming the run polishes the article
+                    emit({"event": "phase_skip", "phase": phase, "degraded": True})
+                    continue
+
+                logger.info(f"Phase {number}: {phase}...")
+                emit({"event": "phase_start", "phase": phase})
+                checkpoint.begin(phase)
+                try:
+                    with tracer.span(phase, "phase"):
+                        runner.run(
+                            topic=topic,
+                            **{run_flag: run_flag == flag for _, _, run_flag in STORM_PHASES}
+                        )
+                except Exception as e:
+                    if phase != "polish" or timer is None or not timer.allows("skip_polish") \
+                            or not is_timeout(e):
+                        raise
+                    timer.degrade("skip_polish", phase, error=str(e))
+                    emit({"event": "phase_skip", "phase": phase, "degraded": True})
+                    continue
+                checkpoint.mark_done(phase)
+                ran_phases.append(phase)
+                if phase == "research" and self.library is not None:
+                    try:
+                        self.library.add(
+                            article_dir, topic, search_engine=self.search_engine,
+                            source=str(topic_output_dir)
+                        )
+                    except OSError as e:
+                        logger.warning(f"Could not add the research to the library: {e}")
+                seconds = checkpoint.phase_seconds()[phase]
+                logger.info(f"Phase {number}: {phase} done in {seconds}s")
+                emit({"event": "phase_end", "phase": phase, "seconds": seconds})
 
         # Post-processing
-        runner.post_run()
-        runner.summary()
+        if ran_phases:
+            runner.post_run()
+            runner.summary()
+
+        # Keep the sources STORM collected for grounding later papers (see evidence.py)
+        evidence_added = self.evidence.add_run(topic_output_dir, topic) if self.evidence is not None else None
 
         # Read generated content
-        article_path = topic_output_dir / topic / "storm_gen_article_polished.txt"
-        outline_path = topic_output_dir / topic / "storm_gen_outline.txt"
+        article_dir = self._article_dir(topic_output_dir, topic)
+        article_path = article_dir / "storm_gen_article_polished.txt"
+        outline_path = article_dir / "storm_gen_outline.txt"
 
         article_content = ""
         outline_content = ""
 
+        if not article_path.exists() and (article_dir / "storm_gen_article.txt").exists():
+            article_path = article_dir / "storm_gen_article.txt"
         if article_path.exists():
             article_content = article_path.read_text(encoding="utf-8")
-        elif (topic_output_dir / topic / "storm_gen_article.txt").exists():
-            article_content = (topic_output_dir / topic / "storm_gen_article.txt").read_text(encoding="utf-8")
 
         if outline_path.exists():
             outline_content = outline_path.read_text(encoding="utf-8")
@@ -313,8 +664,34 @@ class ResearchPaperAgent:
             "output_dir": str(topic_output_dir),
             "article": article_content,
             "outline": outline_content,
+            "article_path": str(article_path) if article_path.exists() else None,
+            "outline_path": str(outline_path) if outline_path.exists() else None,
             "model": self.model,
             "search_engine": self.search_engine,
+            "profile": dict(settings, name=self.profile_name),
+            "resumed": bool(resume_dir),
+            "phases_run": ran_phases,
+            "phase_seconds": checkpoint.phase_seconds(),
+            "cache": {
+                name: count - cache_before[name] for name, count in self.cache.stats().items()
+            } if self.cache is not None else None,
+            "search_cache": {
+                name: count - search_before[name]
+                for name, count in self.search_cache.stats().items()
+            } if self.search_cache is not None else None,
+            "search_engines": engine_metrics(),
+            "retrieval": composite.stats() if isinstance(composite, CompositeRM) else None,
+            "dedup": {
+                name: count - dedup_before[name] for name, count in self._dedup.stats().items()
+            } if self._dedup is not None else None,
+            "evidence": {
+                "index": str(self.evidence.root), "added": evidence_added
+            } if self.evidence is not None else None,
+            "research_reused": reused,
+            "deadline": timer.report() if timer is not None else None,
+            "telemetry": tracer.summary(),
+            "quota": self.quota.metrics() if self.quota is not None else None,
+            "hedging": self.hedger.stats(since=hedged_before) if self.hedger is not None else None,
             "version": self.VERSION,
             "author": self.AUTHOR,
         }
@@ -339,7 +716,6 @@ def main():
 
     parser.add_argument(
         "--topic", "-t",
-        required=True,
         help="The research topic to generate a paper about"
     )
 
@@ -356,11 +732,43 @@ def main():
         help="Language model to use (default: gpt-4o)"
     )
 
+    def search_engines(value):
+        engines = [engine.strip() for engine in value.split(",")]
+        unknown = [engine for engine in engines if engine not in SEARCH_ENGINES]
+        if unknown:
+            raise argparse.ArgumentTypeError(
+                f"unknown search engine(s) {', '.join(unknown)}; choose from {', '.join(SEARCH_ENGINES)}"
+            )
+        return ",".join(engines)
+
     parser.add_argument(
         "--search", "-s",
         default="duckduckgo",
-        choices=["duckduckgo", "you", "bing", "tavily"],
-        help="Search engine to use (default: duckduckgo)"
+        type=search_engines,
+        help="Search engine to use, or a comma-separated list to combine several "
+             f"({', '.join(SEARCH_ENGINES)}; default: duckduckgo)"
+    )
+
+    parser.add_argument(
+        "--hedge-after",
+        type=float,
+        help="With several engines, query them in order and only fire the next one "
+             "after this many seconds without an answer (default: query all at once)"
+    )
+
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=DEDUP_THRESHOLD,
+        metavar="J",
+        help="Similarity (0-1, shingle Jaccard) at which retrieved snippets count as "
+             f"near-duplicates and are collapsed (default: {DEDUP_THRESHOLD})"
+    )
+
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Pass retrieved snippets to STORM without deduplication"
     )
 
     parser.add_argument(
@@ -370,12 +778,150 @@ def main():
         help="Target number of pages (default: 12)"
     )
 
+    parser.add_argument(
+        "--resume",
+        metavar="DIR",
+        help="Resume an interrupted run from its output directory"
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory for the persistent LLM response cache (disabled by default)"
+    )
+
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_MB,
+        help=f"Size cap for the response cache in MB (default: {DEFAULT_MAX_MB})"
+    )
+
+    parser.add_argument(
+        "--search-cache",
+        metavar="PATH",
+        help="SQLite file caching search results across runs (disabled by default)"
+    )
+
+    parser.add_argument(
+        "--search-ttl",
+        type=float,
+        help="Seconds cached search results stay fresh (default: per engine, 6-24h)"
+    )
+
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Append phase, LLM call and search query spans to this NDJSON file"
+    )
+
+    parser.add_argument(
+        "--quota",
+        action="store_true",
+        help="Admit model calls against per-model requests/tokens-per-minute budgets"
+    )
+
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        help="Requests per minute allowed per model (implies --quota)"
+    )
+
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        help="Tokens per minute allowed per model (implies --quota)"
+    )
+
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        metavar="P",
+        help="Duplicate conversation-turn LLM calls still running at the P-th percentile "
+             "of recent latency (e.g. 95; disabled by default)"
+    )
+
+    parser.add_argument(
+        "--evidence",
+        metavar="DIR",
+        help="Add the sources STORM collected to this evidence index (see storm/evidence.py)"
+    )
+
+    parser.add_argument(
+        "--library",
+        metavar="DIR",
+        help="Research library (see storm/library.py): reuse recent research on the same or "
+             "a near-identical topic instead of repeating it, and add new research to it"
+    )
+
+    parser.add_argument(
+        "--fresh-research",
+        action="store_true",
+        help="Research from scratch even when the library has a match"
+    )
+
+    parser.add_argument(
+        "--library-similarity",
+        type=float,
+        default=DEFAULT_SIMILARITY,
+        help=f"Minimum topic similarity (0-1) for reusing research (default: {DEFAULT_SIMILARITY})"
+    )
+
+    parser.add_argument(
+        "--library-max-age-days",
+        type=float,
+        default=DEFAULT_MAX_AGE_DAYS,
+        help=f"Oldest research to reuse, in days (default: {DEFAULT_MAX_AGE_DAYS})"
+    )
+
+    parser.add_argument(
+        "--profile",
+        default=DEFAULT_PROFILE,
+        metavar="NAME|FILE",
+        help=f"STORM engine profile: {', '.join(PROFILES)}, or a JSON file from "
+             f"'storm/profiles.py autotune --write' (default: {DEFAULT_PROFILE})"
+    )
+
+    parser.add_argument(
+        "--max-thread-num",
+        type=int,
+        help="Override the profile's STORM thread count"
+    )
+
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Time budget for the paper: model calls time out when it is spent, and a run "
+             "that falls behind degrades by the --degrade policies"
+    )
+
+    parser.add_argument(
+        "--degrade",
+        default=",".join(DEGRADATIONS),
+        metavar="POLICIES",
+        help=f"Comma-separated degradations allowed under --deadline, or 'none' "
+             f"(default: {','.join(DEGRADATIONS)}; cap_pages applies to the direct generator only)"
+    )
+
     parser.add_argument(
         "--json",
         action="store_true",
         help="Output result as JSON"
     )
 
+    parser.add_argument(
+        "--store",
+        metavar="DIR",
+        help="Add the finished paper to the artifact store in DIR (see storm/store.py)"
+    )
+
+    parser.add_argument(
+        "--events",
+        action="store_true",
+        help="Write newline-delimited JSON progress events to stdout; the final result "
+             "event points to the output files instead of inlining the paper"
+    )
+
     parser.add_argument(
         "--version", "-v",
         action="version",
@@ -384,7 +930,14 @@ def main():
 
     args = parser.parse_args()
 
-    print(f"""
+    if not args.topic and not args.resume:
+        parser.error("--topic is required")
+
+    events = EventWriter() if args.events else None
+    if events is not None:
+        logging.getLogger().addHandler(events.log_handler())
+    else:
+        print(f"""
 ╔══════════════════════════════════════════════════════════════════╗
 ║         Research Paper Agent (RPA) v{ResearchPaperAgent.VERSION}                      ║
 ║         Copyright (c) 2025 Aditya Patange                        ║
@@ -397,16 +950,43 @@ def main():
             output_dir=args.output,
             model=args.model,
             search_engine=args.search,
-            max_pages=args.pages
+            max_pages=args.pages,
+            cache_dir=args.cache_dir,
+            cache_max_mb=args.cache_max_mb,
+            search_cache=args.search_cache,
+            search_ttl=args.search_ttl,
+            hedge_after=args.hedge_after,
+            quota=args.quota,
+            rpm=args.rpm,
+            tpm=args.tpm,
+            hedge_percentile=args.hedge_percentile,
+            dedup_threshold=None if args.no_dedup else args.dedup_threshold,
+            evidence=args.evidence,
+            library=args.library,
+            fresh_research=args.fresh_research,
+            library_similarity=args.library_similarity,
+            library_max_age_days=args.library_max_age_days,
+            profile=args.profile,
+            max_thread_num=args.max_thread_num
         )
 
-        result = agent.generate(args.topic)
+        # STORM prints its own summary; keep stdout for the event stream
+        with contextlib.redirect_stdout(sys.stderr) if events is not None else contextlib.nullcontext():
+            result = agent.generate(
+                args.topic, resume_dir=args.resume, trace_path=args.trace, on_event=events,
+                deadline=args.deadline, degrade=args.degrade
+            )
+
+        if args.store:
+            result["stored_as"] = ArtifactStore(args.store).ingest(result["output_dir"])["run"]
 
-        if args.json:
+        if events is not None:
+            events.emit(result_event(result))
+        elif args.json:
             print(json.dumps(result, indent=2))
         else:
             print(f"\n{'='*60}")
-            print(f"RESEARCH PAPER: {args.topic}")
+            print(f"RESEARCH PAPER: {result['topic']}")
             print(f"{'='*60}\n")
             print(result.get("article", "No article generated"))
             print(f"\n{'='*60}")
@@ -415,7 +995,9 @@ def main():
 
     except Exception as e:
         logger.error(f"Failed to generate research paper: {e}")
-        if args.json:
+        if events is not None:
+            events.emit({"event": "error", "error": str(e), "type": type(e).__name__})
+        elif args.json:
             print(json.dumps({"success": False, "error": str(e)}))
         sys.exit(1)
 
@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+"""
+Research Paper Agent (RPA) - Job Scheduler
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+A persistent queue of paper jobs worked off by a pool of processes.
+``STORMWikiRunner.run`` is synchronous and partly CPU-bound, so agents in
+one process serialize; this runs one per process instead.
+
+Jobs live in ``jobs.sqlite`` (WAL mode) in the queue directory, so they
+survive restarts and any process can submit, cancel or inspect them:
+
+* higher ``priority`` first, then first come, first served;
+* failed jobs are retried with jittered exponential backoff, up to
+  ``max_attempts``;
+* cancelling a queued job drops it, and cancelling a running one stops
+  its worker process (which is replaced);
+* jobs of a worker that died, or of a scheduler that was killed, are
+  picked up again once their heartbeat goes stale.
+
+Each worker process keeps its generators warm across jobs (see worker.py).
+The on-disk caches it is given (response cache, search cache, research
+library, evidence index, artifact store) are all safe to share between
+processes.
+
+    python3 storm/scheduler.py --queue ./queue submit "Sonic Symbols in Yoga" --priority 5
+    python3 storm/scheduler.py --queue ./queue submit --topics-file topics.jsonl
+    python3 storm/scheduler.py --queue ./queue run --workers 8 --search-cache search.db --library ./library
+    python3 storm/scheduler.py --queue ./queue status
+    python3 storm/scheduler.py --queue ./queue cancel 12
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import logging
+import threading
+import multiprocessing
+from pathlib import Path
+from typing import Optional
+
+try:
+    from .ratelimit import backoff_delay
+except ImportError:  # Executed as a script
+    from ratelimit import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+VERSION = "1.0.0"
+AUTHOR = "Aditya Patange"
+
+GENERATORS = ("storm", "direct")
+STATES = ("queued", "running", "done", "failed", "cancelled")
+
+DEFAULT_MAX_ATTEMPTS = 3
+HEARTBEAT_SECONDS = 15.0
+# A running job whose heartbeat is this old has lost its worker
+STALE_SECONDS = 120.0
+RETRY_BASE_SECONDS = 30.0
+RETRY_CAP_SECONDS = 600.0
+THROUGHPUT_WINDOW = 3600.0
+
+
+def worker_name(pid: int) -> str:
+    """How a worker process identifies itself in the queue."""
+    return f"{socket.gethostname()}:{pid}"
+
+
+class JobQueue:
+    """
+    Paper jobs in ``root/jobs.sqlite``. Safe to share between threads and
+    processes; claiming a job is atomic.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.path = self.root / "jobs.sqlite"
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                topic TEXT NOT NULL,
+                generator TEXT NOT NULL,
+                params TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                state TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                created REAL NOT NULL,
+                not_before REAL NOT NULL DEFAULT 0,
+                started REAL,
+                finished REAL,
+                heartbeat REAL,
+                worker TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS jobs_next ON jobs (state, priority DESC, id);
+            CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished);"""
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections are not thread-safe."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        """
+        An IMMEDIATE transaction: it takes the write lock up front, so a
+        read-then-update (such as claiming a job) cannot race another process.
+        """
+        conn = self._conn()
+
+        class _Transaction:
+            def __enter__(self):
+                conn.execute("BEGIN IMMEDIATE")
+                return conn
+
+            def __exit__(self, exc_type, exc, tb):
+                conn.execute("ROLLBACK" if exc_type else "COMMIT")
+                return False
+
+        return _Transaction()
+
+    @staticmethod
+    def _job(row) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def submit(
+        self,
+        topic: str,
+        generator: str = "storm",
+        params: Optional[dict] = None,
+        priority: int = 0,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ) -> int:
+        """
+        Queue a paper on ``topic``. ``params`` are the worker request params
+        for ``generator`` (see worker.py) and override the scheduler's
+        defaults. Returns the job id.
+        """
+        if generator not in GENERATORS:
+            raise ValueError(f"Unknown generator: {generator} (expected one of {', '.join(GENERATORS)})")
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1, got {max_attempts}")
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (topic, generator, params, priority, max_attempts, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (topic, generator, json.dumps(params or {}), priority, max_attempts, time.time())
+            )
+        logger.info(f"Queued job #{cursor.lastrowid}: {topic!r} ({generator}, priority {priority})")
+        return cursor.lastrowid
+
+    def job(self, job_id: int) -> Optional[dict]:
+        return self._job(self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def jobs(self, state: Optional[str] = None, limit: int = 100) -> list:
+        """Jobs in ``state`` (default: all), most recent first."""
+        if state is not None and state not in STATES:
+            raise ValueError(f"Unknown state: {state} (expected one of {', '.join(STATES)})")
+        query = "SELECT * FROM jobs" + (" WHERE state = ?" if state else "") + " ORDER BY id DESC LIMIT ?"
+        args = (state, limit) if state else (limit,)
+        return [self._job(row) for row in self._conn().execute(query, args)]
+
+    def claim(self, worker: str) -> Optional[dict]:
+        """Take the next due job for ``worker``, marking it running, or None."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE state = 'queued' AND not_before <= ? "
+                "ORDER BY priority DESC, id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1, worker = ?, "
+                "started = ?, heartbeat = ?, finished = NULL WHERE id = ?",
+                (worker, now, now, row["id"])
+            )
+        return self.job(row["id"])
+
+    def heartbeat(self, job_id: int, worker: str):
+        self._conn().execute(
+            "UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ? AND state = 'running'",
+            (time.time(), job_id, worker)
+        )
+
+    def complete(self, job_id: int, worker: str, result: dict):
+        self._conn().execute(
+            "UPDATE jobs SET state = 'done', finished = ?, result = ?, error = NULL "
+            "WHERE id = ? AND worker = ? AND state = 'running'",
+            (time.time(), json.dumps(result), job_id, worker)
+        )
+
+    def fail(self, job_id: int, worker: Optional[str], error: str) -> Optional[str]:
+        """
+        Record a failed attempt: the job is queued again after a backoff
+        while attempts remain, and failed for good otherwise. Returns the
+        new state (None if the job was no longer running for ``worker``).
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts, cancel_requested, worker FROM jobs "
+                "WHERE id = ? AND state = 'running'",
+                (job_id,)
+            ).fetchone()
+            if row is None or (worker is not None and row["worker"] != worker):
+                return None
+            now = time.time()
+            if row["cancel_requested"]:
+                state, not_before = "cancelled", 0
+            elif row["attempts"] < row["max_attempts"]:
+                state = "queued"
+                not_before = now + backoff_delay(
+                    row["attempts"] - 1, base=RETRY_BASE_SECONDS, cap=RETRY_CAP_SECONDS
+                )
+            else:
+                state, not_before = "failed", 0
+            conn.execute(
+                "UPDATE jobs SET state = ?, not_before = ?, error = ?, worker = NULL, "
+                "finished = CASE WHEN ? = 'queued' THEN NULL ELSE ? END WHERE id = ?",
+                (state, not_before, error, state, now, job_id)
+            )
+        logger.warning(f"Job #{job_id} failed (attempt {row['attempts']}/{row['max_attempts']}): {error}")
+        return state
+
+    def release(self, worker: str) -> int:
+        """Put ``worker``'s running jobs back in the queue without using up an attempt."""
+        cursor = self._conn().execute(
+            "UPDATE jobs SET state = 'queued', attempts = MAX(attempts - 1, 0), worker = NULL "
+            "WHERE worker = ? AND state = 'running'",
+            (worker,)
+        )
+        return cursor.rowcount
+
+    def cancel(self, job_id: int) -> Optional[str]:
+        """
+        Cancel a job: a queued one at once, a running one once the
+        scheduler has stopped its worker. Returns the job's state.
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            if row["state"] == "queued":
+                conn.execute(
+                    "UPDATE jobs SET state = 'cancelled', finished = ? WHERE id = ?", (time.time(), job_id)
+                )
+                return "cancelled"
+            if row["state"] == "running":
+                conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            return row["state"]
+
+    def cancelled(self, job_id: int, worker: str):
+        """Mark a running job cancelled once its worker has been stopped."""
+        self._conn().execute(
+            "UPDATE jobs SET state = 'cancelled', finished = ?, worker = NULL "
+            "WHERE id = ? AND worker = ? AND state = 'running'",
+            (time.time(), job_id, worker)
+        )
+
+    def cancel_requests(self) -> list:
+        """Running jobs waiting to be cancelled, as ``(id, worker)``."""
+        return [
+            (row["id"], row["worker"]) for row in self._conn().execute(
+                "SELECT id, worker FROM jobs WHERE state = 'running' AND cancel_requested = 1"
+            )
+        ]
+
+    def requeue_stale(self, max_age: float = STALE_SECONDS) -> int:
+        """Fail the attempts of running jobs whose worker stopped sending heartbeats."""
+        since = time.time() - max_age
+        rows = self._conn().execute(
+            "SELECT id, worker FROM jobs WHERE state = 'running' AND heartbeat < ?", (since,)
+        ).fetchall()
+        for row in rows:
+            self.fail(row["id"], row["worker"], f"Worker {row['worker']} stopped responding")
+        return len(rows)
+
+    def idle(self) -> bool:
+        """Whether no job is queued or running."""
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM jobs WHERE state IN ('queued', 'running')"
+        ).fetchone()
+        return row[0] == 0
+
+    def status(self, window: float = THROUGHPUT_WINDOW) -> dict:
+        """Queue depth, in-flight jobs and throughput over the last ``window`` seconds."""
+        conn = self._conn()
+        now = time.time()
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(dict(conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()))
+
+        queued = conn.execute(
+            "SELECT COUNT(*), SUM(not_before > ?), MIN(created) FROM jobs WHERE state = 'queued'", (now,)
+        ).fetchone()
+        running = [
+            {
+                "id": row["id"],
+                "topic": row["topic"],
+                "generator": row["generator"],
+                "worker": row["worker"],
+                "attempt": row["attempts"],
+                "seconds": round(now - row["started"], 1),
+                "heartbeat_age": round(now - row["heartbeat"], 1),
+            }
+            for row in conn.execute("SELECT * FROM jobs WHERE state = 'running' ORDER BY started")
+        ]
+        finished = conn.execute(
+            "SELECT state, finished - started AS seconds FROM jobs "
+            "WHERE state IN ('done', 'failed') AND finished >= ?",
+            (now - window,)
+        ).fetchall()
+        durations = sorted(row["seconds"] for row in finished if row["state"] == "done")
+
+        return {
+            "jobs": counts,
+            "queue_depth": queued[0],
+            "retry_waiting": queued[1] or 0,
+            "oldest_queued_seconds": round(now - queued[2], 1) if queued[2] else None,
+            "in_flight": running,
+            "throughput": {
+                "window_seconds": window,
+                "done": len(durations),
+                "failed": len(finished) - len(durations),
+                "papers_per_hour": round(len(durations) / window * 3600, 2),
+                "median_seconds": round(durations[len(durations) // 2], 1) if durations else None,
+            },
+        }
+
+
+def _summary(result: dict) -> dict:
+    """The parts of a generator result worth keeping in the queue."""
+    telemetry = result.get("telemetry") or {}
+    return {
+        "output_dir": result.get("output_dir"),
+        "article_path": result.get("article_path"),
+        "cost_usd": telemetry.get("llm", {}).get("cost_usd"),
+        "output_tokens": telemetry.get("llm", {}).get("output_tokens"),
+        "deadline": result.get("deadline"),
+    }
+
+
+def _work(queue_dir: str, defaults: dict, quota_share: float, poll: float, stop):
+    """Worker process: claim and run jobs until ``stop`` is set."""
+    try:
+        from .quota import get_governor
+        from .store import ArtifactStore
+        from .worker import AGENT_PARAMS, Worker, preload
+    except ImportError:  # Executed as a script
+        from quota import get_governor
+        from store import ArtifactStore
+        from worker import AGENT_PARAMS, Worker, preload
+
+    # Every process has its own governor, so take an equal slice of the quota
+    get_governor().configure(share=quota_share)
+    preload()
+
+    queue = JobQueue(queue_dir)
+    worker = Worker()
+    name = worker_name(os.getpid())
+    store = ArtifactStore(defaults["store"]) if defaults.get("store") else None
+
+    # The direct generator takes fewer options than STORM agents
+    storm_defaults = {key: value for key, value in defaults.items() if key in AGENT_PARAMS}
+    direct_defaults = {
+        "output_dir": defaults.get("output_dir", "./output"),
+        "quota": defaults.get("quota", False),
+        "rpm": defaults.get("rpm"),
+        "tpm": defaults.get("tpm"),
+        "deadline": defaults.get("deadline"),
+    }
+    if defaults.get("cache_dir"):
+        direct_defaults["cache_dir"] = defaults["cache_dir"]
+    if defaults.get("evidence"):
+        direct_defaults["evidence"] = defaults["evidence"]
+
+    logger.info(f"Worker {name} ready")
+    while not stop.is_set():
+        job = queue.claim(name)
+        if job is None:
+            stop.wait(poll)
+            continue
+
+        logger.info(f"Worker {name} running job #{job['id']}: {job['topic']!r}")
+        beating = threading.Event()
+
+        def beat(job_id=job["id"]):
+            while not beating.wait(HEARTBEAT_SECONDS):
+                queue.heartbeat(job_id, name)
+
+        threading.Thread(target=beat, daemon=True).start()
+        try:
+            try:
+                if job["generator"] == "storm":
+                    params = {
+                        "deadline": defaults.get("deadline"), **storm_defaults, **job["params"], "topic": job["topic"]
+                    }
+                    result = worker.generate(params)
+                else:
+                    params = {**direct_defaults, **job["params"], "topic": job["topic"]}
+                    result = worker.generate_direct(params)
+            except Exception as e:
+                queue.fail(job["id"], name, f"{type(e).__name__}: {e}")
+                continue
+
+            summary = _summary(result)
+            if store is not None:
+                # The paper is done either way; a failed ingest must not regenerate it
+                try:
+                    summary["stored_as"] = store.ingest(result["output_dir"])["run"]
+                except Exception as e:
+                    logger.warning(f"Could not store {result['output_dir']}: {e}")
+                    summary["store_error"] = f"{type(e).__name__}: {e}"
+            queue.complete(job["id"], name, summary)
+            logger.info(f"Job #{job['id']} done: {summary['output_dir']}")
+        finally:
+            beating.set()
+
+
+class Scheduler:
+    """
+    Runs the jobs in a :class:`JobQueue` on ``workers`` processes.
+
+    ``defaults`` are worker request params applied to every job unless the
+    job sets them: ResearchPaperAgent arguments for STORM jobs (see
+    worker.py), plus ``output_dir``, ``cache_dir``, ``evidence``,
+    ``quota`` / ``rpm`` / ``tpm``, ``deadline`` and ``store``. The quota
+    is split evenly between the processes.
+    """
+
+    def __init__(self, queue_dir: str, workers: int = 2, defaults: Optional[dict] = None, poll: float = 1.0):
+        self.queue = JobQueue(queue_dir)
+        self.queue_dir = str(queue_dir)
+        self.workers = max(1, workers)
+        self.defaults = dict(defaults or {})
+        self.poll = poll
+        self._context = multiprocessing.get_context()
+        self._stop = self._context.Event()
+        self._processes = []
+
+    def _spawn(self):
+        process = self._context.Process(
+            target=_work,
+            args=(self.queue_dir, self.defaults, 1 / self.workers, self.poll, self._stop),
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def _supervise(self):
+        """Replace dead workers, carry out cancellations and recover stale jobs."""
+        for slot, process in enumerate(self._processes):
+            if not process.is_alive():
+                name = worker_name(process.pid)
+                for job in self.queue.jobs(state="running", limit=self.workers * 4):
+                    if job["worker"] == name:
+                        self.queue.fail(job["id"], name, f"Worker exited with code {process.exitcode}")
+                logger.warning(f"Worker {name} exited ({process.exitcode}); starting a replacement")
+                self._processes[slot] = self._spawn()
+
+        by_name = {worker_name(process.pid): slot for slot, process in enumerate(self._processes)}
+        for job_id, name in self.queue.cancel_requests():
+            slot = by_name.get(name)
+            if slot is None:
+                # Not one of ours (another scheduler's, or a dead one's)
+                continue
+            process = self._processes[slot]
+            process.terminate()
+            process.join(10)
+            self.queue.cancelled(job_id, name)
+            logger.info(f"Cancelled job #{job_id}; restarting its worker")
+            self._processes[slot] = self._spawn()
+
+        self.queue.requeue_stale()
+
+    def run(self, drain: bool = False) -> dict:
+        """
+        Work off the queue until interrupted or, with ``drain``, until no
+        job is queued or running. Returns the final status.
+        """
+        self._processes = [self._spawn() for _ in range(self.workers)]
+        logger.info(f"Scheduler started with {self.workers} workers on {self.queue.path}")
+        try:
+            while not (drain and self.queue.idle()):
+                time.sleep(self.poll)
+                self._supervise()
+        except KeyboardInterrupt:
+            logger.info("Interrupted; stopping workers")
+        finally:
+            self._stop.set()
+            for process in self._processes:
+                process.join(self.poll * 2)
+            for process in self._processes:
+                if process.is_alive():
+                    process.terminate()
+                    process.join(10)
+                # Jobs cut short by the shutdown run again next time
+                released = self.queue.release(worker_name(process.pid))
+                if released:
+                    logger.info(f"Returned {released} unfinished job(s) to the queue")
+        return self.queue.status()
+
+
+def main():
+    """CLI entry point for the job scheduler."""
+    parser = argparse.ArgumentParser(
+        description="Research Paper Agent (RPA) - Persistent job queue and process-pool scheduler",
+        epilog="Copyright (c) 2025 Aditya Patange. All rights reserved."
+    )
+
+    parser.add_argument(
+        "--queue", "-q",
+        required=True,
+        metavar="DIR",
+        help="Queue directory (holds jobs.sqlite)"
+    )
+
+    parser.add_argument(
+        "--version", "-v",
+        action="version",
+        version=f"Research Paper Agent v{VERSION} by {AUTHOR}"
+    )
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Queue papers")
+    submit.add_argument("topics", nargs="*", metavar="TOPIC")
+    submit.add_argument("--topics-file", metavar="FILE",
+                        help="Text (one topic per line) or JSONL file; JSONL keys other than "
+                             "topic, generator and priority are the job's worker params")
+    submit.add_argument("--generator", "-g", default="storm", choices=GENERATORS,
+                        help="Generator for the jobs (default: storm)")
+    submit.add_argument("--priority", type=int, default=0,
+                        help="Higher runs first (default: 0)")
+    submit.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help=f"Attempts before a job fails for good (default: {DEFAULT_MAX_ATTEMPTS})")
+    submit.add_argument("--params", type=json.loads, default={}, metavar="JSON",
+                        help="Worker params for every job, e.g. '{\"max_pages\": 8}'")
+
+    run = commands.add_parser("run", help="Work off the queue on a pool of processes")
+    run.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 2,
+                     help="Worker processes (default: CPU count)")
+    run.add_argument("--drain", action="store_true",
+                     help="Exit once nothing is queued or running")
+    run.add_argument("--poll", type=float, default=1.0,
+                     help="Seconds between queue polls (default: 1)")
+    run.add_argument("--output", "-o", default="./output",
+                     help="Output directory for generated papers (default: ./output)")
+    run.add_argument("--model", "-m", help="STORM language model")
+    run.add_argument("--search", "-s", help="STORM search engine(s), comma-separated")
+    run.add_argument("--profile", metavar="NAME|FILE", help="STORM engine profile")
+    run.add_argument("--cache-dir", help="Shared LLM response cache directory")
+    run.add_argument("--search-cache", metavar="PATH", help="Shared search result cache (SQLite)")
+    run.add_argument("--library", metavar="DIR", help="Shared research library")
+    run.add_argument("--evidence", metavar="DIR", help="Shared evidence index")
+    run.add_argument("--store", metavar="DIR", help="Add finished papers to this artifact store")
+    run.add_argument("--quota", action="store_true",
+                     help="Admit model calls against per-model budgets split between the workers")
+    run.add_argument("--rpm", type=float, help="Requests per minute per model across all workers")
+    run.add_argument("--tpm", type=float, help="Tokens per minute per model across all workers")
+    run.add_argument("--deadline", type=float, metavar="SECONDS",
+                     help="Time budget per paper, unless a job sets its own")
+
+    status = commands.add_parser("status", help="Queue depth, in-flight jobs and throughput")
+    status.add_argument("--window", type=float, default=THROUGHPUT_WINDOW,
+                        help=f"Throughput window in seconds (default: {THROUGHPUT_WINDOW:.0f})")
+
+    listing = commands.add_parser("list", help="List jobs, most recent first")
+    listing.add_argument("--state", choices=STATES)
+    listing.add_argument("--limit", type=int, default=50)
+
+    cancel = commands.add_parser("cancel", help="Cancel jobs")
+    cancel.add_argument("ids", nargs="+", type=int, metavar="ID")
+
+    args = parser.parse_args()
+    queue = JobQueue(args.queue)
+
+    if args.command == "submit":
+        jobs = [{"topic": topic} for topic in args.topics]
+        if args.topics_file:
+            try:
+                from .batch import load_topics
+            except ImportError:  # Executed as a script
+                from batch import load_topics
+            try:
+                jobs.extend(load_topics(args.topics_file))
+            except (OSError, ValueError) as e:
+                parser.error(str(e))
+        if not jobs:
+            parser.error("Give topics or --topics-file")
+        for job in jobs:
+            job = dict(job)
+            topic = job.pop("topic")
+            job_id = queue.submit(
+                topic,
+                generator=job.pop("generator", args.generator),
+                params={**args.params, **job.pop("params", {}), **{k: v for k, v in job.items() if k != "priority"}},
+                priority=job.get("priority", args.priority),
+                max_attempts=args.max_attempts,
+            )
+            print(json.dumps({"id": job_id, "topic": topic}))
+    elif args.command == "run":
+        defaults = {
+            "output_dir": args.output,
+            "model": args.model,
+            "search_engine": args.search,
+            "profile": args.profile,
+            "cache_dir": args.cache_dir,
+            "search_cache": args.search_cache,
+            "library": args.library,
+            "evidence": args.evidence,
+            "store": args.store,
+            "quota": args.quota,
+            "rpm": args.rpm,
+            "tpm": args.tpm,
+            "deadline": args.deadline,
+        }
+        scheduler = Scheduler(
+            args.queue,
+            workers=args.workers,
+            defaults={key: value for key, value in defaults.items() if value not in (None, False)},
+            poll=args.poll,
+        )
+        print(json.dumps(scheduler.run(drain=args.drain), indent=2))
+    elif args.command == "status":
+        print(json.dumps(queue.status(window=args.window), indent=2))
+    elif args.command == "list":
+        for job in queue.jobs(state=args.state, limit=args.limit):
+            print(json.dumps(job))
+    else:
+        for job_id in args.ids:
+            state = queue.cancel(job_id)
+            if state is None:
+                print(f"No job #{job_id}", file=sys.stderr)
+            else:
+                print(json.dumps({"id": job_id, "state": state}))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
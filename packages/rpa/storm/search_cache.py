@@ -0,0 +1,223 @@
+"""
+Research Paper Agent (RPA) - Search Result Cache
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+A persistent SQLite cache in front of STORM's retrieval modules. Results are
+keyed by normalized query, engine, k and region, expire after a per-engine
+TTL, and identical queries issued concurrently by STORM's worker threads
+are merged into a single network call.
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional
+
+try:
+    from .telemetry import annotate
+except ImportError:  # Executed as a script
+    from telemetry import annotate
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds a cached result set stays fresh, per engine
+DEFAULT_TTLS = {
+    "duckduckgo": 6 * 3600,
+    "you": 24 * 3600,
+    "bing": 24 * 3600,
+    "tavily": 24 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search query."""
+    return " ".join(query.lower().split())
+
+
+def results_for_query(raw, query: str) -> list:
+    """
+    Extract one query's result list from a retrieval module's response.
+
+    STORM's retrieval modules return a flat list of result dicts; some of our
+    fallbacks return ``{query: [results]}``. Both are accepted.
+    """
+    if isinstance(raw, dict):
+        return list(raw.get(query, []))
+    return list(raw or [])
+
+
+class SearchCache:
+    """
+    SQLite-backed search result cache in WAL mode, safe to share between
+    threads and processes.
+    """
+
+    def __init__(self, path: str, ttls: Optional[dict] = None, default_ttl: float = DEFAULT_TTL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.merged = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS search_results (
+                key TEXT PRIMARY KEY,
+                engine TEXT NOT NULL,
+                query TEXT NOT NULL,
+                k INTEGER,
+                region TEXT,
+                results TEXT NOT NULL,
+                created REAL NOT NULL
+            )"""
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections are not thread-safe."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(engine: str, query: str, k: Optional[int], region: Optional[str]) -> str:
+        payload = json.dumps([engine, normalize_query(query), k, region])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def ttl(self, engine: str) -> float:
+        return self.ttls.get(engine, self.default_ttl)
+
+    def get(self, engine: str, query: str, k: Optional[int] = None, region: Optional[str] = None):
+        """Return fresh cached results, or None if missing or expired."""
+        row = self._conn().execute(
+            "SELECT results, created FROM search_results WHERE key = ?",
+            (self.make_key(engine, query, k, region),)
+        ).fetchone()
+
+        fresh = row is not None and time.time() - row[1] < self.ttl(engine)
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return json.loads(row[0]) if fresh else None
+
+    def put(self, engine: str, query: str, k: Optional[int], region: Optional[str], results: list):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.make_key(engine, query, k, region),
+                engine,
+                normalize_query(query),
+                k,
+                region,
+                json.dumps(results),
+                time.time(),
+            )
+        )
+        conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows; returns how many were removed."""
+        conn = self._conn()
+        now = time.time()
+        removed = 0
+        for engine in {row[0] for row in conn.execute("SELECT DISTINCT engine FROM search_results")}:
+            removed += conn.execute(
+                "DELETE FROM search_results WHERE engine = ? AND created < ?",
+                (engine, now - self.ttl(engine))
+            ).rowcount
+        conn.commit()
+        return removed
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "merged_in_flight": self.merged}
+
+
+class CachedRM:
+    """
+    Retrieval module wrapper that serves queries from a :class:`SearchCache`.
+
+    Results are cached unfiltered and ``exclude_urls`` is applied when they
+    are read, so one entry serves every caller. Concurrent requests for the
+    same key wait on the first one instead of querying the engine again.
+    """
+
+    def __init__(self, rm, cache: SearchCache, engine: str, k: int = 10, region: Optional[str] = None):
+        self._rm = rm
+        self.cache = cache
+        self.engine = engine
+        self.k = k
+        self.region = region
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        """Make the wrapper callable, delegating to forward."""
+        return self.forward(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._rm, name)
+
+    def _search(self, query: str) -> list:
+        cached = self.cache.get(self.engine, query, self.k, self.region)
+        if cached is not None:
+            annotate(cache_hit=True)
+            return cached
+
+        key = self.cache.make_key(self.engine, query, self.k, self.region)
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not owner:
+            with self.cache._lock:
+                self.cache.merged += 1
+            annotate(cache_hit=True, merged_in_flight=True)
+            return future.result()
+
+        try:
+            results = results_for_query(self._rm.forward(query, exclude_urls=[]), query)
+            if results:
+                # Empty lists are usually a swallowed failure; don't pin them
+                self.cache.put(self.engine, query, self.k, self.region, results)
+            future.set_result(results)
+            return results
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def forward(self, query_or_queries, exclude_urls=None):
+        """Search each query through the cache, dropping ``exclude_urls``."""
+        queries = [query_or_queries] if isinstance(query_or_queries, str) else list(query_or_queries)
+        excluded = set(exclude_urls or [])
+
+        collected = []
+        for query in queries:
+            collected.extend(
+                result for result in self._search(query)
+                if result.get("url") not in excluded
+            )
+        return collected
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Research Paper Agent (RPA) - Artifact Store
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+A content-addressed, gzip-compressed store for generated papers with a
+SQLite index. Every file of a run (outline, drafts, polished article,
+metadata) is stored once per distinct content, so repeated runs that
+produce identical outlines or drafts share their blobs. The index records
+topic, timestamp, model, search engine, page target, word count and phase
+timings, so "the latest paper on X" is a single query instead of a walk
+over output directories.
+
+    python3 storm/store.py --store ./store ingest ./output/*/ --remove
+    python3 storm/store.py --store ./store latest "Sonic Symbols"
+    python3 storm/store.py --store ./store get Sonic_Symbols_in_Yoga_20250101_120000
+    python3 storm/store.py --store ./store gc --keep-last 3 --max-age-days 90
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import argparse
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+VERSION = "1.0.0"
+AUTHOR = "Aditya Patange"
+
+# Files naming the finished article, best first (direct generator, then STORM)
+ARTICLE_CANDIDATES = (
+    "paper_polished.md",
+    "paper.md",
+    "*/storm_gen_article_polished.txt",
+    "*/storm_gen_article.txt",
+)
+
+# Blobs referenced this recently are never collected, so an ingest that
+# has stored a blob but not yet indexed its run cannot lose it
+GC_GRACE_SECONDS = 3600
+
+CHUNK_SIZE = 1 << 16
+
+
+def normalize_topic(topic: str) -> str:
+    """Case- and whitespace-insensitive form of a topic."""
+    return " ".join((topic or "").lower().split())
+
+
+def _count_words(path: Path) -> int:
+    words = 0
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            words += len(line.split())
+    return words
+
+
+class ArtifactStore:
+    """
+    Papers indexed in ``index.sqlite`` (WAL mode) with their files in
+    ``objects/<2 hex>/<sha256>.gz``. Safe to share between threads and
+    processes.
+    """
+
+    def __init__(self, root: str, compresslevel: int = 6):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.compresslevel = compresslevel
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """CREATE TABLE IF NOT EXISTS papers (
+                id INTEGER PRIMARY KEY,
+                run TEXT NOT NULL UNIQUE,
+                topic TEXT NOT NULL,
+                topic_key TEXT NOT NULL,
+                generator TEXT,
+                timestamp TEXT,
+                created REAL NOT NULL,
+                model TEXT,
+                search_engine TEXT,
+                target_pages INTEGER,
+                words INTEGER,
+                article TEXT,
+                phase_seconds TEXT,
+                metadata TEXT
+            );
+            CREATE INDEX IF NOT EXISTS papers_topic ON papers (topic_key, created);
+            CREATE INDEX IF NOT EXISTS papers_created ON papers (created);
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                last_ref REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS artifacts (
+                paper_id INTEGER NOT NULL REFERENCES papers (id) ON DELETE CASCADE,
+                name TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (paper_id, name)
+            );
+            CREATE INDEX IF NOT EXISTS artifacts_digest ON artifacts (digest);"""
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections are not thread-safe."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.root / "index.sqlite", timeout=30)
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / f"{digest}.gz"
+
+    # Writing
+
+    def put_file(self, path: Path) -> tuple:
+        """
+        Store ``path`` compressed, returning ``(digest, size, stored_size)``.
+
+        The file is hashed and compressed in one streaming pass; content that
+        is already stored is not written again, but its ``last_ref`` is
+        refreshed so ``gc`` leaves it alone until the run is indexed.
+        """
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.objects, prefix=".tmp-", suffix=".gz")
+        try:
+            with os.fdopen(fd, "wb") as raw, \
+                    gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=self.compresslevel, mtime=0) as out, \
+                    open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    sha.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+
+            digest = sha.hexdigest()
+
+            # Claim the blob before looking for its file: gc only deletes
+            # blobs whose last_ref is stale, and unlinks the file in the same
+            # transaction, so either it is already gone (and rewritten below)
+            # or it stays
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    "INSERT INTO blobs VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (digest) DO UPDATE SET last_ref = excluded.last_ref",
+                    (digest, size, os.path.getsize(tmp_name), time.time())
+                )
+
+            target = self._blob_path(digest)
+            if target.exists():
+                os.unlink(tmp_name)
+            else:
+                target.parent.mkdir(exist_ok=True)
+                os.replace(tmp_name, target)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+        return digest, size, target.stat().st_size
+
+    def ingest(self, run_dir: str, remove: bool = False) -> dict:
+        """
+        Index the run in ``run_dir`` and store all of its files.
+
+        Re-ingesting a run replaces its index entry. With ``remove`` the run
+        directory is deleted once everything is safely stored.
+        """
+        run_dir = Path(run_dir)
+        metadata_path = run_dir / "metadata.json"
+        if not metadata_path.exists():
+            raise FileNotFoundError(f"No metadata.json in {run_dir}; is it a finished run?")
+        metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
+
+        files = sorted(p for p in run_dir.rglob("*") if p.is_file())
+        article = next(
+            (p for pattern in ARTICLE_CANDIDATES for p in sorted(run_dir.glob(pattern))),
+            None
+        )
+
+        stored = {}
+        for path in files:
+            stored[path.relative_to(run_dir).as_posix()] = self.put_file(path)
+
+        topic = metadata.get("topic") or run_dir.name
+        record = {
+            "run": run_dir.name,
+            "topic": topic,
+            "topic_key": normalize_topic(topic),
+            "generator": "storm" if "search_engine" in metadata else "direct",
+            "timestamp": metadata.get("timestamp"),
+            "created": metadata_path.stat().st_mtime,
+            "model": metadata.get("model"),
+            "search_engine": metadata.get("search_engine"),
+            "target_pages": metadata.get("target_pages", metadata.get("max_pages")),
+            "words": _count_words(article) if article is not None else None,
+            "article": article.relative_to(run_dir).as_posix() if article is not None else None,
+            "phase_seconds": json.dumps(metadata.get("phase_seconds") or {}),
+            "metadata": json.dumps(metadata),
+        }
+
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM papers WHERE run = ?", (record["run"],))
+            paper_id = conn.execute(
+                f"INSERT INTO papers ({', '.join(record)}) VALUES ({', '.join('?' * len(record))})",
+                tuple(record.values())
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO blobs VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (digest) DO UPDATE SET last_ref = excluded.last_ref",
+                [(digest, size, stored_size, now) for digest, size, stored_size in stored.values()]
+            )
+            conn.executemany(
+                "INSERT INTO artifacts VALUES (?, ?, ?)",
+                [(paper_id, name, digest) for name, (digest, _, _) in stored.items()]
+            )
+
+        if remove:
+            shutil.rmtree(run_dir)
+
+        size = sum(s for _, s, _ in stored.values())
+        logger.info(f"Stored {record['run']}: {len(stored)} files, {size} bytes")
+        return self._paper(conn.execute("SELECT * FROM papers WHERE id = ?", (paper_id,)).fetchone())
+
+    # Queries
+
+    @staticmethod
+    def _paper(row) -> Optional[dict]:
+        if row is None:
+            return None
+        paper = {key: row[key] for key in row.keys() if key not in ("topic_key", "metadata")}
+        paper["phase_seconds"] = json.loads(row["phase_seconds"] or "{}")
+        return paper
+
+    def list(
+        self,
+        topic: Optional[str] = None,
+        model: Optional[str] = None,
+        generator: Optional[str] = None,
+        since: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> list:
+        """
+        Indexed papers, newest first. ``topic`` matches case-insensitively
+        anywhere in the topic; ``since`` is a Unix timestamp.
+        """
+        clauses, params = [], []
+        if topic:
+            clauses.append("topic_key LIKE ?")
+            params.append(f"%{normalize_topic(topic)}%")
+        if model:
+            clauses.append("model = ?")
+            params.append(model)
+        if generator:
+            clauses.append("generator = ?")
+            params.append(generator)
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(since)
+
+        query = "SELECT * FROM papers"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        return [self._paper(row) for row in self._conn().execute(query, params)]
+
+    def latest(self, topic: str, **filters) -> Optional[dict]:
+        """The newest paper on ``topic``: an exact topic match if there is one."""
+        row = self._conn().execute(
+            "SELECT * FROM papers WHERE topic_key = ? ORDER BY created DESC LIMIT 1",
+            (normalize_topic(topic),)
+        ).fetchone()
+        if row is not None and not filters:
+            return self._paper(row)
+        papers = self.list(topic=topic, limit=1, **filters)
+        return papers[0] if papers else None
+
+    def paper(self, run: str) -> Optional[dict]:
+        """The paper indexed under run name (output directory name) ``run``."""
+        return self._paper(self._conn().execute("SELECT * FROM papers WHERE run = ?", (run,)).fetchone())
+
+    def metadata(self, run: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT metadata FROM papers WHERE run = ?", (run,)).fetchone()
+        return json.loads(row["metadata"]) if row is not None else None
+
+    def artifacts(self, run: str) -> dict:
+        """Artifact names of ``run`` mapped to their size in bytes."""
+        return {
+            row["name"]: row["size"]
+            for row in self._conn().execute(
+                "SELECT a.name, b.size FROM artifacts a "
+                "JOIN papers p ON p.id = a.paper_id JOIN blobs b ON b.digest = a.digest "
+                "WHERE p.run = ? ORDER BY a.name",
+                (run,)
+            )
+        }
+
+    def open(self, run: str, name: Optional[str] = None):
+        """
+        Open an artifact of ``run`` for reading as a binary stream; ``name``
+        defaults to the finished article.
+        """
+        row = self._conn().execute(
+            "SELECT a.digest FROM artifacts a JOIN papers p ON p.id = a.paper_id "
+            "WHERE p.run = ? AND a.name = COALESCE(?, p.article)",
+            (run, name)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"No artifact {name or 'article'!r} stored for {run!r}")
+        return gzip.open(self._blob_path(row["digest"]), "rb")
+
+    def get(self, run: str, name: Optional[str] = None) -> str:
+        """The text of an artifact of ``run`` (the article by default)."""
+        with self.open(run, name) as f:
+            return f.read().decode("utf-8")
+
+    def restore(self, run: str, dest: str) -> Path:
+        """Recreate the run's output directory under ``dest``."""
+        target = Path(dest) / run
+        for name in self.artifacts(run):
+            path = target / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with self.open(run, name) as src, open(path, "wb") as out:
+                shutil.copyfileobj(src, out, CHUNK_SIZE)
+        return target
+
+    # Retention
+
+    def gc(
+        self,
+        keep_last: Optional[int] = None,
+        max_age_days: Optional[float] = None,
+        dry_run: bool = False
+    ) -> dict:
+        """
+        Apply the retention policy, then delete blobs no paper references.
+
+        ``keep_last`` keeps that many newest papers per topic and
+        ``max_age_days`` drops papers older than that; a paper is removed if
+        either policy rejects it, except that the newest paper of each topic
+        is always kept.
+        """
+        conn = self._conn()
+        doomed = []
+        rows = conn.execute("SELECT id, run, topic_key, created FROM papers ORDER BY created DESC")
+        rank = {}
+        cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+        for row in rows:
+            rank[row["topic_key"]] = rank.get(row["topic_key"], 0) + 1
+            if rank[row["topic_key"]] == 1:
+                continue
+            if (keep_last is not None and rank[row["topic_key"]] > keep_last) or \
+                    (cutoff is not None and row["created"] < cutoff):
+                doomed.append((row["id"], row["run"]))
+
+        if not dry_run:
+            with conn:
+                conn.executemany("DELETE FROM papers WHERE id = ?", [(pid,) for pid, _ in doomed])
+
+        orphan_clause = "last_ref < ? AND digest NOT IN (SELECT digest FROM artifacts)"
+        stale = time.time() - GC_GRACE_SECONDS
+        orphans = conn.execute(
+            f"SELECT digest, stored_size FROM blobs WHERE {orphan_clause}", (stale,)
+        ).fetchall()
+        if not dry_run:
+            removed = []
+            for row in orphans:
+                # Re-checked per blob: put_file may have reused it since the
+                # query, and the unlink happens before the delete commits so
+                # a concurrent put_file sees either both or neither
+                with conn:
+                    deleted = conn.execute(
+                        f"DELETE FROM blobs WHERE digest = ? AND {orphan_clause}",
+                        (row["digest"], stale)
+                    ).rowcount
+                    if deleted:
+                        try:
+                            self._blob_path(row["digest"]).unlink()
+                        except FileNotFoundError:
+                            pass
+                if deleted:
+                    removed.append(row)
+            orphans = removed
+        freed = sum(row["stored_size"] for row in orphans)
+
+        if doomed or orphans:
+            logger.info(f"Collected {len(doomed)} papers and {len(orphans)} blobs ({freed} bytes)")
+        return {
+            "papers_removed": [run for _, run in doomed],
+            "blobs_removed": len(orphans),
+            "bytes_freed": freed,
+            "dry_run": dry_run,
+        }
+
+    def stats(self) -> dict:
+        """Totals for the store: papers, artifacts, blobs and bytes before/after dedup and compression."""
+        conn = self._conn()
+        referenced = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(b.size), 0) FROM artifacts a JOIN blobs b ON b.digest = a.digest"
+        ).fetchone()
+        blobs = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs"
+        ).fetchone()
+        return {
+            "papers": conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0],
+            "artifacts": referenced[0],
+            "blobs": blobs[0],
+            "logical_bytes": referenced[1],
+            "unique_bytes": blobs[1],
+            "stored_bytes": blobs[2],
+        }
+
+
+def main():
+    """CLI entry point for the artifact store."""
+    parser = argparse.ArgumentParser(
+        description="Research Paper Agent (RPA) - Query and maintain the artifact store",
+        epilog="Copyright (c) 2025 Aditya Patange. All rights reserved."
+    )
+
+    parser.add_argument(
+        "--store",
+        default=os.getenv("RPA_STORE", "./store"),
+        help="Store directory (default: $RPA_STORE or ./store)"
+    )
+
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Output results as JSON"
+    )
+
+    parser.add_argument(
+        "--version", "-v",
+        action="version",
+        version=f"Research Paper Agent v{VERSION} by {AUTHOR}"
+    )
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Store finished run directories")
+    ingest.add_argument("run_dirs", nargs="+", metavar="DIR")
+    ingest.add_argument("--remove", action="store_true",
+                        help="Delete each run directory once it is stored")
+
+    listing = commands.add_parser("list", help="List stored papers, newest first")
+    listing.add_argument("--topic", help="Case-insensitive topic substring")
+    listing.add_argument("--model")
+    listing.add_argument("--generator", choices=["direct", "storm"])
+    listing.add_argument("--days", type=float, help="Only papers from the last N days")
+    listing.add_argument("--limit", type=int, default=50, help="Maximum papers (default: 50)")
+
+    latest = commands.add_parser("latest", help="Show the newest paper on a topic")
+    latest.add_argument("topic")
+
+    get = commands.add_parser("get", help="Print an artifact, or restore a whole run")
+    get.add_argument("run", help="Run name (the output directory name)")
+    get.add_argument("--artifact", "-a", help="Artifact name (default: the article)")
+    get.add_argument("--restore", metavar="DIR", help="Recreate the run's directory under DIR")
+
+    gc = commands.add_parser("gc", help="Apply retention and delete unreferenced blobs")
+    gc.add_argument("--keep-last", type=int, help="Papers to keep per topic")
+    gc.add_argument("--max-age-days", type=float, help="Drop papers older than this")
+    gc.add_argument("--dry-run", action="store_true", help="Report without deleting")
+
+    commands.add_parser("stats", help="Show store totals")
+
+    args = parser.parse_args()
+    store = ArtifactStore(args.store)
+
+    def show(value):
+        if args.json or not isinstance(value, list):
+            print(json.dumps(value, indent=2))
+            return
+        for paper in value:
+            print(f"{paper['run']}  {paper['generator']:<6}  {paper['model'] or '-':<28}  "
+                  f"{paper['words'] or 0:>6} words  {paper['topic']}")
+
+    try:
+        if args.command == "ingest":
+            show([store.ingest(run_dir, remove=args.remove) for run_dir in args.run_dirs])
+        elif args.command == "list":
+            since = time.time() - args.days * 86400 if args.days else None
+            show(store.list(args.topic, args.model, args.generator, since, args.limit))
+        elif args.command == "latest":
+            paper = store.latest(args.topic)
+            if paper is None:
+                print(f"No paper stored on {args.topic!r}", file=sys.stderr)
+                sys.exit(1)
+            show(paper)
+        elif args.command == "get":
+            if args.restore:
+                print(store.restore(args.run, args.restore))
+            else:
+                with store.open(args.run, args.artifact) as f:
+                    shutil.copyfileobj(f, sys.stdout.buffer, CHUNK_SIZE)
+        elif args.command == "gc":
+            show(store.gc(args.keep_last, args.max_age_days, dry_run=args.dry_run))
+        else:
+            show(store.stats())
+    except (KeyError, FileNotFoundError) as e:
+        print(f"Error: {e.args[0] if e.args else e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
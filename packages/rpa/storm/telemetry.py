@@ -0,0 +1,474 @@
+"""
+Research Paper Agent (RPA) - Tracing and Cost Telemetry
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+Structured spans for pipeline phases, LLM calls and search queries, with
+token usage taken from each response's ``usage`` and an estimated cost per
+model. A run's :class:`Tracer` summarizes its spans for ``metadata.json``
+and can also append them, one JSON object per line, to a trace file.
+"""
+
+import sys
+import json
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Estimated USD per million (input, output) tokens, matched by model prefix
+MODEL_PRICES = {
+    "claude-opus-4": (15.00, 75.00),
+    "claude-sonnet-4": (3.00, 15.00),
+    "claude-3-7-sonnet": (3.00, 15.00),
+    "claude-3-5-sonnet": (3.00, 15.00),
+    "claude-3-5-haiku": (0.80, 4.00),
+    "claude-3-opus": (15.00, 75.00),
+    "claude-3-haiku": (0.25, 1.25),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+
+def match_model(table: dict, model: Optional[str]):
+    """
+    Look ``model`` up in a table keyed by model-name prefix, ignoring any
+    ``provider/`` prefix; the longest matching key wins.
+    """
+    if not model:
+        return None
+    name = model.split("/")[-1]
+    matches = [prefix for prefix in table if name.startswith(prefix)]
+    return table[max(matches, key=len)] if matches else None
+
+
+def model_price(model: Optional[str]) -> Optional[tuple]:
+    """(input, output) USD per million tokens for ``model``, or None if unknown."""
+    return match_model(MODEL_PRICES, model)
+
+
+def estimate_cost(model: Optional[str], input_tokens: int, output_tokens: int) -> Optional[float]:
+    """Estimated USD cost of one call, or None if the model has no known price."""
+    price = model_price(model)
+    if price is None:
+        return None
+    return (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+
+# Spans currently open on each thread, innermost last
+_local = threading.local()
+
+# Tracer for code that has no tracer handed to it (STORM's language models
+# and retrieval modules). Concurrent runs in one process each activate
+# their own in their own context.
+_active = contextvars.ContextVar("rpa_tracer", default=None)
+
+
+def _open_spans() -> list:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def annotate(**attrs):
+    """
+    Set attributes on the innermost span open on this thread, if any.
+
+    Lets wrappers deep in the call stack (caches, retry loops) report what
+    they did without holding a reference to the tracer.
+    """
+    stack = _open_spans()
+    if stack:
+        stack[-1]["attrs"].update(attrs)
+
+
+def carry_span(fn):
+    """
+    Wrap ``fn`` to run on another thread inside the caller's innermost open
+    span and active tracer, so spans and annotations made there attach to
+    the caller's.
+    """
+    stack = _open_spans()
+    carried = stack[-1] if stack else None
+    tracer = current_tracer()
+
+    def run(*args, **kwargs):
+        token = _active.set(tracer)
+        try:
+            if carried is None:
+                return fn(*args, **kwargs)
+            worker_stack = _open_spans()
+            worker_stack.append(carried)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                worker_stack.remove(carried)
+        finally:
+            _active.reset(token)
+
+    return run
+
+
+def current_tracer() -> Optional["Tracer"]:
+    """The tracer activated in the calling context, or None."""
+    return _active.get()
+
+
+def _bound(tracer: Optional["Tracer"]):
+    """Activate ``tracer`` if given; otherwise the caller's tracer stays active."""
+    return tracer.activate() if tracer is not None else nullcontext()
+
+
+@contextmanager
+def span(name: str, kind: str, **attrs):
+    """Open a span on the active tracer; a no-op when none is active."""
+    tracer = current_tracer()
+    if tracer is None:
+        yield {"attrs": dict(attrs)}
+        return
+    with tracer.span(name, kind, **attrs) as current:
+        yield current
+
+
+def percentile(samples: list, pct: float) -> float:
+    """Nearest-rank ``pct`` percentile of a non-empty list of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Tracer:
+    """
+    Collects the spans of one generation run.
+
+    Spans are dicts with ``id``, ``parent``, ``name``, ``kind`` (``phase``,
+    ``llm`` or ``search``), the ``phase`` they ran in, wall-clock ``start``
+    and ``end``, ``duration`` in seconds, ``thread`` and free-form
+    ``attrs``. With ``trace_path`` each span is appended to that NDJSON file
+    as it ends, so a crashed run still leaves its trace behind. ``on_span``
+    is called with every span as it ends, e.g. to report progress.
+    """
+
+    def __init__(self, trace_path: Optional[str] = None, run: Optional[str] = None, on_span=None):
+        self.trace_path = Path(trace_path) if trace_path else None
+        self.run = run
+        self.on_span = on_span
+        self.phase = None
+        self.started = time.monotonic()
+        self._spans = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+        if self.trace_path is not None:
+            self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attrs):
+        """Record a span around the enclosed block and yield its dict."""
+        stack = _open_spans()
+        parent = next((s["id"] for s in reversed(stack) if s.get("_tracer") is self), None)
+        with self._lock:
+            span_id = self._next_id
+            self._next_id += 1
+
+        current = {
+            "id": span_id,
+            "parent": parent,
+            "name": name,
+            "kind": kind,
+            "phase": name if kind == "phase" else self.phase,
+            "thread": threading.current_thread().name,
+            "start": time.time(),
+            "attrs": dict(attrs),
+            "_tracer": self,
+        }
+        if kind == "phase":
+            previous_phase, self.phase = self.phase, name
+
+        stack.append(current)
+        began = time.monotonic()
+        try:
+            yield current
+        except BaseException as e:
+            current["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current["duration"] = round(time.monotonic() - began, 6)
+            current["end"] = time.time()
+            stack.remove(current)
+            if kind == "phase":
+                self.phase = previous_phase
+            self._finish(current)
+
+    def _finish(self, current: dict):
+        del current["_tracer"]
+        attrs = current["attrs"]
+        if current["kind"] == "llm" and "output_tokens" in attrs:
+            if attrs.get("cache_hit"):
+                attrs["cost_usd"] = 0.0
+            else:
+                cost = estimate_cost(
+                    attrs.get("model"), attrs.get("input_tokens", 0), attrs["output_tokens"]
+                )
+                if cost is not None:
+                    attrs["cost_usd"] = round(cost, 6)
+
+        with self._lock:
+            self._spans.append(current)
+            if self.trace_path is not None:
+                record = dict(current, run=self.run) if self.run else current
+                with open(self.trace_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+        if self.on_span is not None:
+            self.on_span(current)
+
+    @contextmanager
+    def activate(self):
+        """
+        Make this the tracer for code that looks it up via :func:`span` in
+        the current context (this thread, and :func:`carry_span` wrappers
+        created in it).
+        """
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    def spans(self) -> list:
+        with self._lock:
+            return list(self._spans)
+
+    def summary(self) -> dict:
+        """Aggregate the recorded spans for ``metadata.json``."""
+        spans = self.spans()
+
+        phases = {}
+        for s in spans:
+            if s["kind"] == "phase":
+                phases[s["name"]] = round(phases.get(s["name"], 0.0) + s["duration"], 3)
+
+        def llm_totals(selected):
+            totals = {"calls": 0, "cache_hits": 0, "errors": 0, "input_tokens": 0,
+                      "output_tokens": 0, "cost_usd": 0.0, "seconds": 0.0}
+            for s in selected:
+                attrs = s["attrs"]
+                totals["calls"] += 1
+                totals["cache_hits"] += bool(attrs.get("cache_hit"))
+                totals["errors"] += "error" in s
+                totals["input_tokens"] += attrs.get("input_tokens", 0)
+                totals["output_tokens"] += attrs.get("output_tokens", 0)
+                totals["cost_usd"] += attrs.get("cost_usd", 0.0)
+                totals["seconds"] += s["duration"]
+            totals["cost_usd"] = round(totals["cost_usd"], 4)
+            totals["seconds"] = round(totals["seconds"], 3)
+            return totals
+
+        llm_spans = [s for s in spans if s["kind"] == "llm"]
+        llm = llm_totals(llm_spans)
+        llm["by_phase"] = {
+            phase: llm_totals([s for s in llm_spans if s["phase"] == phase])
+            for phase in sorted({str(s["phase"]) for s in llm_spans})
+        }
+        llm["by_model"] = {
+            model: llm_totals([s for s in llm_spans if s["attrs"].get("model") == model])
+            for model in sorted({str(s["attrs"].get("model")) for s in llm_spans})
+        }
+        unpriced = sorted({
+            str(s["attrs"].get("model")) for s in llm_spans
+            if "output_tokens" in s["attrs"] and "cost_usd" not in s["attrs"]
+        })
+        if unpriced:
+            llm["unpriced_models"] = unpriced
+
+        search_spans = [s for s in spans if s["kind"] == "search"]
+        latencies = [s["duration"] for s in search_spans]
+        search = {
+            "queries": len(search_spans),
+            "cache_hits": sum(bool(s["attrs"].get("cache_hit")) for s in search_spans),
+            "errors": sum("error" in s or bool(s["attrs"].get("failed")) for s in search_spans),
+            "retries": sum(s["attrs"].get("retries", 0) for s in search_spans),
+            "results": sum(s["attrs"].get("results", 0) for s in search_spans),
+            "seconds": round(sum(latencies), 3),
+        }
+        if latencies:
+            search["latency_p50"] = round(percentile(latencies, 50), 3)
+            search["latency_p95"] = round(percentile(latencies, 95), 3)
+
+        return {
+            "wall_seconds": round(time.monotonic() - self.started, 3),
+            "spans": len(spans),
+            "phases": phases,
+            "llm": llm,
+            "search": search,
+            "trace": str(self.trace_path) if self.trace_path is not None else None,
+        }
+
+
+class TracedAnthropicClient:
+    """
+    Wrapper over an Anthropic client recording an ``llm`` span, with token
+    usage, stop reason and cache hits, for every ``messages`` call.
+    """
+
+    def __init__(self, client, tracer: Tracer):
+        self._client = client
+        self.tracer = tracer
+        self.messages = _TracedMessages(client.messages, tracer)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def _record_message(current: dict, message):
+    usage = getattr(message, "usage", None)
+    current["attrs"].update(
+        input_tokens=getattr(usage, "input_tokens", 0) or 0,
+        output_tokens=getattr(usage, "output_tokens", 0) or 0,
+        stop_reason=getattr(message, "stop_reason", None),
+        cache_hit=bool(getattr(message, "cached", False)),
+    )
+
+
+class _TracedMessages:
+    def __init__(self, messages, tracer: Tracer):
+        self._messages = messages
+        self._tracer = tracer
+
+    def create(self, **kwargs):
+        with self._tracer.span(
+            "messages.create", "llm", model=kwargs.get("model"), max_tokens=kwargs.get("max_tokens")
+        ) as current:
+            message = self._messages.create(**kwargs)
+            _record_message(current, message)
+            return message
+
+    def stream(self, **kwargs):
+        return _TracedStream(self._messages, self._tracer, kwargs)
+
+
+class _TracedStream:
+    """``messages.stream`` context manager that also records time to first token."""
+
+    def __init__(self, messages, tracer: Tracer, kwargs: dict):
+        self._messages = messages
+        self._tracer = tracer
+        self._kwargs = kwargs
+        self._span = None
+        self._manager = None
+        self._stream = None
+        self._completed = False
+
+    def __enter__(self):
+        self._span = self._tracer.span(
+            "messages.stream", "llm",
+            model=self._kwargs.get("model"), max_tokens=self._kwargs.get("max_tokens")
+        )
+        self._current = self._span.__enter__()
+        self._started = time.monotonic()
+        try:
+            self._manager = self._messages.stream(**self._kwargs)
+            self._stream = self._manager.__enter__()
+        except BaseException:
+            self._span.__exit__(*sys.exc_info())
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None and self._completed:
+                _record_message(self._current, self._stream.get_final_message())
+            suppress = self._manager.__exit__(exc_type, exc, tb)
+        finally:
+            self._span.__exit__(exc_type, exc, tb)
+        return suppress
+
+    @property
+    def text_stream(self):
+        first = True
+        for text in self._stream.text_stream:
+            if first:
+                self._current["attrs"]["ttft"] = round(time.monotonic() - self._started, 6)
+                first = False
+            yield text
+        self._completed = True
+
+    def get_final_message(self):
+        return self._stream.get_final_message()
+
+
+class TracedRM:
+    """
+    Retrieval module wrapper recording a ``search`` span per query on
+    ``tracer``, or the active tracer when that is None. Results are returned
+    as the flat list STORM expects.
+    """
+
+    def __init__(self, rm, engine: str, tracer: Optional["Tracer"] = None):
+        self._rm = rm
+        self.engine = engine
+        self.tracer = tracer
+
+    def __call__(self, *args, **kwargs):
+        """Make the wrapper callable, delegating to forward."""
+        return self.forward(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._rm, name)
+
+    def forward(self, query_or_queries, exclude_urls=None):
+        queries = [query_or_queries] if isinstance(query_or_queries, str) else list(query_or_queries)
+        collected = []
+        for query in queries:
+            with _bound(self.tracer), span(query, "search", engine=self.engine):
+                raw = self._rm.forward(query, exclude_urls=exclude_urls)
+                results = list(raw.get(query, [])) if isinstance(raw, dict) else list(raw or [])
+                annotate(results=len(results))
+            collected.extend(results)
+        return collected
+
+
+_traced_litellm_classes = {}
+
+
+def traced_litellm_class(base):
+    """
+    Subclass of the LitellmModel class ``base`` recording an ``llm`` span per
+    call, with token usage from the response. Calls report to the model's
+    ``tracer`` attribute when it is set, which is what reaches calls made on
+    threads the caller does not control (STORM's thread pools), and to the
+    active tracer otherwise.
+    """
+    if base not in _traced_litellm_classes:
+
+        class TracedLitellmModel(base):
+            """LitellmModel reporting each completion to its tracer."""
+
+            tracer = None
+
+            def __call__(self, *args, **call_kwargs):
+                model = call_kwargs.get("model") or getattr(self, "kwargs", {}).get("model")
+                with _bound(self.tracer), span("completion", "llm", model=model or getattr(self, "model", None)):
+                    return super().__call__(*args, **call_kwargs)
+
+            def log_usage(self, response):
+                super().log_usage(response)
+                usage = response.get("usage") if isinstance(response, dict) \
+                    else getattr(response, "usage", None)
+                if usage is not None:
+                    get = usage.get if isinstance(usage, dict) else lambda k, d=0: getattr(usage, k, d)
+                    annotate(
+                        input_tokens=get("prompt_tokens", 0) or 0,
+                        output_tokens=get("completion_tokens", 0) or 0,
+                    )
+
+        TracedLitellmModel.__name__ = f"Traced{base.__name__}"
+        _traced_litellm_classes[base] = TracedLitellmModel
+
+    return _traced_litellm_classes[base]
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Research Paper Agent (RPA) - Persistent Worker
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+A long-lived worker that serves many generate requests from one Python
+process, so imports, language model configs and HTTP connection pools stay
+warm between papers. Requests and responses are newline-delimited JSON over
+stdin/stdout, or over a Unix socket with ``--socket``.
+
+Request:   {"id": 1, "method": "generate", "params": {"topic": "..."}}
+Response:  {"id": 1, "result": {...}, "elapsed": 12.3}
+Error:     {"id": 1, "error": {"type": "ValueError", "message": "..."}}
+
+Methods: ``generate`` (STORM pipeline, params as ResearchPaperAgent plus
+``topic`` / ``resume_dir`` / ``trace_path`` / ``deadline`` / ``degrade``),
+``generate_direct`` (direct generator, params as generate_research_paper,
+with ``quota`` / ``rpm`` / ``tpm`` selecting the shared quota governor,
+``cache_dir`` the response cache and ``evidence`` the evidence index),
+``ping``, ``stats`` and ``shutdown`` (which ends the stdin session or
+closes the socket connection).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import threading
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .direct_generator import generate_research_paper, VERSION, AUTHOR
+    from .evidence import EvidenceIndex
+    from .llm_cache import DEFAULT_MAX_MB, ResponseCache
+    from .quota import get_governor
+    from .runner import ResearchPaperAgent
+except ImportError:  # Executed as a script
+    from direct_generator import generate_research_paper, VERSION, AUTHOR
+    from evidence import EvidenceIndex
+    from llm_cache import DEFAULT_MAX_MB, ResponseCache
+    from quota import get_governor
+    from runner import ResearchPaperAgent
+
+logger = logging.getLogger(__name__)
+
+
+# ResearchPaperAgent constructor arguments a request may set
+AGENT_PARAMS = (
+    "output_dir", "model", "search_engine", "max_pages", "cache_dir",
+    "cache_max_mb", "search_cache", "search_ttl", "hedge_after", "quota",
+    "rpm", "tpm", "hedge_percentile", "dedup_threshold",
+    "evidence", "library", "fresh_research", "library_similarity",
+    "library_max_age_days", "profile", "max_thread_num",
+)
+
+# Params a generate request may set: the agent's, plus those of the run
+GENERATE_PARAMS = AGENT_PARAMS + ("topic", "resume_dir", "trace_path", "deadline", "degrade")
+
+# generate_research_paper arguments a generate_direct request may set, plus
+# cache_dir / cache_max_mb, evidence / evidence_backend and quota / rpm /
+# tpm, which select the shared response cache, evidence index and quota
+# governor
+DIRECT_PARAMS = (
+    "topic", "output_dir", "target_pages", "stream", "parallel_sections",
+    "concurrency", "polish_mode", "resume_dir", "trace_path",
+    "hedge_percentile", "models", "evidence", "evidence_backend",
+    "evidence_k", "deadline", "degrade", "cache_dir", "cache_max_mb",
+    "quota", "rpm", "tpm",
+)
+
+
+def preload():
+    """Import the heavy dependencies up front so the first request is warm."""
+    for module in ("anthropic", "litellm", "knowledge_storm", "knowledge_storm.rm"):
+        try:
+            __import__(module)
+        except ImportError as e:
+            logger.warning(f"Could not preload {module}: {e}")
+
+
+class Worker:
+    """
+    Dispatches requests to warm generators.
+
+    One ResearchPaperAgent is kept per distinct configuration, and the
+    direct generator shares a single Anthropic client, and one response
+    cache and evidence index per directory.
+    """
+
+    def __init__(self):
+        self._agents = {}
+        self._caches = {}
+        self._evidence = {}
+        self._client = None
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.served = 0
+        self.failed = 0
+
+    def _agent(self, params: dict) -> ResearchPaperAgent:
+        config = {name: params[name] for name in AGENT_PARAMS if name in params}
+        key = json.dumps(config, sort_keys=True)
+        with self._lock:
+            if key not in self._agents:
+                self._agents[key] = ResearchPaperAgent(**config)
+            return self._agents[key]
+
+    def _anthropic_client(self):
+        with self._lock:
+            if self._client is None:
+                import anthropic
+
+                api_key = os.getenv("ANTHROPIC_API_KEY")
+                if not api_key:
+                    raise ValueError("ANTHROPIC_API_KEY environment variable is required")
+                self._client = anthropic.Anthropic(api_key=api_key)
+            return self._client
+
+    def _response_cache(self, cache_dir: str, max_mb: float) -> ResponseCache:
+        with self._lock:
+            if (cache_dir, max_mb) not in self._caches:
+                self._caches[cache_dir, max_mb] = ResponseCache(cache_dir, max_mb=max_mb)
+            return self._caches[cache_dir, max_mb]
+
+    def _evidence_index(self, root: str, backend: str) -> EvidenceIndex:
+        with self._lock:
+            if (root, backend) not in self._evidence:
+                self._evidence[root, backend] = EvidenceIndex(root, backend=backend)
+            return self._evidence[root, backend]
+
+    def generate(self, params: dict) -> dict:
+        unknown = sorted(name for name in params if name not in GENERATE_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown generate param(s): {', '.join(unknown)}")
+
+        agent = self._agent(params)
+        return agent.generate(
+            params.get("topic"),
+            resume_dir=params.get("resume_dir"),
+            trace_path=params.get("trace_path"),
+            deadline=params.get("deadline"),
+            degrade=params.get("degrade")
+        )
+
+    def generate_direct(self, params: dict) -> dict:
+        unknown = sorted(name for name in params if name not in DIRECT_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown generate_direct param(s): {', '.join(unknown)}")
+
+        kwargs = {
+            name: value for name, value in params.items()
+            if name not in ("cache_dir", "cache_max_mb", "evidence", "evidence_backend", "rpm", "tpm")
+        }
+        if params.get("cache_dir"):
+            kwargs["cache"] = self._response_cache(
+                params["cache_dir"], params.get("cache_max_mb") or DEFAULT_MAX_MB
+            )
+        if params.get("evidence"):
+            kwargs["evidence"] = self._evidence_index(
+                params["evidence"], params.get("evidence_backend") or "bm25"
+            )
+        if kwargs.pop("quota", False) or params.get("rpm") or params.get("tpm"):
+            # A no-op unless the limits change, so requests draw on one budget
+            kwargs["quota"] = get_governor()
+            kwargs["quota"].configure(rpm=params.get("rpm"), tpm=params.get("tpm"))
+        return generate_research_paper(client=self._anthropic_client(), **kwargs)
+
+    def stats(self, params: dict) -> dict:
+        return {
+            "version": VERSION,
+            "author": AUTHOR,
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started, 3),
+            "served": self.served,
+            "failed": self.failed,
+            "agents": len(self._agents),
+        }
+
+    def handle(self, request: dict) -> dict:
+        """Execute one request and build its response."""
+        request_id = request.get("id")
+        method = request.get("method")
+        params = request.get("params") or {}
+        start = time.monotonic()
+
+        handlers = {
+            "generate": self.generate,
+            "generate_direct": self.generate_direct,
+            "stats": self.stats,
+            "ping": lambda _: {"pong": True},
+        }
+
+        try:
+            if method not in handlers:
+                raise ValueError(f"Unknown method: {method}")
+            result = handlers[method](params)
+            response = {"id": request_id, "result": result}
+            with self._lock:
+                self.served += 1
+        except Exception as e:
+            logger.error(f"Request {request_id} ({method}) failed: {e}")
+            response = {"id": request_id, "error": {"type": type(e).__name__, "message": str(e)}}
+            with self._lock:
+                self.failed += 1
+
+        response["elapsed"] = round(time.monotonic() - start, 3)
+        return response
+
+
+def serve_stream(worker: Worker, reader, writer, concurrency: int = 1):
+    """
+    Serve NDJSON requests from ``reader`` until EOF or ``shutdown``.
+
+    With ``concurrency`` > 1 requests run on a thread pool and responses
+    are written as they finish, so clients must match them up by ``id``.
+    """
+    write_lock = threading.Lock()
+
+    def respond(response):
+        with write_lock:
+            writer.write(json.dumps(response) + "\n")
+            writer.flush()
+
+    def run(request):
+        respond(worker.handle(request))
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for line in reader:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                respond({"id": None, "error": {"type": "JSONDecodeError", "message": str(e)}})
+                continue
+
+            if request.get("method") == "shutdown":
+                respond({"id": request.get("id"), "result": {"shutdown": True}})
+                break
+
+            if concurrency > 1:
+                pool.submit(run, request)
+            else:
+                run(request)
+
+
+def serve_socket(worker: Worker, path: str, concurrency: int = 1):
+    """Serve NDJSON requests on a Unix socket, one stream per connection."""
+    if os.path.exists(path):
+        os.unlink(path)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            reader = (line.decode("utf-8") for line in self.rfile)
+            writer = _SocketWriter(self.wfile)
+            serve_stream(worker, reader, writer, concurrency=concurrency)
+
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+        logger.info(f"RPA worker listening on {path}")
+        server.serve_forever()
+
+
+class _SocketWriter:
+    """Text writer over a socket's binary file object."""
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+
+    def write(self, text: str):
+        self._wfile.write(text.encode("utf-8"))
+
+    def flush(self):
+        self._wfile.flush()
+
+
+def main():
+    """CLI entry point for the persistent worker."""
+    parser = argparse.ArgumentParser(
+        description="Research Paper Agent (RPA) - Persistent NDJSON worker",
+        epilog="Copyright (c) 2025 Aditya Patange. All rights reserved."
+    )
+
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="Listen on a Unix socket instead of stdin/stdout"
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Requests to process at once per connection (default: 1)"
+    )
+
+    parser.add_argument(
+        "--no-preload",
+        action="store_true",
+        help="Skip importing the generator dependencies at startup"
+    )
+
+    parser.add_argument(
+        "--version", "-v",
+        action="version",
+        version=f"Research Paper Agent v{VERSION} by {AUTHOR}"
+    )
+
+    args = parser.parse_args()
+
+    if not args.no_preload:
+        preload()
+
+    worker = Worker()
+
+    if args.socket:
+        serve_socket(worker, args.socket, concurrency=args.concurrency)
+        return
+
+    # stdout carries the protocol; send anything else printed by the
+    # generators or their dependencies to stderr instead
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    logger.info("RPA worker ready")
+    serve_stream(worker, sys.stdin, protocol_out, concurrency=args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""
+Research Paper Agent (RPA) - Test Configuration
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+
+The storm/ modules import each other as scripts, so the tests do too.
+Nothing here needs knowledge-storm, a provider key or the network.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "storm"))
@@ -0,0 +1,110 @@
+"""
+Research Paper Agent (RPA) - Snippet Deduplication Tests
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+"""
+
+import pytest
+
+from dedup import DedupRM
+
+PASSAGE = (
+    "Nada yoga treats sound as a path to meditation, using mantras, the drone of the "
+    "tanpura and the inner sounds heard in silence to steady the attention of the practitioner"
+)
+# The same passage as syndicated elsewhere, with a trailing credit line
+MIRRORED = PASSAGE + " according to the original article"
+UNRELATED = "The Sri Yantra is a diagram of nine interlocking triangles radiating from a central point"
+
+
+class FakeRM:
+    """Returns canned results for every query."""
+
+    def __init__(self, results):
+        self.results = results
+        self.k = 5
+
+    def forward(self, query_or_queries, exclude_urls=None):
+        return self.results
+
+
+def result(url, *snippets, title="Title"):
+    return {"url": url, "title": title, "description": "", "snippets": list(snippets)}
+
+
+@pytest.fixture
+def dedup():
+    return DedupRM(FakeRM([]))
+
+
+def test_merges_results_for_the_same_page(dedup):
+    results = [
+        result("http://www.example.com/page/", PASSAGE),
+        result("https://example.com/page?utm_source=feed", UNRELATED),
+    ]
+
+    deduplicated = dedup.deduplicate(results)
+
+    assert len(deduplicated) == 1
+    assert deduplicated[0]["snippets"] == [PASSAGE, UNRELATED]
+    assert dedup.stats()["url_duplicates"] == 1
+
+
+def test_drops_exact_duplicates_ignoring_case_and_punctuation(dedup):
+    results = [result("https://a.com", PASSAGE), result("https://b.com", PASSAGE.upper() + "!")]
+
+    deduplicated = dedup.deduplicate(results)
+
+    assert [r["url"] for r in deduplicated] == ["https://a.com"]
+    assert dedup.stats()["exact_duplicates"] == 1
+
+
+def test_keeps_the_longest_near_duplicate(dedup):
+    results = [
+        result("https://a.com", PASSAGE),
+        result("https://mirror.com", MIRRORED),
+        result("https://c.com", UNRELATED),
+    ]
+
+    deduplicated = dedup.deduplicate(results)
+
+    assert [(r["url"], r["snippets"]) for r in deduplicated] == [
+        ("https://mirror.com", [MIRRORED]),
+        ("https://c.com", [UNRELATED]),
+    ]
+    stats = dedup.stats()
+    assert stats["near_duplicates"] == 1
+    assert stats["tokens_removed"] > 0
+    assert (stats["snippets_in"], stats["snippets_out"]) == (3, 2)
+
+
+def test_distinct_snippets_are_kept(dedup):
+    results = [result("https://a.com", PASSAGE), result("https://c.com", UNRELATED)]
+
+    assert dedup.deduplicate(results) == results
+
+
+def test_repeats_of_earlier_searches_point_at_the_first_copy(dedup):
+    dedup.deduplicate([result("https://a.com", PASSAGE, title="First")])
+
+    deduplicated = dedup.deduplicate([result("https://mirror.com", MIRRORED, title="Mirror")])
+
+    assert deduplicated == [result("https://a.com", PASSAGE, title="First")]
+    assert dedup.stats()["merged_across_searches"] == 1
+
+    dedup.reset()
+    assert dedup.deduplicate([result("https://mirror.com", MIRRORED)])[0]["url"] == "https://mirror.com"
+
+
+def test_forward_flattens_and_deduplicates():
+    rm = DedupRM(FakeRM({"q1": [result("https://a.com", PASSAGE)], "q2": [result("https://a.com/", PASSAGE)]}))
+
+    assert rm.forward(["q1", "q2"]) == [result("https://a.com", PASSAGE)]
+    # Other attributes reach the wrapped module
+    assert rm.k == 5
+
+
+def test_validates_parameters():
+    with pytest.raises(ValueError):
+        DedupRM(FakeRM([]), threshold=0)
+    with pytest.raises(ValueError):
+        DedupRM(FakeRM([]), num_perm=10, bands=3)
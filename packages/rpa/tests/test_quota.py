@@ -0,0 +1,143 @@
+"""
+Research Paper Agent (RPA) - Quota Governor Tests
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+"""
+
+import time
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import quota
+from quota import ModelBudget, QuotaGovernor
+
+
+class RateLimitError(Exception):
+    def __init__(self, retry_after="0.05"):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(status_code=429, headers={"retry-after": retry_after})
+
+
+class APIStatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(quota, "backoff_delay", lambda attempt: 0.0)
+
+
+def test_admits_within_budget_without_waiting():
+    budget = ModelBudget("m", rpm=60, tpm=1000)
+
+    assert budget.acquire(400) < 0.05
+    assert budget.acquire(400) < 0.05
+    assert budget.snapshot()["admitted"] == 2
+
+
+def test_waits_for_tokens_to_refill():
+    # 6000 tokens a minute refill 100 a second
+    budget = ModelBudget("m", rpm=6000, tpm=6000)
+    budget.acquire(6000)
+
+    waited = budget.acquire(20)
+
+    assert 0.1 < waited < 1.0
+
+
+def test_settle_refunds_unused_tokens():
+    budget = ModelBudget("m", rpm=6000, tpm=6000)
+    budget.acquire(6000)
+    budget.settle(6000, 100)
+
+    assert budget.acquire(5000) < 0.05
+    assert budget.snapshot()["used_tokens"] == 100
+
+
+def test_oversized_call_is_capped_at_the_budget():
+    budget = ModelBudget("m", rpm=60, tpm=1000)
+
+    assert budget.acquire(50_000) < 0.05
+
+
+def test_higher_priority_is_admitted_first():
+    budget = ModelBudget("m", rpm=6000, tpm=6000)
+    budget.acquire(6000)
+    admitted = []
+
+    def call(name, priority):
+        budget.acquire(30, priority)
+        admitted.append(name)
+
+    low = threading.Thread(target=call, args=("low", 0))
+    high = threading.Thread(target=call, args=("high", 3))
+    low.start()
+    time.sleep(0.05)
+    high.start()
+    low.join(5)
+    high.join(5)
+
+    assert admitted == ["high", "low"]
+
+
+def test_pause_holds_admission():
+    budget = ModelBudget("m", rpm=6000, tpm=6000)
+    budget.pause(0.2)
+
+    assert budget.acquire(1) >= 0.15
+    assert budget.snapshot()["throttled"] == 1
+
+
+def test_configure_keeps_budgets_when_limits_are_unchanged():
+    governor = QuotaGovernor(rpm=100, tpm=1000)
+    budget = governor.budget("m")
+
+    governor.configure(rpm=100)
+    assert governor.budget("m") is budget
+
+    governor.configure(share=0.5)
+    assert governor.budget("m") is not budget
+    assert governor.budget("m").rpm == 50
+
+
+def _flaky(*errors):
+    errors = list(errors)
+
+    def fn():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    return fn
+
+
+def test_call_retries_rate_limits_and_pauses_the_model():
+    governor = QuotaGovernor(rpm=6000, tpm=60_000)
+
+    assert governor.call("m", _flaky(RateLimitError()), 10) == "ok"
+    assert governor.metrics()["m"]["throttled"] == 1
+
+
+def test_call_retries_server_and_connection_errors():
+    governor = QuotaGovernor(rpm=6000, tpm=60_000)
+    fn = _flaky(APIStatusError(529), APIStatusError(500), APIConnectionError("reset"))
+
+    assert governor.call("m", fn, 10) == "ok"
+    # Only a 429 pauses every caller
+    assert governor.metrics()["m"]["throttled"] == 0
+
+
+def test_call_raises_client_errors_and_gives_up_after_max_retries():
+    governor = QuotaGovernor(rpm=6000, tpm=60_000, max_retries=1)
+
+    with pytest.raises(APIStatusError):
+        governor.call("m", _flaky(APIStatusError(400)), 10)
+    with pytest.raises(APIStatusError):
+        governor.call("m", _flaky(APIStatusError(503), APIStatusError(503)), 10)
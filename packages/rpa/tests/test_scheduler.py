@@ -0,0 +1,224 @@
+"""
+Research Paper Agent (RPA) - Job Queue and Scheduler Tests
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+"""
+
+import time
+
+import pytest
+
+import scheduler
+from scheduler import JobQueue, Scheduler, worker_name
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(tmp_path / "queue")
+
+
+def _due(queue, job_id):
+    """Make a job waiting out its retry backoff claimable now."""
+    queue._conn().execute("UPDATE jobs SET not_before = 0 WHERE id = ?", (job_id,))
+
+
+def test_claims_by_priority_then_arrival(queue):
+    low = queue.submit("Low", priority=0)
+    first = queue.submit("First", priority=5)
+    second = queue.submit("Second", priority=5)
+
+    claimed = [queue.claim("w")["id"] for _ in range(3)]
+
+    assert claimed == [first, second, low]
+    assert queue.claim("w") is None
+
+
+def test_failure_backs_off_then_fails_after_max_attempts(queue):
+    job_id = queue.submit("Flaky", max_attempts=2)
+
+    job = queue.claim("w")
+    assert job["attempts"] == 1
+    assert queue.fail(job_id, "w", "boom") == "queued"
+    job = queue.job(job_id)
+    assert job["not_before"] >= job["created"]
+    assert job["error"] == "boom"
+
+    _due(queue, job_id)
+    assert queue.claim("w")["attempts"] == 2
+    assert queue.fail(job_id, "w", "boom again") == "failed"
+    assert queue.job(job_id)["finished"] is not None
+    assert queue.claim("w") is None
+
+
+def test_retry_waits_for_backoff(queue, monkeypatch):
+    monkeypatch.setattr(scheduler, "backoff_delay", lambda attempt, base, cap: 60.0)
+    job_id = queue.submit("Flaky")
+    queue.claim("w")
+
+    queue.fail(job_id, "w", "boom")
+
+    assert queue.job(job_id)["not_before"] > time.time() + 50
+    assert queue.claim("w") is None
+    assert queue.status()["retry_waiting"] == 1
+
+
+def test_fail_ignores_other_workers(queue):
+    job_id = queue.submit("Topic")
+    queue.claim("w1")
+
+    assert queue.fail(job_id, "w2", "not mine") is None
+    assert queue.job(job_id)["state"] == "running"
+
+
+def test_cancel_queued_job(queue):
+    job_id = queue.submit("Topic")
+
+    assert queue.cancel(job_id) == "cancelled"
+    assert queue.job(job_id)["state"] == "cancelled"
+    assert queue.claim("w") is None
+    assert queue.cancel(job_id + 1) is None
+
+
+def test_cancel_running_job(queue):
+    job_id = queue.submit("Topic")
+    queue.claim("w")
+
+    assert queue.cancel(job_id) == "running"
+    assert queue.job(job_id)["cancel_requested"]
+    assert queue.cancel_requests() == [(job_id, "w")]
+
+    queue.cancelled(job_id, "w")
+    assert queue.job(job_id)["state"] == "cancelled"
+    assert queue.cancel_requests() == []
+
+
+def test_failed_attempt_of_cancelled_job_is_not_retried(queue):
+    job_id = queue.submit("Topic")
+    queue.claim("w")
+    queue.cancel(job_id)
+
+    assert queue.fail(job_id, "w", "killed") == "cancelled"
+
+
+def test_requeue_stale_heartbeat(queue):
+    job_id = queue.submit("Topic")
+    queue.claim("w")
+    queue.heartbeat(job_id, "w")
+    assert queue.requeue_stale(max_age=60) == 0
+
+    queue._conn().execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time() - 120, job_id))
+
+    assert queue.requeue_stale(max_age=60) == 1
+    job = queue.job(job_id)
+    assert job["state"] == "queued"
+    assert "stopped responding" in job["error"]
+
+
+def test_release_does_not_use_an_attempt(queue):
+    job_id = queue.submit("Topic", max_attempts=1)
+    queue.claim("w")
+
+    assert queue.release("w") == 1
+    job = queue.job(job_id)
+    assert (job["state"], job["attempts"]) == ("queued", 0)
+    assert queue.claim("w")["id"] == job_id
+
+
+def test_complete_and_status(queue):
+    done = queue.submit("Done")
+    queue.submit("Waiting")
+    queue.claim("w")
+    queue.complete(done, "w", {"output_dir": "out"})
+
+    status = queue.status()
+
+    assert queue.job(done)["result"] == {"output_dir": "out"}
+    assert status["jobs"]["done"] == 1
+    assert status["jobs"]["queued"] == 1
+    assert status["queue_depth"] == 1
+    assert status["throughput"]["done"] == 1
+    assert not queue.idle()
+
+
+def test_submit_validates(queue):
+    with pytest.raises(ValueError):
+        queue.submit("Topic", generator="unknown")
+    with pytest.raises(ValueError):
+        queue.submit("Topic", max_attempts=0)
+
+
+class _FakeProcess:
+    """Stands in for a worker process; pids are made up."""
+
+    pids = iter(range(10_000, 20_000))
+
+    def __init__(self, alive=True, exitcode=None):
+        self.pid = next(self.pids)
+        self.alive = alive
+        self.exitcode = exitcode
+        self.terminated = False
+
+    def is_alive(self):
+        return self.alive
+
+    def terminate(self):
+        self.terminated = True
+        self.alive = False
+
+    def join(self, timeout=None):
+        pass
+
+
+@pytest.fixture
+def supervised(tmp_path, monkeypatch):
+    sched = Scheduler(tmp_path / "queue", workers=2)
+    spawned = []
+
+    def spawn():
+        spawned.append(_FakeProcess())
+        return spawned[-1]
+
+    monkeypatch.setattr(sched, "_spawn", spawn)
+    sched._processes = [spawn(), spawn()]
+    return sched, spawned
+
+
+def test_supervise_replaces_dead_worker_and_fails_its_job(supervised):
+    sched, spawned = supervised
+    dead = sched._processes[0]
+    job_id = sched.queue.submit("Topic")
+    sched.queue.claim(worker_name(dead.pid))
+    dead.alive, dead.exitcode = False, -9
+
+    sched._supervise()
+
+    assert sched._processes[0] is not dead
+    assert len(spawned) == 3
+    job = sched.queue.job(job_id)
+    assert job["state"] == "queued"
+    assert "-9" in job["error"]
+
+
+def test_supervise_stops_worker_of_cancelled_job(supervised):
+    sched, spawned = supervised
+    busy = sched._processes[1]
+    job_id = sched.queue.submit("Topic")
+    sched.queue.claim(worker_name(busy.pid))
+    sched.queue.cancel(job_id)
+
+    sched._supervise()
+
+    assert busy.terminated
+    assert sched._processes[1] is not busy
+    assert sched.queue.job(job_id)["state"] == "cancelled"
+
+
+def test_supervise_leaves_other_schedulers_cancellations(supervised):
+    sched, _ = supervised
+    job_id = sched.queue.submit("Topic")
+    sched.queue.claim("elsewhere:1")
+    sched.queue.cancel(job_id)
+
+    sched._supervise()
+
+    assert sched.queue.job(job_id)["state"] == "running"
+    assert not any(process.terminated for process in sched._processes)
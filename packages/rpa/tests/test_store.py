@@ -0,0 +1,153 @@
+"""
+Research Paper Agent (RPA) - Artifact Store Tests
+Copyright (c) 2025 Aditya Patange. All rights reserved.
+"""
+
+import os
+import json
+
+import pytest
+
+from store import ArtifactStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(tmp_path / "store")
+
+
+def make_run(parent, name, topic, article="# Paper\n\nSome text here.\n", created=None, **metadata):
+    run = parent / name
+    run.mkdir(parents=True)
+    (run / "paper.md").write_text(article, encoding="utf-8")
+    (run / "outline.md").write_text("# Outline\n", encoding="utf-8")
+    (run / "metadata.json").write_text(json.dumps({"topic": topic, **metadata}), encoding="utf-8")
+    if created is not None:
+        os.utime(run / "metadata.json", (created, created))
+    return run
+
+
+def _age_blobs(store):
+    """Move every blob's last reference past the gc grace period."""
+    with store._conn() as conn:
+        conn.execute("UPDATE blobs SET last_ref = 0")
+
+
+def test_ingest_indexes_and_stores_files(store, tmp_path):
+    run = make_run(tmp_path, "Sonic_Symbols_1", "Sonic Symbols", model="claude-sonnet-4")
+
+    paper = store.ingest(run, remove=True)
+
+    assert not run.exists()
+    assert paper["run"] == "Sonic_Symbols_1"
+    assert paper["generator"] == "direct"
+    assert paper["article"] == "paper.md"
+    assert paper["words"] == 5
+    assert store.latest("  sonic   SYMBOLS ")["run"] == "Sonic_Symbols_1"
+    assert store.get("Sonic_Symbols_1") == "# Paper\n\nSome text here.\n"
+    assert set(store.artifacts("Sonic_Symbols_1")) == {"metadata.json", "outline.md", "paper.md"}
+    assert store.metadata("Sonic_Symbols_1")["model"] == "claude-sonnet-4"
+
+    restored = store.restore("Sonic_Symbols_1", tmp_path / "restored")
+    assert (restored / "outline.md").read_text(encoding="utf-8") == "# Outline\n"
+
+
+def test_ingest_requires_metadata(store, tmp_path):
+    (tmp_path / "unfinished").mkdir()
+
+    with pytest.raises(FileNotFoundError):
+        store.ingest(tmp_path / "unfinished")
+
+
+def test_identical_files_share_a_blob(store, tmp_path):
+    store.ingest(make_run(tmp_path, "a", "Topic"))
+    store.ingest(make_run(tmp_path, "b", "Topic"))
+
+    stats = store.stats()
+
+    assert stats["papers"] == 2
+    assert stats["artifacts"] == 6
+    # Both runs have the same three files
+    assert stats["blobs"] == 3
+    assert stats["unique_bytes"] < stats["logical_bytes"]
+
+
+def test_reingest_replaces_the_entry(store, tmp_path):
+    run = make_run(tmp_path, "a", "Topic")
+    store.ingest(run)
+    (run / "paper.md").write_text("Rewritten\n", encoding="utf-8")
+
+    store.ingest(run)
+
+    assert store.stats()["papers"] == 1
+    assert store.get("a") == "Rewritten\n"
+
+
+def test_gc_keeps_newest_per_topic(store, tmp_path):
+    for number in range(3):
+        store.ingest(make_run(tmp_path, f"t{number}", "Topic", article=f"Draft {number}\n", created=1000 + number))
+    store.ingest(make_run(tmp_path, "other", "Other", created=1))
+    _age_blobs(store)
+
+    result = store.gc(keep_last=1)
+
+    assert sorted(result["papers_removed"]) == ["t0", "t1"]
+    assert [paper["run"] for paper in store.list()] == ["t2", "other"]
+    # No remaining paper references the two older drafts
+    assert result["blobs_removed"] == 2
+    assert store.get("t2") == "Draft 2\n"
+
+
+def test_gc_max_age_always_keeps_the_newest(store, tmp_path):
+    store.ingest(make_run(tmp_path, "old", "Topic", created=1000))
+    store.ingest(make_run(tmp_path, "older", "Topic", article="Older\n", created=500))
+
+    result = store.gc(max_age_days=1)
+
+    assert result["papers_removed"] == ["older"]
+    assert store.paper("old") is not None
+
+
+def test_gc_dry_run_deletes_nothing(store, tmp_path):
+    store.ingest(make_run(tmp_path, "a", "Topic", article="A\n", created=1000))
+    store.ingest(make_run(tmp_path, "b", "Topic", article="B\n", created=2000))
+    _age_blobs(store)
+
+    result = store.gc(keep_last=1, dry_run=True)
+
+    assert result["papers_removed"] == ["a"]
+    assert store.stats()["papers"] == 2
+    assert store.get("a") == "A\n"
+
+
+def test_gc_spares_recent_orphans(store, tmp_path):
+    store.ingest(make_run(tmp_path, "a", "Topic", article="A\n", created=1000))
+    store.ingest(make_run(tmp_path, "b", "Topic", article="B\n", created=2000))
+
+    result = store.gc(keep_last=1)
+
+    assert result["papers_removed"] == ["a"]
+    assert result["blobs_removed"] == 0
+
+
+def test_gc_spares_a_blob_reused_before_ingest(store, tmp_path):
+    store.ingest(make_run(tmp_path, "a", "Topic", article="A\n", created=1000))
+    store.ingest(make_run(tmp_path, "b", "Topic", article="B\n", created=2000))
+    _age_blobs(store)
+    # Another run produced the same draft and is being stored
+    digest, _, _ = store.put_file(tmp_path / "a" / "paper.md")
+
+    store.gc(keep_last=1)
+
+    assert store._blob_path(digest).exists()
+
+
+def test_put_file_rewrites_a_collected_blob(store, tmp_path):
+    run = make_run(tmp_path, "a", "Topic")
+    digest, _, _ = store.put_file(run / "paper.md")
+    _age_blobs(store)
+    assert store.gc()["blobs_removed"] == 1
+
+    store.put_file(run / "paper.md")
+
+    assert store._blob_path(digest).exists()